@@ -1,14 +1,58 @@
 from flask import (
     Flask, render_template, request, redirect, url_for, flash, session,
-    make_response, jsonify, send_from_directory, current_app
+    make_response, jsonify, send_from_directory, send_file, abort, current_app
 )
+from markupsafe import Markup
 from werkzeug.utils import secure_filename
 from flask_socketio import SocketIO, emit, join_room
 import random
 from db import save_user_profile_comprehensive, get_user_profile
 from datetime import datetime, date, timedelta
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
-from db import get_db_connection
+from db import get_db_connection, schema
+from geo import landmask
+from geo.distance import haversine_km
+from geo import matrix as city_matrix
+from geo.cities import CITY_COORDINATES, resolve_city
+from inventory.provider import InventoryProvider
+from catalog.index import Catalog
+from catalog.records import hotel_listing, car_listing, technician_listing
+from flights.airlines import AIRLINES
+from flights.search import DEPARTURE_WINDOWS, SORT_KEYS as FLIGHT_SORT_KEYS, FlightQuery, FlightSearch
+from notifications.feed import (
+    PAGE_SIZE as NOTIFICATION_PAGE_SIZE, create_broadcast, delete_feed_item, ensure_broadcasts_schema,
+    feed_page, feed_unread_count, insert_notifications, mark_feed_read
+)
+from notifications.retention import RETENTION_DAYS, NotificationRetention, ensure_retention_indexes
+from pricing import HOTEL_DISCOUNT, hotel_total, nights_between, surge_price, technician_total
+from realtime.counters import NOTIFICATIONS, SUPPORT, CounterReconciler, UnreadCounters
+from realtime.presence import ADMIN, USER, PresenceRegistry, PresenceSweeper
+from realtime.presence_sync import DatabasePresenceSync
+from realtime.transfers import ChunkedUploads, TransferError
+from read_marks import SUPPORT_USER, ensure_read_marks_schema, unread_count
+from reports.activity import render_activity_report
+from response_cache import ResponseCache
+from identity import Identity, IdentityCache
+from reports.bulk import BulkReportRunner, all_user_ids, fetch_activity
+from storage.assets import DIST_DIR, IMMUTABLE_MAX_AGE, AssetManifest
+from storage.responsive import ImageManifest
+from storage.serving import OFFLOAD_MODES, ETagCache, accel_location, etag_matches
+from storage.store import ArtifactStore, StorageSweeper
+from storage.uploads import (
+    AVATAR, PREVIEW, SIZE_LIMITS, THUMB, LimitedStream, UploadTooLarge, is_image, source_name, upload_kind, variant_name
+)
+from storage.variants import VariantWorker
+from table_versions import ensure_table_versions, load_table_versions
+from support.conversations import (
+    ensure_conversations_schema, ensure_support_indexes, list_conversations, mark_read, record_message
+)
+from support.history import (
+    PAGE_SIZE as SUPPORT_PAGE_SIZE, fetch_page, message_dict, page_payload, parse_page_args
+)
+from tickets.cache import latest_ticket, prune_versions, remove_tickets, ticket_dir
+from tickets.jobs import enqueue_ticket, ensure_ticket_jobs_schema
+from tickets.render import render_ticket
+from tickets.worker import TicketWorker
 import psycopg2
 import json
 import os
@@ -16,6 +60,7 @@ import uuid
 import math
 from pathlib import Path
 import logging
+import mimetypes
 import threading
 import time
 from reportlab.lib.pagesizes import A4
@@ -29,6 +74,7 @@ from reportlab.lib.enums import TA_CENTER, TA_LEFT
 import io
 import base64
 import re
+from functools import wraps
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -51,6 +97,207 @@ ALLOWED_SUPPORT_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf', 'doc', 'docx',
 # Ensure upload directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+# Per-type limits are enforced while files stream in; this only stops oversized bodies early
+app.config['MAX_CONTENT_LENGTH'] = max(SIZE_LIMITS.values()) + 1024 * 1024
+
+# ---------------------- Artifact Storage ----------------------
+# Tickets, reports and uploads live in sharded stores under STORAGE_ROOT
+# (default instance/storage, outside the source tree). URLs keep their
+# /static/... form; the old flat directories are still read and are drained
+# into the stores by the sweeper. Retention only expires files that no
+# database row refers to any more.
+STORAGE_ROOT = Path(os.environ.get('STORAGE_ROOT') or Path(app.instance_path) / 'storage')
+
+
+def referenced_artifacts(names):
+    """The ``names`` that a report, support message or ticket booking still points at.
+
+    Stored paths are URLs or paths ending in the file name, so rows match on
+    their last path segment. Retention only expires names not returned here.
+    """
+    columns = [
+        ("reports", "file_path"),
+        ("support_messages", "file_path"),
+        ("requests", "details->>'ticket_pdf_url'"),
+    ]
+    if schema.has_support_attachment_url:
+        columns.append(("support_messages", "attachment_url"))
+    refs = " UNION ".join(
+        f"SELECT regexp_replace({column}, '^.*/', '') AS name FROM {table} WHERE {column} IS NOT NULL"
+        for table, column in columns
+    )
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(f"SELECT name FROM ({refs}) refs WHERE name = ANY(%s)", (list(names),))
+        return {row[0] for row in cur.fetchall()}
+    finally:
+        cur.close()
+        conn.close()
+
+
+STATIC_ROOT = Path(app.static_folder or os.path.join(app.root_path, 'static'))
+ticket_store = ArtifactStore(STORAGE_ROOT / 'tickets', '/static/tickets',
+                             legacy_dir=STATIC_ROOT / 'tickets', retention_days=365,
+                             referenced=referenced_artifacts)
+report_store = ArtifactStore(STORAGE_ROOT / 'reports', '/static/reports',
+                             legacy_dir=STATIC_ROOT / 'reports', retention_days=90,
+                             referenced=referenced_artifacts)
+support_file_store = ArtifactStore(STORAGE_ROOT / 'support_files', '/static/uploads/support_files',
+                                   legacy_dir=STATIC_ROOT / 'uploads' / 'support_files',
+                                   retention_days=180, referenced=referenced_artifacts, dedupe=True)
+avatar_store = ArtifactStore(STORAGE_ROOT / 'avatars', '/static/uploads/profile_pictures',
+                             legacy_dir=STATIC_ROOT / 'uploads' / 'profile_pictures', dedupe=True)
+storage_sweeper = StorageSweeper([ticket_store, report_store, support_file_store, avatar_store])
+# Resized copies of uploaded images (avatar thumbnails, chat previews)
+variant_worker = VariantWorker()
+# Resumable attachments sent by admins over the socket
+support_uploads = ChunkedUploads(support_file_store)
+
+# File offload to a reverse proxy: '' (serve from the app), 'x-accel' (nginx) or 'x-sendfile'
+FILE_OFFLOAD = os.environ.get('FILE_OFFLOAD', '').lower()
+if FILE_OFFLOAD not in OFFLOAD_MODES:
+    raise RuntimeError(f"FILE_OFFLOAD must be one of {OFFLOAD_MODES}, got {FILE_OFFLOAD!r}")
+app.config['USE_X_SENDFILE'] = FILE_OFFLOAD == 'x-sendfile'
+# nginx `internal` locations aliased to these directories
+X_ACCEL_LOCATIONS = {
+    STORAGE_ROOT: os.environ.get('X_ACCEL_STORAGE_PREFIX', '/_protected/storage'),
+    STATIC_ROOT: os.environ.get('X_ACCEL_STATIC_PREFIX', '/_protected/static'),
+}
+file_etags = ETagCache()
+
+def send_artifact(store, name, as_attachment=False):
+    path = store.resolve(name)
+    if not path and (original := source_name(name)):
+        # Variant not rendered yet: serve the original meanwhile
+        name, path = original, store.resolve(original)
+    if not path:
+        abort(404)
+    etag = file_etags.get(path)
+
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        response = make_response('', 304)
+    elif FILE_OFFLOAD == 'x-accel' and (location := accel_location(path, X_ACCEL_LOCATIONS)):
+        # nginx streams the file itself, ranges included
+        response = make_response('')
+        response.headers['X-Accel-Redirect'] = location
+        response.mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        disposition = 'attachment' if as_attachment else 'inline'
+        response.headers['Content-Disposition'] = f'{disposition}; filename="{name}"'
+    else:
+        # conditional=True handles Range and If-Range; the file object goes to
+        # wsgi.file_wrapper (sendfile under gunicorn) or X-Sendfile
+        response = send_file(path, conditional=True, etag=etag,
+                             as_attachment=as_attachment, download_name=name)
+
+    response.set_etag(etag)
+    response.headers['Accept-Ranges'] = 'bytes'
+    # Private files: clients may keep them but must revalidate (cheap with the ETag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+@app.route('/static/tickets/<name>')
+def ticket_file(name):
+    return send_artifact(ticket_store, name)
+
+@app.route('/static/reports/<name>')
+def report_file(name):
+    return send_artifact(report_store, name)
+
+@app.route('/static/uploads/support_files/<name>')
+def support_file(name):
+    return send_artifact(support_file_store, name)
+
+@app.route('/static/uploads/profile_pictures/<name>')
+def profile_picture_file(name):
+    return send_artifact(avatar_store, name)
+
+# ---------------------- Static Assets ----------------------
+# CSS/JS built by `python -m storage.assets` into static/dist: minified,
+# content-hashed names and precompressed .br/.gz siblings (see storage/assets.py)
+static_assets = AssetManifest(STATIC_ROOT / DIST_DIR)
+
+def asset_url_for(endpoint, **values):
+    """url_for for templates: static files that were built resolve to their fingerprinted copy"""
+    if endpoint == 'static' and (hashed := static_assets.lookup(values.get('filename', ''))):
+        values['filename'] = hashed
+        endpoint = 'static_asset'
+    return url_for(endpoint, **values)
+
+app.jinja_env.globals['url_for'] = asset_url_for
+
+# Gallery images resized offline by `python -m storage.gallery` (see storage/responsive.py)
+gallery_images = ImageManifest(STATIC_ROOT)
+
+@app.template_global()
+def responsive_image(name, sizes, alt='', **attrs):
+    """<picture> with AVIF/WebP/JPEG srcsets for a static image or Unsplash URL"""
+    return Markup(gallery_images.picture(name, sizes, alt, **attrs))
+
+@app.route(f'/static/{DIST_DIR}/<path:filename>')
+def static_asset(filename):
+    found = static_assets.negotiate(filename, request.headers.get('Accept-Encoding'))
+    if not found:
+        abort(404)
+    path, encoding = found
+    # The name carries the content hash, so it doubles as a strong ETag
+    digest = filename.rsplit('.', 2)[1]
+    etag = f"{digest}-{encoding}" if encoding else digest
+    response = send_file(path, mimetype=mimetypes.guess_type(filename)[0], conditional=True, etag=etag)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.max_age = IMMUTABLE_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
+# ---------------------- Response Cache ----------------------
+# Polled JSON endpoints are served from memory while the tables they read are
+# unchanged and their TTL holds. Low-write tables carry database trigger
+# counters; users only counts deletions, so other processes drop the identity
+# of a deleted account. Other users writes and requests (the booking hot path)
+# rely on local invalidate() calls and the short admin TTL instead.
+VERSIONED_TABLES = ('reports', 'lifestyle_profiles', 'ai_recommendations')
+DELETE_VERSIONED_TABLES = ('users',)
+UNVERSIONED_TABLES = ('requests',)
+response_cache = ResponseCache(load_table_versions)
+
+def cached_json(tables, ttl, scope='user'):
+    """Cache a JSON view per user ('user') or for all admins ('admin'), with ETag revalidation"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if scope == 'admin':
+                if not session.get('is_admin'):
+                    return view(*args, **kwargs)  # the view answers 403
+                owner = 'admin'
+            else:
+                owner = current_user.get_id()
+            key = (request.endpoint, owner, request.query_string)
+            
+            entry = response_cache.lookup(key, tables)
+            if entry is None:
+                versions = response_cache.versions(tables)
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                entry = response_cache.store(key, versions, response.get_data(), ttl, response.mimetype)
+            
+            if etag_matches(request.headers.get('If-None-Match'), entry.etag):
+                response_cache.record_not_modified(entry)
+                response = make_response('', 304)
+            else:
+                response = make_response(entry.body)
+                response.mimetype = entry.mimetype
+            response.set_etag(entry.etag)
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
+
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -61,47 +308,23 @@ def allowed_support_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_SUPPORT_EXTENSIONS
 
-def save_support_file(file):
-    if file and allowed_support_file(file.filename):
-        filename = secure_filename(f"{uuid.uuid4().hex}_{file.filename}")
-        filepath = os.path.join(SUPPORT_UPLOAD_FOLDER, filename)
-        file.save(filepath)
-        return f"/static/uploads/support_files/{filename}"
-    return None
-
 def get_user_unread_count(user_id):
     """Get count of unread support messages for user"""
-    conn = get_db_connection()
-    cur = conn.cursor()
     try:
-        cur.execute("""
-            SELECT COUNT(*) 
-            FROM support_messages 
-            WHERE user_id = %s 
-            AND sender_type = 'admin' 
-            AND is_read = FALSE
-        """, (user_id,))
-        return cur.fetchone()[0]
+        return unread_counters.get(int(user_id))[SUPPORT]
     except Exception as e:
         logger.error(f"Error getting unread count: {e}")
         return 0
-    finally:
-        cur.close()
-        conn.close()
 
 def mark_messages_read(user_id):
     """Mark all admin messages as read for user"""
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        cur.execute("""
-            UPDATE support_messages 
-            SET is_read = TRUE 
-            WHERE user_id = %s 
-            AND sender_type = 'admin' 
-            AND is_read = FALSE
-        """, (user_id,))
+        # Moves the user's watermark; no per-message updates
+        mark_read(cur, user_id, 'user')
         conn.commit()
+        unread_counters.reset(int(user_id), SUPPORT)
     except Exception as e:
         conn.rollback()
         logger.error(f"Error marking messages read: {e}")
@@ -109,47 +332,26 @@ def mark_messages_read(user_id):
         cur.close()
         conn.close()
 
-def get_support_chat_history(user_id):
-    """Get chat history for support chat"""
+def get_support_chat_history(user_id, before_id=None, after_id=None, limit=SUPPORT_PAGE_SIZE):
+    """Get one page of support chat history (latest messages unless a cursor is given)"""
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        # First mark messages as read when fetching
-        mark_messages_read(user_id)
-        
-        cur.execute("""
-            SELECT 
-                id,
-                sender_type,
-                message,
-                message_type,
-                file_path,
-                created_at,
-                is_read
-            FROM support_messages 
-            WHERE user_id = %s 
-            ORDER BY created_at ASC
-            LIMIT 100
-        """, (user_id,))
+        # Paging back through old messages doesn't mean the new ones were seen
+        if before_id is None:
+            mark_messages_read(user_id)
         
+        rows, has_more = fetch_page(cur, user_id, before_id=before_id, after_id=after_id, limit=limit)
         messages = []
-        rows = cur.fetchall()
         for row in rows:
-            messages.append({
-                'id': row[0],
-                'sender_type': row[1],
-                'message': row[2],
-                'message_type': row[3],
-                'file_path': row[4],
-                'timestamp': row[5].isoformat() if row[5] else '',
-                'is_read': row[6],
-                'is_me': row[1] == 'user'  # For user's perspective
-            })
+            msg = message_dict(row)
+            msg['is_me'] = msg['sender_type'] == 'user'  # For user's perspective
+            messages.append(msg)
         
-        return messages
+        return page_payload(messages, has_more, after_id=after_id)
     except Exception as e:
         logger.error(f"Error getting chat history: {e}")
-        return []
+        return page_payload([], False, after_id=after_id)
     finally:
         cur.close()
         conn.close()
@@ -174,16 +376,11 @@ def save_support_message(user_id, sender_type, message, message_type='text', fil
         ))
         
         msg_id, timestamp = cur.fetchone()
+        # Inbox summary and unread counters move with the message
+        record_message(cur, user_id, msg_id, sender_type, message, timestamp)
         conn.commit()
-        
-        # Update user's unread count if admin sent message
         if sender_type == 'admin':
-            cur.execute("""
-                UPDATE users 
-                SET unread_support_count = COALESCE(unread_support_count, 0) + 1 
-                WHERE id = %s
-            """, (user_id,))
-            conn.commit()
+            unread_counters.incr(int(user_id), SUPPORT)
         
         return msg_id, timestamp
     except Exception as e:
@@ -195,27 +392,28 @@ def save_support_message(user_id, sender_type, message, message_type='text', fil
         conn.close()
 
 def save_support_file(file):
-    """Save support file and return URL"""
+    """Save support file and return URL (raises UploadTooLarge past the size limit)"""
+    if not (file and allowed_support_file(file.filename)):
+        return None
     try:
-        if file and allowed_support_file(file.filename):
-            # Create unique filename
-            timestamp = int(time.time())
-            original_name = secure_filename(file.filename)
-            filename = f"{timestamp}_{uuid.uuid4().hex}_{original_name}"
-            
-            # Ensure directory exists
-            os.makedirs(SUPPORT_UPLOAD_FOLDER, exist_ok=True)
-            
-            # Save file
-            file_path = os.path.join(SUPPORT_UPLOAD_FOLDER, filename)
-            file.save(file_path)
-            
-            # Return relative URL
-            return f"/static/uploads/support_files/{filename}"
+        # Create unique filename
+        timestamp = int(time.time())
+        original_name = secure_filename(file.filename)
+        filename = f"{timestamp}_{uuid.uuid4().hex}_{original_name}"
+        
+        # Capped while it streams in; identical uploads share one stored copy
+        limit = SIZE_LIMITS[upload_kind(filename)]
+        support_file_store.save_stream(filename, LimitedStream(file.stream, limit))
+    except UploadTooLarge:
+        raise
     except Exception as e:
         logger.error(f"Error saving support file: {e}")
+        return None
     
-    return None
+    if is_image(filename):
+        variant_worker.submit(support_file_store, filename, [PREVIEW])
+    # Return relative URL
+    return support_file_store.url_for(filename)
 
 # ---------------------- SUPPORT CHAT ROUTES ----------------------
 
@@ -225,11 +423,14 @@ def api_support_chat_history():
     """Get support chat history for user"""
     try:
         user_id = current_user.get_id()
-        messages = get_support_chat_history(user_id)
+        try:
+            page = parse_page_args(request.args)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         
         return jsonify({
             'success': True,
-            'messages': messages,
+            **get_support_chat_history(user_id, **page),
             'unread_count': get_user_unread_count(user_id)
         })
     except Exception as e:
@@ -291,6 +492,8 @@ def api_support_chat_send():
             'data': response_data
         })
         
+    except UploadTooLarge as e:
+        return jsonify({'success': False, 'error': str(e)}), 413
     except Exception as e:
         logger.error(f"Error sending message: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -301,59 +504,27 @@ def api_admin_support_users():
     if not session.get('is_admin'):
         return jsonify({"error": "Unauthorized"}), 403
     
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'limit must be an integer'}), 400
+    
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        # Get users with recent support messages - FIXED QUERY
-        cur.execute("""
-            SELECT 
-                u.id,
-                COALESCE(u.full_name, u.email) as name,
-                u.email,
-                u.profile_picture,
-                COALESCE(u.unread_support_count, 0) as unread_count,
-                sm.message as last_message,
-                sm.created_at as last_message_at,
-                sm.sender_type as last_sender,
-                CASE 
-                    WHEN EXISTS (
-                        SELECT 1 FROM support_messages sm2 
-                        WHERE sm2.user_id = u.id 
-                        AND sm2.sender_type = 'user' 
-                        AND sm2.created_at > NOW() - INTERVAL '5 minutes'
-                    ) THEN 'online'
-                    ELSE 'offline'
-                END as status
-            FROM users u
-            LEFT JOIN support_messages sm ON u.id = sm.user_id
-            WHERE u.id IN (
-                SELECT DISTINCT user_id FROM support_messages
-            )
-            AND sm.id = (
-                SELECT MAX(id) 
-                FROM support_messages 
-                WHERE user_id = u.id
-            )
-            ORDER BY sm.created_at DESC NULLS LAST
-        """)
-        
-        rows = cur.fetchall()
-        users = []
-        
-        for row in rows:
-            users.append({
-                'id': row[0],
-                'name': row[1] or row[2].split('@')[0],
-                'email': row[2],
-                'profile_picture': row[3] or '',
-                'unread_count': row[4],
-                'last_message': (row[5] or '')[:50] + ('...' if len(row[5] or '') > 50 else ''),
-                'last_message_at': row[6].isoformat() if row[6] else '',
-                'last_sender': row[7] or 'user',
-                'status': row[8] or 'offline'
-            })
-        
-        return jsonify({'success': True, 'users': users})
+        # One page of the inbox from the conversation summaries
+        users, next_cursor = list_conversations(
+            cur, cursor=request.args.get('cursor'), limit=limit,
+            is_online=lambda uid: presence.is_online(USER, uid)
+        )
+        for user in users:
+            last_message = user['last_message']
+            user['last_message'] = last_message[:50] + ('...' if len(last_message) > 50 else '')
+            user['last_message_at'] = user['last_message_at'].isoformat() if user['last_message_at'] else ''
+        
+        return jsonify({'success': True, 'users': users, 'next_cursor': next_cursor})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error getting support users: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -366,6 +537,10 @@ def api_admin_support_messages(user_id):
     """Get support messages for a specific user - IMPROVED VERSION"""
     if not session.get('is_admin'):
         return jsonify({"error": "Unauthorized"}), 403
+    try:
+        page = parse_page_args(request.args, default_limit=100)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     
     try:
         conn = get_db_connection()
@@ -386,69 +561,35 @@ def api_admin_support_messages(user_id):
             'name': user_row[1] or user_row[2].split('@')[0],
             'email': user_row[2],
             'profile_picture': user_row[3] or '',
-            'profile_picture_url': f"/static/uploads/profile_pictures/{user_row[3]}" if user_row[3] else ''
+            'profile_picture_url': avatar_store.url_for(variant_name(user_row[3], THUMB.name)) if user_row[3] else ''
         }
         
-        # Get messages with better ordering
-        cur.execute("""
-            SELECT 
-                id,
-                sender_type,
-                message,
-                message_type,
-                file_path,
-                created_at,
-                is_read
-            FROM support_messages 
-            WHERE user_id = %s 
-            ORDER BY created_at ASC
-            LIMIT 200
-        """, (user_id,))
+        # Latest page first; before_id/after_id page older or newer
+        rows, has_more = fetch_page(cur, user_id, **page)
         
         messages = []
-        rows = cur.fetchall()
         for row in rows:
-            file_path = row[4]
+            msg = message_dict(row)
+            file_path = msg['file_path']
             # Ensure file path is a full URL if it exists
             if file_path and not file_path.startswith('http') and not file_path.startswith('/'):
                 if 'support_files' in file_path:
-                    file_path = f"/static/uploads/support_files/{file_path.split('/')[-1]}"
+                    msg['file_path'] = f"/static/uploads/support_files/{file_path.split('/')[-1]}"
                 elif 'profile_pictures' in file_path:
-                    file_path = f"/static/uploads/profile_pictures/{file_path.split('/')[-1]}"
-            
-            messages.append({
-                'id': row[0],
-                'sender_type': row[1],
-                'message': row[2],
-                'message_type': row[3],
-                'file_path': file_path,
-                'timestamp': row[5].isoformat() if row[5] else '',
-                'is_read': row[6],
-                'is_admin': row[1] == 'admin'
-            })
-        
-        # Mark messages as read (admin viewed them)
-        cur.execute("""
-            UPDATE support_messages 
-            SET is_read = TRUE 
-            WHERE user_id = %s 
-            AND sender_type = 'user'
-            AND is_read = FALSE
-        """, (user_id,))
+                    msg['file_path'] = f"/static/uploads/profile_pictures/{file_path.split('/')[-1]}"
+            msg['is_admin'] = msg['sender_type'] == 'admin'
+            messages.append(msg)
         
-        # Reset user's unread count
-        cur.execute("""
-            UPDATE users 
-            SET unread_support_count = 0 
-            WHERE id = %s
-        """, (user_id,))
-        
-        conn.commit()
+        if page['before_id'] is None:
+            # Mark messages as read (admin viewed them) and reset the inbox badge
+            mark_read(cur, user_id, 'admin')
+            
+            conn.commit()
         
         return jsonify({
             'success': True,
             'user': user_info,
-            'messages': messages
+            **page_payload(messages, has_more, after_id=page['after_id'])
         })
         
     except Exception as e:
@@ -585,17 +726,9 @@ def generate_booking_report(user_id, booking_id, report_type):
         
         service_type, details, created_at = booking
         
-        # Generate PDF
-        from reportlab.lib.pagesizes import A4
-        from reportlab.pdfgen import canvas
-        from reportlab.lib import colors
-        
-        # Create reports directory if not exists
-        reports_dir = os.path.join('static', 'reports')
-        os.makedirs(reports_dir, exist_ok=True)
-        
+        # Generate PDF (ReportLab is imported once at module level)
         filename = f"report_{booking_id}_{int(time.time())}.pdf"
-        filepath = os.path.join(reports_dir, filename)
+        filepath = str(report_store.tmp_path(filename))
         
         # Create PDF
         c = canvas.Canvas(filepath, pagesize=A4)
@@ -639,6 +772,7 @@ def generate_booking_report(user_id, booking_id, report_type):
         c.drawString(50, 20, "Concierge Lifestyle Support")
         
         c.save()
+        report_store.put_file(filename, filepath)
         
         return filename
         
@@ -707,6 +841,8 @@ def api_admin_support_upload():
             'data': response_data
         })
         
+    except UploadTooLarge as e:
+        return jsonify({'success': False, 'error': str(e)}), 413
     except Exception as e:
         logger.error(f"Admin file upload error: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -760,6 +896,7 @@ def api_admin_generate_user_report():
             """, (user_id, report_type, report_url, ','.join(send_via)))
             report_id = cur.fetchone()[0]
             conn.commit()
+            response_cache.invalidate('reports')
         except Exception as e:
             logger.error(f"Error saving report metadata: {e}")
             # Continue even if metadata save fails
@@ -855,205 +992,24 @@ def api_admin_generate_user_report():
 def generate_user_activity_report(user_id, report_type='full', period=30):
     """Generate comprehensive user activity report PDF"""
     try:
-        from reportlab.lib.pagesizes import A4
-        from reportlab.pdfgen import canvas
-        from reportlab.lib import colors
-        from reportlab.platypus import Table, TableStyle
-        from datetime import datetime, timedelta
-
         conn = get_db_connection()
         cur = conn.cursor()
+        try:
+            activity = fetch_activity(cur, [user_id], period)
+        finally:
+            cur.close()
+            conn.close()
 
-        # Get user details
-        cur.execute("""
-            SELECT id, username, email, full_name, phone, created_at
-            FROM users WHERE id = %s
-        """, (user_id,))
-        user = cur.fetchone()
-
-        if not user:
+        if not activity:
             return None
 
-        user_id_db, username, email, full_name, phone, created_at = user
-
-        # Get user requests (period-based if not 'all')
-        if period == 'all':
-            cur.execute("""
-                SELECT booking_id, service_type, details, created_at
-                FROM requests WHERE user_id = %s
-                ORDER BY created_at DESC
-            """, (user_id,))
-        else:
-            period_date = datetime.now() - timedelta(days=int(period))
-            cur.execute("""
-                SELECT booking_id, service_type, details, created_at
-                FROM requests WHERE user_id = %s AND created_at >= %s
-                ORDER BY created_at DESC
-            """, (user_id, period_date))
-
-        requests = cur.fetchall()
-
-        # Get lifestyle profile if exists
-        cur.execute("""
-            SELECT monthly_budget, lifestyle_type, travel_frequency, preferred_services
-            FROM lifestyle_profiles WHERE user_id = %s
-        """, (user_id,))
-        profile = cur.fetchone()
-
-        cur.close()
-        conn.close()
-
-        # Create reports directory
-        reports_dir = os.path.join('static', 'reports')
-        os.makedirs(reports_dir, exist_ok=True)
+        user, requests, profile = activity[0]
 
         filename = f"user_report_{user_id}_{int(time.time())}.pdf"
-        filepath = os.path.join(reports_dir, filename)
-
-        # Create PDF
-        c = canvas.Canvas(filepath, pagesize=A4)
-        width, height = A4
-
-        # Gold color theme
-        gold = colors.HexColor('#d4af37')
-        dark = colors.HexColor('#1e293b')
-
-        # Header with gold background
-        c.setFillColor(gold)
-        c.rect(0, height - 80, width, 80, fill=True, stroke=False)
-
-        c.setFillColor(colors.white)
-        c.setFont("Helvetica-Bold", 24)
-        c.drawCentredString(width / 2, height - 40, "CONCIERGE LIFESTYLE")
-        c.setFont("Helvetica", 14)
-        c.drawCentredString(width / 2, height - 60, "User Activity Report")
-
-        # Reset color
-        c.setFillColor(colors.black)
-
-        # Report date
-        y_pos = height - 100
-        c.setFont("Helvetica", 10)
-        c.setFillColor(colors.grey)
-        c.drawRightString(width - 50, y_pos, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-
-        y_pos -= 30
-
-        # User Information Section
-        c.setFillColor(gold)
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(50, y_pos, "User Information")
-
-        y_pos -= 5
-        c.setStrokeColor(gold)
-        c.setLineWidth(2)
-        c.line(50, y_pos, width - 50, y_pos)
-
-        y_pos -= 20
-        c.setFillColor(colors.black)
-        c.setFont("Helvetica", 11)
-
-        info_data = [
-            f"Name: {full_name or 'N/A'}",
-            f"Username: {username}",
-            f"Email: {email or 'N/A'}",
-            f"Phone: {phone or 'Not provided'}",
-            f"Member Since: {created_at.strftime('%Y-%m-%d') if created_at else 'N/A'}"
-        ]
-
-        for info in info_data:
-            c.drawString(50, y_pos, info)
-            y_pos -= 18
-
-        y_pos -= 10
-
-        # Lifestyle Profile Section (if exists)
-        if profile:
-            c.setFillColor(gold)
-            c.setFont("Helvetica-Bold", 14)
-            c.drawString(50, y_pos, "Lifestyle Profile")
-
-            y_pos -= 5
-            c.setStrokeColor(gold)
-            c.line(50, y_pos, width - 50, y_pos)
-
-            y_pos -= 20
-            c.setFillColor(colors.black)
-            c.setFont("Helvetica", 11)
-
-            monthly_budget, lifestyle_type, travel_freq, preferred_services = profile
-            profile_data = [
-                f"Budget: {monthly_budget or 'Not set'}",
-                f"Lifestyle: {lifestyle_type or 'Not set'}",
-                f"Travel Frequency: {travel_freq or 'Not set'}",
-                f"Preferred Services: {preferred_services or 'Not set'}"
-            ]
-
-            for info in profile_data:
-                c.drawString(50, y_pos, info)
-                y_pos -= 18
-
-            y_pos -= 10
-
-        # Activity Summary Section
-        c.setFillColor(gold)
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(50, y_pos, f"Activity Summary (Last {period} days)" if period != 'all' else "Activity Summary (All Time)")
-
-        y_pos -= 5
-        c.setStrokeColor(gold)
-        c.line(50, y_pos, width - 50, y_pos)
-
-        y_pos -= 20
-        c.setFillColor(colors.black)
-        c.setFont("Helvetica", 11)
-
-        # Count by service type
-        service_counts = {}
-        for req in requests:
-            service_type = req[1]
-            service_counts[service_type] = service_counts.get(service_type, 0) + 1
-
-        c.drawString(50, y_pos, f"Total Requests: {len(requests)}")
-        y_pos -= 18
-
-        for service, count in service_counts.items():
-            c.drawString(70, y_pos, f"• {service}: {count}")
-            y_pos -= 18
-
-        y_pos -= 15
-
-        # Recent Requests Table (if space allows)
-        if y_pos > 150 and requests:
-            c.setFillColor(gold)
-            c.setFont("Helvetica-Bold", 14)
-            c.drawString(50, y_pos, "Recent Requests")
-
-            y_pos -= 5
-            c.setStrokeColor(gold)
-            c.line(50, y_pos, width - 50, y_pos)
-
-            y_pos -= 20
-            c.setFillColor(colors.black)
-            c.setFont("Helvetica", 9)
-
-            # Show up to 5 recent requests
-            for i, req in enumerate(requests[:5]):
-                if y_pos < 100:
-                    break
-                booking_id, service_type, details, req_created = req
-                c.drawString(50, y_pos, f"#{booking_id} - {service_type}")
-                c.drawString(300, y_pos, 'Completed')
-                c.drawString(400, y_pos, req_created.strftime('%Y-%m-%d') if req_created else 'N/A')
-                y_pos -= 15
-
-        # Footer
-        c.setFillColor(colors.grey)
-        c.setFont("Helvetica-Oblique", 9)
-        c.drawCentredString(width / 2, 30, "Concierge Lifestyle - Premium Services")
-        c.drawCentredString(width / 2, 20, "This is an automated report generated by the admin panel")
+        filepath = report_store.tmp_path(filename)
 
-        c.save()
+        render_activity_report(str(filepath), user, requests, profile, period)
+        report_store.put_file(filename, filepath)
 
         logger.info(f"Generated user report: {filename}")
         return filename
@@ -1064,6 +1020,53 @@ def generate_user_activity_report(user_id, report_type='full', period=30):
         traceback.print_exc()
         return None
 
+# ---------------------- Bulk user reports ----------------------
+def emit_bulk_report_progress(job):
+    event = 'bulk_report_done' if job.status in ('completed', 'failed') else 'bulk_report_progress'
+    socketio.emit(event, job.progress(), room='admin_support')
+
+bulk_reports = BulkReportRunner(report_store, on_progress=emit_bulk_report_progress)
+
+@app.route('/api/admin/bulk-user-reports', methods=['POST'])
+@login_required
+def api_admin_bulk_user_reports():
+    """Start a bulk activity report run; progress is pushed to the admin room"""
+    if not session.get('is_admin'):
+        return jsonify({"error": "Unauthorized"}), 403
+
+    data = request.get_json(silent=True) or {}
+    period = data.get('period', 30)
+    if period != 'all':
+        try:
+            period = int(period)
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': 'Invalid period'}), 400
+
+    user_ids = data.get('user_ids', 'all')
+    try:
+        user_ids = all_user_ids() if user_ids == 'all' else [int(uid) for uid in user_ids]
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'user_ids must be a list of ids or "all"'}), 400
+    except Exception as e:
+        logger.error(f"Bulk report user lookup failed: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+    if not user_ids:
+        return jsonify({'success': False, 'error': 'No users selected'}), 400
+
+    job = bulk_reports.submit(user_ids, period, data.get('report_type', 'full'), bool(data.get('zip')))
+    return jsonify({'success': True, **job.progress()}), 202
+
+@app.route('/api/admin/bulk-user-reports/<job_id>')
+@login_required
+def api_admin_bulk_user_report_status(job_id):
+    if not session.get('is_admin'):
+        return jsonify({"error": "Unauthorized"}), 403
+    job = bulk_reports.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, **job.progress(), 'failed_user_ids': job.failed,
+                    'files': [report_store.url_for(name) for name in job.files]})
+
 @app.route('/api/admin/support/clear-chat/<int:user_id>', methods=['DELETE'])
 @login_required
 def api_admin_clear_chat(user_id):
@@ -1077,10 +1080,11 @@ def api_admin_clear_chat(user_id):
         # Delete chat messages
         cur.execute("DELETE FROM support_messages WHERE user_id = %s", (user_id,))
         
-        # Reset unread count
-        cur.execute("UPDATE users SET unread_support_count = 0 WHERE id = %s", (user_id,))
+        # Drop the inbox entry with the history
+        cur.execute("DELETE FROM support_conversations WHERE user_id = %s", (user_id,))
         
         conn.commit()
+        unread_counters.refresh(user_id)
         
         return jsonify({'success': True, 'message': 'Chat cleared successfully'})
         
@@ -1142,6 +1146,7 @@ def handle_support_message(data):
 
 @app.route('/api/user/reports', methods=['GET'])
 @login_required
+@cached_json(('reports',), ttl=300)
 def api_user_reports():
     """Get all reports for the current user"""
     user_id = current_user.get_id()
@@ -1194,20 +1199,12 @@ def download_report(report_id):
             flash("Report not found or unauthorized", "error")
             return redirect(url_for('dashboard'))
         
-        file_path = result[0]
-        # Remove /static/ prefix if present
-        if file_path.startswith('/static/'):
-            file_path = file_path[8:]  # Remove '/static/'
-        
-        # Full path to file
-        reports_dir = os.path.join('static', 'reports')
-        full_path = os.path.join(reports_dir, os.path.basename(file_path))
-        
-        if not os.path.exists(full_path):
+        name = report_store.name_from_url(result[0])
+        if not name or not report_store.resolve(name):
             flash("Report file not found", "error")
             return redirect(url_for('dashboard'))
         
-        return send_file(full_path, as_attachment=True)
+        return send_artifact(report_store, name, as_attachment=True)
         
     except Exception as e:
         logger.error(f"Error downloading report: {e}")
@@ -1399,6 +1396,89 @@ def handle_admin_support_file(data):
         
     except Exception as e:
         logger.error(f"Admin support file error: {e}")
+
+# Chunked admin attachments: upload_begin, then upload_chunk until done.
+# Every event is acknowledged; the ack's offset is where the client continues.
+def admin_upload_owner():
+    """Uploads belong to one admin login, so a reconnect resumes them and other admins can't touch them"""
+    return (ADMIN, 'support', session.get('admin_session') or request.sid)
+
+@socketio.on('upload_begin')
+def handle_upload_begin(data):
+    """Start a chunked attachment upload, or resume one after a reconnect"""
+    if not session.get('is_admin'):
+        return {'error': 'Unauthorized'}
+    try:
+        file_name = data.get('name') or ''
+        if not allowed_support_file(file_name):
+            return {'error': 'File type not allowed'}
+        stored_name = f"{int(time.time())}_{uuid.uuid4().hex}_{secure_filename(file_name)}"
+        upload = support_uploads.begin(
+            admin_upload_owner(), stored_name, int(data.get('size') or 0), SIZE_LIMITS[upload_kind(file_name)],
+            sha256=data.get('sha256'),
+            meta={'user_id': int(data.get('user_id')), 'file_name': file_name},
+            upload_id=data.get('upload_id')
+        )
+        return {'upload_id': upload.id, 'offset': upload.offset, 'chunk_size': support_uploads.chunk_size}
+    except (TypeError, ValueError) as e:
+        return {'error': str(e)}
+    except OSError as e:
+        logger.error(f"Chunked upload could not start: {e}")
+        return {'error': 'Could not start the upload'}
+
+@socketio.on('upload_chunk')
+def handle_upload_chunk(data):
+    """Write one binary chunk; the last one posts the file to the user's chat"""
+    if not session.get('is_admin'):
+        return {'error': 'Unauthorized'}
+    upload_id = data.get('upload_id')
+    owner = admin_upload_owner()
+    try:
+        upload = support_uploads.write(upload_id, owner, int(data.get('offset', -1)), data.get('data'))
+        if not upload.complete:
+            return {'offset': upload.offset}
+        support_uploads.finish(upload_id, owner)
+    except (TypeError, ValueError) as e:
+        offset = e.offset if isinstance(e, TransferError) else None
+        return {'error': str(e), 'offset': offset}
+    except OSError as e:
+        logger.error(f"Chunked upload write error: {e}")
+        return {'error': 'Could not store the file', 'offset': None}
+
+    try:
+        user_id = upload.meta['user_id']
+        file_url = support_file_store.url_for(upload.name)
+        if is_image(upload.name):
+            variant_worker.submit(support_file_store, upload.name, [PREVIEW])
+        
+        message = f"File: {upload.meta['file_name']}"
+        msg_id, timestamp = save_support_message(
+            user_id=user_id,
+            sender_type='admin',
+            message=message,
+            message_type='file',
+            file_path=file_url
+        )
+        response_data = {
+            'id': msg_id,
+            'user_id': user_id,
+            'sender_type': 'admin',
+            'message': message,
+            'message_type': 'file',
+            'file_path': file_url,
+            'timestamp': timestamp.isoformat(),
+            'is_admin': True
+        }
+        socketio.emit('support_message_received', response_data, room=f"user_{user_id}")
+        return {'offset': upload.offset, 'done': True, 'data': response_data}
+    except Exception as e:
+        logger.error(f"Chunked upload message error: {e}")
+        return {'error': 'File stored but the message could not be sent'}
+
+@socketio.on('upload_cancel')
+def handle_upload_cancel(data):
+    if session.get('is_admin'):
+        support_uploads.cancel(data.get('upload_id'), admin_upload_owner())
         
 # ---------------------- Flask-Login ----------------------
 login_manager = LoginManager()
@@ -1408,27 +1488,50 @@ login_manager.login_view = 'login'
 class User(UserMixin):
     pass
 
-@login_manager.user_loader
-def load_user(user_id):
-    try:
-        user_id = int(user_id)
-    except (ValueError, TypeError):
-        return None
+def load_identity(user_id):
     conn = get_db_connection()
     cur = conn.cursor()
     try:
         cur.execute("SELECT id, username FROM users WHERE id = %s", (user_id,))
         user_data = cur.fetchone()
-        if user_data:
-            user = User()
-            user.id = str(user_data[0])
-            return user
-    except Exception as e:
-        logger.error(f"load_user error: {e}")
+        return Identity(*user_data) if user_data else None
     finally:
         cur.close()
         conn.close()
-    return None
+
+# User records cached per process (dropped on local writes and on any users delete) plus
+# signed session claims that skip the lookup for IDENTITY_CLAIM_TTL seconds (0 = off)
+identity_cache = IdentityCache(load_identity, version=lambda: response_cache.versions(('users',)),
+                               claim_ttl=int(os.environ.get('IDENTITY_CLAIM_TTL', 60)))
+
+def issue_identity_claim(identity):
+    claim = identity_cache.issue_claim(identity)
+    if claim:
+        session['identity'] = claim
+
+def invalidate_identity(user_id):
+    response_cache.invalidate('users')
+    identity_cache.invalidate(int(user_id))
+
+@login_manager.user_loader
+def load_user(user_id):
+    try:
+        user_id = int(user_id)
+    except (ValueError, TypeError):
+        return None
+    if not identity_cache.check_claim(session.get('identity'), user_id):
+        try:
+            identity = identity_cache.get(user_id)
+        except Exception as e:
+            logger.error(f"load_user error: {e}")
+            return None
+        if not identity:
+            session.pop('identity', None)
+            return None
+        issue_identity_claim(identity)
+    user = User()
+    user.id = str(user_id)
+    return user
 
 # ---------------------- Helper Functions ----------------------
 def get_tomorrow_date():
@@ -1465,8 +1568,10 @@ def delete_notification(notification_id, user_id):
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        cur.execute("DELETE FROM notifications WHERE id = %s AND user_id = %s", (notification_id, user_id))
+        # Broadcasts ("b<id>") are dismissed for this user only
+        delete_feed_item(cur, user_id, notification_id)
         conn.commit()
+        unread_counters.refresh(int(user_id))
         return True
     except Exception as e:
         conn.rollback()
@@ -1485,6 +1590,7 @@ def save_notification(user_id, title, message, icon='notifications', type='info'
             VALUES (%s, %s, %s, %s, %s)
         """, (user_id, title, message, icon, type))
         conn.commit()
+        unread_counters.incr(int(user_id), NOTIFICATIONS)
     except Exception as e:
         conn.rollback()
         logger.error(f"Failed to save notification: {e}")
@@ -1492,33 +1598,12 @@ def save_notification(user_id, title, message, icon='notifications', type='info'
         cur.close()
         conn.close()
 
-def get_user_notifications(user_id, limit=50):
+def get_user_notifications(user_id, cursor=None, limit=NOTIFICATION_PAGE_SIZE):
+    """One page of the feed (personal notifications merged with broadcasts) and the next cursor"""
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        cur.execute("""
-            SELECT id, title, message, icon, type, created_at, is_read
-            FROM notifications
-            WHERE user_id = %s
-            ORDER BY created_at DESC
-            LIMIT %s
-        """, (user_id, limit))
-        rows = cur.fetchall()
-        return [
-            {
-                "id": r[0],
-                "title": r[1],
-                "message": r[2],
-                "icon": r[3],
-                "type": r[4],
-                "time": r[5].strftime("%I:%M %p") if r[5] else "Just now",
-                "time_ago": time_ago(r[5]) if r[5] else "Just now",
-                "is_read": r[6]
-            } for r in rows
-        ]
-    except Exception as e:
-        logger.error(f"Error fetching notifications: {e}")
-        return []
+        return feed_page(cur, user_id, cursor, limit)
     finally:
         cur.close()
         conn.close()
@@ -1527,43 +1612,38 @@ def mark_notifications_read(user_id):
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        cur.execute("UPDATE notifications SET is_read = TRUE WHERE user_id = %s AND is_read = FALSE", (user_id,))
+        mark_feed_read(cur, user_id)
         conn.commit()
+        unread_counters.reset(int(user_id), NOTIFICATIONS)
     except Exception as e:
         conn.rollback()
+        logger.error(f"Error marking notifications read: {e}")
     finally:
         cur.close()
         conn.close()
 
 def get_unread_count(user_id):
-    conn = get_db_connection()
-    cur = conn.cursor()
     try:
-        cur.execute("SELECT COUNT(*) FROM notifications WHERE user_id = %s AND is_read = FALSE", (user_id,))
-        return cur.fetchone()[0]
+        return unread_counters.get(int(user_id))[NOTIFICATIONS]
     except:
         return 0
+
+def load_unread_counts(user_id):
+    """Unread counts from the database; the counter cache loads and reconciles through this"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        return {
+            NOTIFICATIONS: feed_unread_count(cur, user_id),
+            SUPPORT: unread_count(cur, user_id, SUPPORT_USER)
+        }
     finally:
         cur.close()
         conn.close()
 
-def time_ago(dt):
-    if not dt:
-        return "Just now"
-    now = datetime.now()
-    diff = now - dt
-    if diff.total_seconds() < 60:
-        return "Just now"
-    elif diff.total_seconds() < 3600:
-        mins = int(diff.total_seconds() // 60)
-        return f"{mins} minute{'s' if mins != 1 else ''} ago"
-    elif diff.total_seconds() < 86400:
-        hours = int(diff.total_seconds() // 3600)
-        return f"{hours} hour{'s' if hours != 1 else ''} ago"
-    else:
-        days = diff.days
-        return f"{days} day{'s' if days != 1 else ''} ago"
-    
+def emit_unread_counts(user_id, counts):
+    socketio.emit('unread_counts', counts, room=f"user_{user_id}")
+
 def _parse_details(val):
     if isinstance(val, dict):
         return val
@@ -1654,8 +1734,7 @@ def inject_common_variables():
             cur.close()
             conn.close()
         
-        # Get notifications and counts
-        notifications = get_user_notifications(user_id)
+        # The dashboard loads its own notification page; other pages only need the count
         unread_count = get_unread_count(user_id)
         
         # Get requests
@@ -1726,7 +1805,8 @@ def inject_common_variables():
             'current_user_id': user_id,
             'user': username,
             'unread_count': unread_count,
-            'notifications': notifications,
+            'notifications': [],
+            'notifications_cursor': None,
             'has_lifestyle_profile': has_profile,
             'contact': contact,
             'requests': requests,
@@ -1740,6 +1820,7 @@ def inject_common_variables():
         'user': 'Guest',
         'unread_count': 0,
         'notifications': [],
+        'notifications_cursor': None,
         'has_lifestyle_profile': False,
         'contact': {},
         'support_unread_count': 0,
@@ -1866,6 +1947,7 @@ def save_lifestyle():
             cur.execute("DELETE FROM ai_recommendations WHERE user_id = %s", (user_id,))
             
             conn.commit()
+            response_cache.invalidate('lifestyle_profiles', 'ai_recommendations')
             
             # Check if AJAX request
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest' or request.args.get('ajax') == '1':
@@ -1890,391 +1972,40 @@ def save_lifestyle():
     
     return redirect(url_for('dashboard'))
 
-# ---------------------- Static dirs ----------------------
-def get_tickets_dir():
-    static_folder = app.static_folder or os.path.join(app.root_path, 'static')
-    tickets_dir = Path(static_folder) / "tickets"
-    tickets_dir.mkdir(parents=True, exist_ok=True)
-    return tickets_dir
-
-TICKETS_DIR = get_tickets_dir()
-
 # ---------------------- PDF Ticket Generation ----------------------
 def generate_pdf_ticket(booking_id, service_type, details, user_id):
     """Generate professional PDF ticket"""
-    filename = f"ticket_{booking_id}.pdf"
-    filepath = TICKETS_DIR / filename
-    
-    doc = SimpleDocTemplate(str(filepath), pagesize=A4)
-    story = []
-    styles = getSampleStyleSheet()
-    
-    title_style = ParagraphStyle(
-        'TitleStyle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#2c3e50'),
-        spaceAfter=20,
-        alignment=TA_CENTER
-    )
-    
-    header_style = ParagraphStyle(
-        'HeaderStyle',
-        parent=styles['Heading2'],
-        fontSize=16,
-        textColor=colors.HexColor('#34495e'),
-        spaceAfter=10
+    return render_ticket(booking_id, service_type, details, ticket_store.root)
+
+# ---------------------- Async Ticket Worker ----------------------
+# Confirm endpoints queue a ticket_jobs row with the booking and return at once;
+# the worker renders off the request path and pushes the result to the user.
+def push_ticket_ready(job, ticket_url):
+    socketio.emit('ticket_received', {
+        'booking_id': job.booking_id,
+        'service_type': job.service_type,
+        'ticket_pdf_url': ticket_url,
+        'message': 'Your PDF ticket has been generated! Download it now.'
+    }, room=f"user_{job.user_id}")
+    save_notification(
+        user_id=job.user_id,
+        title="PDF Ticket Ready",
+        message=f"Your ticket for {job.booking_id} is ready to download.",
+        icon="picture_as_pdf",
+        type="info"
     )
-    
-    normal_style = ParagraphStyle(
-        'NormalStyle',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.HexColor('#2c3e50')
-    )
-    
-    story.append(Paragraph("CONCIERGE LIFESTYLE", title_style))
-    story.append(Paragraph(f"{service_type} - Booking Ticket", header_style))
-    story.append(Spacer(1, 20))
-    
-    booking_data = [
-        ["Booking ID:", booking_id],
-        ["Generated On:", datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
-        ["Ticket Status:", "CONFIRMED"]
-    ]
-    
-    booking_table = Table(booking_data, colWidths=[200, 300])
-    booking_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#ecf0f1')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#2c3e50')),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('TOPPADDING', (0, 0), (-1, -1), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#bdc3c7'))
-    ]))
-    story.append(booking_table)
-    story.append(Spacer(1, 30))
-    
-    story.append(Paragraph("Booking Details", header_style))
-    story.append(Spacer(1, 10))
-    
-    if service_type == 'Car Booking':
-        car_data = [
-            ["Car Model:", details.get('car_model', 'N/A')],
-            ["Cab Class:", details.get('cab_class', 'Standard')],
-            ["Pickup Location:", details.get('pickup', 'N/A')],
-            ["Drop-off Location:", details.get('dropoff', 'N/A')],
-            ["Pickup Date:", details.get('pickup_date', 'N/A')],
-            ["Pickup Time:", details.get('pickup_time', 'N/A')],
-            ["Passengers:", str(details.get('passengers', 1))],
-            ["Total Amount:", f"₹{details.get('total_price', 0)}"],
-            ["Booking Status:", "Confirmed"]
-        ]
-        
-        table = Table(car_data, colWidths=[200, 300])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#3498db')),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.white),
-            ('BACKGROUND', (1, 0), (1, -1), colors.HexColor('#ecf0f1')),
-            ('TEXTCOLOR', (1, 0), (1, -1), colors.HexColor('#2c3e50')),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#bdc3c7'))
-        ]))
-        story.append(table)
-        
-        otp = random.randint(1000, 9999)
-        story.append(Spacer(1, 30))
-        story.append(Paragraph("Driver Verification", header_style))
-        story.append(Spacer(1, 10))
-        story.append(Paragraph(f"Verification Code: <font size='20' color='#e74c3c'><b>{otp}</b></font>", 
-                              ParagraphStyle('OTPStyle', parent=styles['Normal'], fontSize=12)))
-        story.append(Paragraph("Show this code to your driver for verification", normal_style))
-        
-        # Add Passenger List if available
-        if details.get('passengers_details'):
-            story.append(Spacer(1, 20))
-            story.append(Paragraph("Passenger List", header_style))
-            story.append(Spacer(1, 10))
-            
-            pax_data = [["Name", "Age", "Gender"]]
-            for pax in details['passengers_details']:
-                pax_data.append([
-                    pax.get('name', '-'),
-                    str(pax.get('age', '-')),
-                    pax.get('gender', '-')
-                ])
-                
-            pax_table = Table(pax_data, colWidths=[250, 100, 150])
-            pax_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                ('TOPPADDING', (0, 0), (-1, -1), 6),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#bdc3c7'))
-            ]))
-            story.append(pax_table)
-        
-    elif service_type == 'Hotel Booking':
-        hotel_data = [
-            ["Hotel Name:", details.get('hotel_name', 'N/A')],
-            ["Check-in Date:", details.get('checkin', 'N/A')],
-            ["Check-out Date:", details.get('checkout', 'N/A')],
-            ["Rooms:", str(details.get('rooms', 1))],
-            ["Guests:", str(details.get('guests', 1))],
-            ["Contact Email:", details.get('email', 'N/A')],
-            ["Contact Mobile:", details.get('mobile', 'N/A')],
-            ["Total Amount:", f"₹{details.get('total_amount', 0)}"],
-            ["Booking Status:", "Confirmed"],
-            ["Confirmation Number:", f"HL-{random.randint(100000, 999999)}"]
-        ]
-        
-        table = Table(hotel_data, colWidths=[200, 300])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#27ae60')),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.white),
-            ('BACKGROUND', (1, 0), (1, -1), colors.HexColor('#ecf0f1')),
-            ('TEXTCOLOR', (1, 0), (1, -1), colors.HexColor('#2c3e50')),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#bdc3c7'))
-        ]))
-        story.append(table)
-        
-        # Add Guest List if available
-        if details.get('guest_details'):
-            story.append(Spacer(1, 20))
-            story.append(Paragraph("Guest List", header_style))
-            story.append(Spacer(1, 10))
-            
-            guest_list_data = [["Room", "Guest Name", "Type"]]
-            for guest in details['guest_details']:
-                guest_list_data.append([
-                    f"Room {guest.get('room', '-')}",
-                    f"{guest.get('title', '')} {guest.get('name', 'Guest')}",
-                    guest.get('type', '-')
-                ])
-                
-            guest_table = Table(guest_list_data, colWidths=[80, 320, 100])
-            guest_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#7f8c8d')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                ('TOPPADDING', (0, 0), (-1, -1), 6),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#bdc3c7'))
-            ]))
-            story.append(guest_table)
-        
-    elif service_type == 'Flight Booking':
-        flight_data = [
-            ["Airline:", details.get('airline', 'N/A')],
-            ["Flight Number:", details.get('flight_no', details.get('flight', {}).get('flight_no', 'N/A'))],
-            ["Departure:", f"{details.get('origin', 'N/A')} ({details.get('origin_code', 'XXX')})"],
-            ["Arrival:", f"{details.get('destination', 'N/A')} ({details.get('destination_code', 'YYY')})"],
-            ["Departure Time:", details.get('departure_time', 'N/A')],
-            ["Arrival Time:", details.get('arrival_time', 'N/A')],
-            ["Travel Class:", details.get('travel_class', 'Economy').title()],
-            ["Duration:", details.get('duration', 'N/A')],
-            ["Baggage Allowance:", details.get('baggage_allowance', '20kg')],
-            ["Total Amount:", f"₹{details.get('price', 0)}"],
-            ["PNR:", f"{random.choice(['AI', '6E', 'SG', 'UK'])}-{random.randint(1000000, 9999999)}"]
-        ]
-        
-        table = Table(flight_data, colWidths=[200, 300])
-        if details.get('traveller_details'):
-            story.append(Spacer(1, 20))
-            story.append(Paragraph("Traveller List", header_style))
-            story.append(Spacer(1, 10))
-            
-            pax_data = [["Title", "Full Name"]]
-            for pax in details['traveller_details']:
-                pax_data.append([
-                    pax.get('title', '-'),
-                    pax.get('full_name', '-')
-                ])
-                
-            pax_table = Table(pax_data, colWidths=[100, 300])
-            pax_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#9b59b6')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                ('TOPPADDING', (0, 0), (-1, -1), 6),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#bdc3c7'))
-            ]))
-            story.append(pax_table)
-            
-    elif service_type == 'Technician Booking':
-        tech_data = [
-            ["Service Type:", details.get('service_type', 'N/A').replace('_', ' ').title()],
-            ["Technician:", details.get('name', 'Assigned Technician')],
-            ["Service Date:", details.get('service_date', 'N/A')],
-            ["Service Time:", details.get('service_time', 'N/A')],
-            ["Location:", details.get('location', 'N/A')],
-            ["Issue Description:", details.get('description', 'N/A')],
-            ["Urgency:", details.get('urgency', 'Normal').title()],
-            ["Service Charge:", f"₹{details.get('total_price', 0)}"],
-            ["Technician ID:", details.get('technician_id', 'N/A')]
-        ]
-        
-        table = Table(tech_data, colWidths=[200, 300])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e67e22')),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.white),
-            ('BACKGROUND', (1, 0), (1, -1), colors.HexColor('#ecf0f1')),
-            ('TEXTCOLOR', (1, 0), (1, -1), colors.HexColor('#2c3e50')),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#bdc3c7'))
-        ]))
-        story.append(table)
-
-        # Add Customer Details if available
-        if details.get('customer_name'):
-            story.append(Spacer(1, 20))
-            story.append(Paragraph("Customer Details", header_style))
-            story.append(Spacer(1, 10))
-            
-            cust_data = [
-                ["Customer Name:", details.get('customer_name', 'N/A')],
-                ["Customer Address:", details.get('customer_address', 'N/A')],
-                ["Primary Contact:", details.get('mobile', 'N/A')],
-                ["Alternate Contact:", details.get('alternate_phone', 'N/A')],
-                ["Email:", details.get('email', 'N/A')]
-            ]
-            
-            cust_table = Table(cust_data, colWidths=[200, 300])
-            cust_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#d35400')),
-                ('TEXTCOLOR', (0, 0), (0, -1), colors.white),
-                ('BACKGROUND', (1, 0), (1, -1), colors.HexColor('#fdebd0')),
-                ('TEXTCOLOR', (1, 0), (1, -1), colors.HexColor('#2c3e50')),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                ('TOPPADDING', (0, 0), (-1, -1), 6),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#bdc3c7'))
-            ]))
-            story.append(cust_table)
-        
-    elif service_type == 'Courier Booking':
-        courier_data = [
-            ["Courier Service:", details.get('courier_name', 'N/A')],
-            ["Pickup Location:", details.get('pickup_location', 'N/A')],
-            ["Delivery Location:", details.get('dropoff_location', 'N/A')],
-            ["Pickup Date:", details.get('pickup_date', 'N/A')],
-            ["Pickup Time:", details.get('pickup_time', 'N/A')],
-            ["Package Weight:", f"{details.get('package_weight_kg', 0)} kg"],
-            ["Courier Type:", details.get('courier_type', 'Standard').title()],
-            ["Delivery Duration:", details.get('delivery_duration', 'N/A')],
-            ["Shipping Cost:", f"₹{details.get('total_price_inr', 0)}"],
-            ["Tracking ID:", f"TRK-{random.randint(1000000000, 9999999999)}"]
-        ]
-        
-        table = Table(courier_data, colWidths=[200, 300])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#1abc9c')),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.white),
-            ('BACKGROUND', (1, 0), (1, -1), colors.HexColor('#ecf0f1')),
-            ('TEXTCOLOR', (1, 0), (1, -1), colors.HexColor('#2c3e50')),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#bdc3c7'))
-        ]))
-        story.append(table)
-
-        # Add Sender/Receiver Info if available
-        if details.get('sender') and details.get('receiver'):
-            story.append(Spacer(1, 20))
-            story.append(Paragraph("Shipping Details", header_style))
-            story.append(Spacer(1, 10))
-            
-            sender = details['sender']
-            receiver = details['receiver']
-            
-            shipping_data = [
-                ["Sender", "Receiver"],
-                [f"Name: {sender.get('name', '-')}", f"Name: {receiver.get('name', '-')}"],
-                [f"Phone: {sender.get('phone', '-')}", f"Phone: {receiver.get('phone', '-')}"],
-                [f"Address: {sender.get('full_address', '-')}", f"Address: {receiver.get('full_address', '-')}"]
-            ]
-            
-            ship_table = Table(shipping_data, colWidths=[250, 250])
-            ship_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#16a085')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                ('TOPPADDING', (0, 0), (-1, -1), 6),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#bdc3c7')),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP')
-            ]))
-            story.append(ship_table)
-    
-    story.append(Spacer(1, 30))
-    story.append(Paragraph("Terms & Conditions", header_style))
-    terms = [
-        "1. This ticket is non-transferable and valid only for the booked service.",
-        "2. Please present this ticket for verification at the time of service.",
-        "3. Cancellations must be made at least 24 hours in advance for full refund.",
-        "4. Concierge Lifestyle is not responsible for delays due to traffic, weather, or other unforeseen circumstances.",
-        "5. For any issues, contact support@conciergelifestyle.com or call +91-9876543210."
-    ]
-    
-    for term in terms:
-        story.append(Paragraph(f"• {term}", normal_style))
-        story.append(Spacer(1, 3))
-    
-    story.append(Spacer(1, 20))
-    footer = Paragraph(
-        "Thank you for choosing Concierge Lifestyle<br/>"
-        "Your trusted partner for premium services<br/>"
-        "www.conciergelifestyle.com | support@conciergelifestyle.com",
-        ParagraphStyle('FooterStyle', parent=styles['Normal'], fontSize=9, 
-                      textColor=colors.HexColor('#7f8c8d'), alignment=TA_CENTER)
+
+def report_ticket_failed(job):
+    logger.error(f"Giving up on PDF ticket for {job.booking_id} after {job.attempts} attempts")
+    save_notification(
+        user_id=job.user_id,
+        title="Ticket Delayed",
+        message=f"We couldn't generate the ticket for {job.booking_id}. Our team will send it to you shortly.",
+        icon="error_outline",
+        type="warning"
     )
-    story.append(footer)
-    
-    doc.build(story)
-    
-    return filename
+
+ticket_worker = TicketWorker(ticket_store.root, on_ready=push_ticket_ready, on_failed=report_ticket_failed)
 
 def create_pdf_ticket_for_booking(booking_id, service_type, details, user_id):
     """Create PDF ticket and return the filename"""
@@ -2282,9 +2013,14 @@ def create_pdf_ticket_for_booking(booking_id, service_type, details, user_id):
     
     details['ticket_pdf_url'] = f"/static/tickets/{filename}"
     details['ticket_generated_at'] = datetime.now().isoformat()
+    details['ticket_status'] = 'ready'
     
     return filename
 
+def prune_old_tickets(booking_id, filename):
+    """Drop ticket versions older than ``filename``, once the booking row points at it"""
+    prune_versions(ticket_dir(ticket_store.root, booking_id), booking_id, filename)
+
 @app.route('/admin/generate-ticket', methods=['POST'])
 def admin_generate_ticket():
     if not session.get('is_admin'):
@@ -2322,6 +2058,8 @@ def admin_generate_ticket():
         cur.execute("UPDATE requests SET details = %s::jsonb WHERE id = %s",
                    (json.dumps(details_obj), request_id))
         conn.commit()
+        response_cache.invalidate('requests')
+        prune_old_tickets(booking_id, pdf_filename)
         
         return jsonify({
             "success": True,
@@ -2337,24 +2075,6 @@ def admin_generate_ticket():
         cur.close()
         conn.close()
 # ---------------------- Static Mock Data ----------------------
-# Central coordinates for mapping
-CITY_COORDINATES = {
-    "Mumbai": {"lat": 19.0760, "lng": 72.8777},
-    "Pune": {"lat": 18.5204, "lng": 73.8567},
-    "Nashik": {"lat": 19.9975, "lng": 73.7898},
-    "Delhi": {"lat": 28.6139, "lng": 77.2090},
-    "Bangalore": {"lat": 12.9716, "lng": 77.5946},
-    "Hyderabad": {"lat": 17.3850, "lng": 78.4867},
-    "Chennai": {"lat": 13.0827, "lng": 80.2707},
-    "Kolkata": {"lat": 22.5726, "lng": 88.3639},
-    "Jaipur": {"lat": 26.9124, "lng": 75.7873},
-    "Goa": {"lat": 15.2993, "lng": 74.1240},
-    "Ahmedabad": {"lat": 23.0225, "lng": 72.5714},
-    "Chandigarh": {"lat": 30.7333, "lng": 76.7794},
-    "Lucknow": {"lat": 26.8467, "lng": 80.9462},
-    "Indore": {"lat": 22.7196, "lng": 75.8577},
-    "Kerala": {"lat": 10.8505, "lng": 76.2711}
-}
 
 hotels_data = {
     "Mumbai": [
@@ -2402,7 +2122,7 @@ CITY_LOCALITIES = {
     "Indore": ["Vijay Nagar", "Palasia", "Bhawarkua", "Rajwada", "Saket Nagar"]
 }
 
-def generate_dynamic_hotels(city):
+def generate_dynamic_hotels(city, rng=random):
     """Generate realistic hotels for new cities using 'online' photos"""
     city_center = CITY_COORDINATES.get(city, {"lat": 20.5937, "lng": 78.9629}) # Default India center
     localities = CITY_LOCALITIES.get(city, ["City Center", "Market Road", "Station Road", "Civil Lines", "Main Street"])
@@ -2425,36 +2145,36 @@ def generate_dynamic_hotels(city):
     ]
     
     dynamic_hotels = []
-    num_hotels = random.randint(8, 12)
+    num_hotels = rng.randint(8, 12)
     
     for i in range(num_hotels):
-        name = f"{random.choice(prefixes)} {city} {random.choice(suffixes)}"
+        name = f"{rng.choice(prefixes)} {city} {rng.choice(suffixes)}"
         if "The" not in name and "Hotel" not in name: 
             name = f"The {name}"
             
-        rating = round(random.uniform(3.8, 5.0), 1)
-        price = random.randint(2500, 15000)
+        rating = round(rng.uniform(3.8, 5.0), 1)
+        price = rng.randint(2500, 15000)
         
         # Address Generation
-        locality = random.choice(localities)
-        street_no = random.randint(1, 99)
-        address = f"{street_no}, {locality}, {city} - {random.randint(110001, 800000)}"
+        locality = rng.choice(localities)
+        street_no = rng.randint(1, 99)
+        address = f"{street_no}, {locality}, {city} - {rng.randint(110001, 800000)}"
         
         # Random offset for map (approx 5-10km radius)
-        lat_offset = random.uniform(-0.05, 0.05)
-        lng_offset = random.uniform(-0.05, 0.05)
+        lat_offset = rng.uniform(-0.05, 0.05)
+        lng_offset = rng.uniform(-0.05, 0.05)
         
         dynamic_hotels.append({
             "name": name,
             "address": address,
-            "couple_friendly": random.choice([True, False]),
+            "couple_friendly": rng.choice([True, False]),
             "free_wifi": True,
-            "pool": random.choice([True, False]),
-            "gym": random.choice([True, False]),
-            "spa": random.choice([True, False]),
+            "pool": rng.choice([True, False]),
+            "gym": rng.choice([True, False]),
+            "spa": rng.choice([True, False]),
             "rating": rating,
             "price": price,
-            "image": random.choice(online_images),
+            "image": rng.choice(online_images),
             "lat": city_center["lat"] + lat_offset,
             "lng": city_center["lng"] + lng_offset
         })
@@ -2499,24 +2219,74 @@ technicians_data = [
     {"id": "T015", "name": "Arjun Kulkarni", "service_type": "electrical", "experience": 8, "rating": 4.7, "price": 920, "availability": "Available", "location": "Nashik"},
 ]
 
+# ---------------------- Mock Inventory ----------------------
+# Search results are seeded by (service, date, scope) and cached, so a search
+# shows the same set on refresh and confirmations can look items up by ref.
+inventory = InventoryProvider(max_entries=512)
+
+# Indexed view of the static lists above (by city, class and service type)
+static_catalog = Catalog(
+    [hotel_listing(h, city) for city, hotels in hotels_data.items() for h in hotels]
+    + [car_listing(c) for c in cars_data]
+    + [technician_listing(t) for t in technicians_data]
+)
+
+def _build_hotel_inventory(rng, city):
+    hotels = static_catalog.query('hotel', city=city, sort='catalog').dicts()
+    if not hotels:
+        # Dynamic generation for all other cities
+        hotels = generate_dynamic_hotels(city, rng)
+    rng.shuffle(hotels)
+    return hotels
+
+def _build_technician_inventory(rng, city, service_type):
+    return generate_dynamic_technicians(service_type, city, rng)
+
+def _index_hotel_inventory(items):
+    return Catalog(hotel_listing(h) for h in items)
+
+inventory.register('hotels', _build_hotel_inventory, _index_hotel_inventory)
+inventory.register('technicians', _build_technician_inventory)
+
+# Daily schedules per city pair; searches are filtered and paged server-side
+flight_search = FlightSearch(CITY_COORDINATES)
+FLIGHTS_PER_PAGE = 6
+
+# ---------------------- Presence ----------------------
+def emit_presence_changed(kind, ident, online):
+    payload = {
+        'kind': kind,
+        'user_id': ident if kind == USER else None,
+        'online': online,
+        'online_users': presence.count(USER),
+        'online_admins': presence.count(ADMIN),
+        'timestamp': datetime.now().isoformat()
+    }
+    if kind == USER:
+        socketio.emit('presence_changed', payload, room='admin_support')
+    else:
+        # Users see whether support is staffed
+        socketio.emit('presence_changed', payload)
+
+presence = PresenceRegistry(on_change=emit_presence_changed)
+# PRESENCE_SYNC=database shares presence between several worker processes
+presence_sync = DatabasePresenceSync(presence) if os.environ.get('PRESENCE_SYNC') == 'database' else None
+presence_sweeper = PresenceSweeper(presence, sync=presence_sync)
+
+# Deletes read notifications and old broadcasts past the retention window
+notification_retention = NotificationRetention(
+    days=int(os.environ.get('NOTIFICATION_RETENTION_DAYS', RETENTION_DAYS))
+)
+
+# Badge counts are kept per process and pushed on change; the reconciler
+# also catches writes made by other workers
+unread_counters = UnreadCounters(load_unread_counts, on_change=emit_unread_counts)
+unread_reconciler = CounterReconciler(unread_counters)
+
 # ---------------------- Live Updates ----------------------
 def get_active_users():
-    """Get list of active user IDs (users with activity in last 24 hours)"""
-    conn = get_db_connection()
-    cur = conn.cursor()
-    try:
-        cur.execute("""
-            SELECT DISTINCT user_id 
-            FROM requests 
-            WHERE created_at >= NOW() - INTERVAL '24 hours'
-        """)
-        return [row[0] for row in cur.fetchall()]
-    except Exception as e:
-        logger.error(f"Error getting active users: {e}")
-        return []
-    finally:
-        cur.close()
-        conn.close()
+    """IDs of users with a live socket connection"""
+    return presence.online(USER)
 
 def get_analytics_data(days=7):
     """Get comprehensive analytics data"""
@@ -2632,6 +2402,11 @@ def schedule_live_updates():
     logger.info("Live updates scheduler started")
 
 # ---------------------- App Startup ----------------------
+# Memory-map the per-city land masks once per process
+landmask.load_masks()
+city_matrix.load_matrix()
+flight_search.precompute()
+
 app_started = False
 
 @app.before_request
@@ -2639,6 +2414,26 @@ def initialize_app():
     global app_started
     if not app_started:
         schedule_live_updates()
+        ensure_ticket_jobs_schema()
+        ensure_support_indexes()
+        ensure_read_marks_schema()
+        ensure_broadcasts_schema()
+        ensure_retention_indexes()
+        notification_retention.start()
+        if presence_sync:
+            presence_sync.ensure_schema()
+        presence_sweeper.start()
+        unread_reconciler.start()
+        ensure_conversations_schema()
+        ensure_table_versions(VERSIONED_TABLES, drop=UNVERSIONED_TABLES, deletes=DELETE_VERSIONED_TABLES)
+        # Read optional columns once the ensure_* steps above have run
+        try:
+            schema.refresh()
+        except Exception as e:
+            logger.error(f"Could not read the database schema: {e}")
+        ticket_worker.start()
+        storage_sweeper.start()
+        variant_worker.start()
         app_started = True
 
 # ---------------------- Routes ----------------------
@@ -2661,6 +2456,7 @@ def register():
                 (full_name, email, username, password)
             )
             conn.commit()
+            response_cache.invalidate('users')
             flash("Account created successfully! Please login.")
             return redirect('/login')
         except Exception as e:
@@ -2678,6 +2474,8 @@ def login():
         password = request.form['password']
         if username == 'admin' and password == 'password':
             session['is_admin'] = True
+            # Scopes this login's chunked uploads (see admin_upload_owner)
+            session['admin_session'] = uuid.uuid4().hex
             flash('Admin login successful!')
             return redirect('/admin')
 
@@ -2693,6 +2491,7 @@ def login():
                 user = User()
                 user.id = str(user_data[0])
                 login_user(user)
+                issue_identity_claim(Identity(*user_data))
                 session['user_id'] = user_data[0]
                 session['username'] = username
                 return redirect('/dashboard')
@@ -2743,9 +2542,20 @@ def admin():
                          active_users_count=len(active_users))
 
 # ---------------------- Socket.IO ----------------------
+# Every logged-in user's sockets; announcements go out as one emit here
+ALL_USERS_ROOM = 'all_users'
+
+def register_presence():
+    """Record the current socket as an admin or a logged-in user"""
+    if session.get('is_admin'):
+        presence.connect(request.sid, ADMIN, 'support')
+    elif current_user.is_authenticated:
+        presence.connect(request.sid, USER, int(current_user.get_id()))
+
 @socketio.on('connect')
 def handle_connect(auth):
     try:
+        register_presence()
         if session.get('is_admin'):
             socketio.server.emit('update_requests', {'requests': get_requests_json()}, namespace='/')
             analytics_data = get_analytics_data()
@@ -2763,12 +2573,23 @@ def handle_connect(auth):
     except Exception as e:
         logger.error(f"connect error: {e}")
 
+@socketio.on('disconnect')
+def handle_disconnect(*args):
+    presence.disconnect(request.sid)
+
+@socketio.on('presence_heartbeat')
+def handle_presence_heartbeat(data=None):
+    if not presence.heartbeat(request.sid):
+        # Registered before a restart or expired; identify again
+        register_presence()
+
 @socketio.on('user_connect')
 def handle_user_connect(data):
     """Handle user connection for real-time updates"""
     user_id = current_user.get_id()
     if user_id:
         join_room(f"user_{user_id}")
+        join_room(ALL_USERS_ROOM)
         emit('user_connected', {'user_id': user_id, 'status': 'connected'})
 
 @socketio.on('approve_request')
@@ -2795,6 +2616,7 @@ def handle_approve_request(data):
             
         booking_id, service_type, user_id = result
         conn.commit()
+        response_cache.invalidate('requests')
 
         save_notification(
             user_id=user_id,
@@ -2830,6 +2652,7 @@ def handle_join(data):
     user_id = data.get('user_id')
     if user_id:
         join_room(f"user_{user_id}")
+        join_room(ALL_USERS_ROOM)
 
 @socketio.on('send_ticket')
 def handle_send_ticket(data):
@@ -2861,6 +2684,8 @@ def handle_send_ticket(data):
                     (json.dumps(details_obj), request_id))
 
         conn.commit()
+        response_cache.invalidate('requests')
+        prune_old_tickets(booking_id, pdf_filename)
 
         emit('ticket_received', {
             'booking_id': booking_id,
@@ -2893,6 +2718,7 @@ def handle_confirm_payment(data):
     try:
         cur.execute("UPDATE requests SET payment_status = 'Confirmed' WHERE id = %s", (request_id,))
         conn.commit()
+        response_cache.invalidate('requests')
         socketio.server.emit('update_requests', {'requests': get_requests_json()}, namespace='/')
     except Exception as e:
         emit('error', {'message': str(e)})
@@ -2924,14 +2750,15 @@ def handle_delete_request(data):
         user_id, booking_id, service_type = request_data
         
         try:
-            ticket_file = TICKETS_DIR / f"ticket_{booking_id}.pdf"
-            if ticket_file.exists():
-                ticket_file.unlink()
+            remove_tickets(ticket_dir(ticket_store.root, booking_id), booking_id)
+            if ticket_store.legacy_dir:
+                remove_tickets(ticket_store.legacy_dir, booking_id)
         except Exception as e:
             logger.warning(f"Could not delete ticket file: {e}")
 
         cur.execute("DELETE FROM requests WHERE id = %s", (request_id,))
         conn.commit()
+        response_cache.invalidate('requests')
 
         save_notification(
             user_id=user_id,
@@ -2963,26 +2790,12 @@ def handle_get_live_data():
     if not session.get('is_admin'):
         return
     
-    conn = get_db_connection()
-    cur = conn.cursor()
-    try:
-        cur.execute("""
-            SELECT DISTINCT user_id 
-            FROM requests 
-            WHERE created_at >= NOW() - INTERVAL '24 hours'
-        """)
-        active_users = [row[0] for row in cur.fetchall()]
-        
-        emit('live_data_update', {
-            'active_users': active_users,
-            'active_count': len(active_users),
-            'timestamp': datetime.now().isoformat()
-        })
-    except Exception as e:
-        logger.error(f"Error getting live data: {e}")
-    finally:
-        cur.close()
-        conn.close()
+    active_users = get_active_users()
+    emit('live_data_update', {
+        'active_users': active_users,
+        'active_count': len(active_users),
+        'timestamp': datetime.now().isoformat()
+    })
 
 @socketio.on('send_broadcast')
 def handle_send_broadcast(data):
@@ -2999,43 +2812,57 @@ def handle_send_broadcast(data):
             emit('broadcast_error', {'message': 'Title and message are required'})
             return
             
+        payload = {
+            'title': title,
+            'message': message,
+            'icon': icon,
+            'type': notification_type,
+            'timestamp': datetime.now().isoformat()
+        }
+        
         if target == 'specific':
-            if not user_id:
+            # One ID or a comma-separated list
+            try:
+                user_ids = [int(uid) for uid in str(user_id or '').replace(' ', '').split(',') if uid]
+            except ValueError:
+                user_ids = []
+            if not user_ids:
                 emit('broadcast_error', {'message': 'User ID is required for specific user'})
                 return
             
-            save_notification(user_id, title, message, icon, notification_type)
+            conn = get_db_connection()
+            cur = conn.cursor()
+            try:
+                insert_notifications(cur, user_ids, title, message, icon, notification_type)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+                conn.close()
+            unread_counters.incr_many(dict.fromkeys(user_ids), NOTIFICATIONS)
             
-            emit('broadcast_notification', {
-                'title': title,
-                'message': message,
-                'icon': icon,
-                'type': notification_type,
-                'timestamp': datetime.now().isoformat()
-            }, room=f"user_{user_id}")
+            for uid in user_ids:
+                emit('broadcast_notification', payload, room=f"user_{uid}")
             
         else:
+            # Stored once and merged into every feed when it is read
             conn = get_db_connection()
             cur = conn.cursor()
             try:
-                cur.execute("SELECT id FROM users")
-                all_users = cur.fetchall()
-                
-                for user in all_users:
-                    user_id = user[0]
-                    save_notification(user_id, title, message, icon, notification_type)
-                    
-                    emit('broadcast_notification', {
-                        'title': title,
-                        'message': message,
-                        'icon': icon,
-                        'type': notification_type,
-                        'timestamp': datetime.now().isoformat()
-                    }, room=f"user_{user_id}")
-                    
+                broadcast_id, _ = create_broadcast(cur, title, message, icon, notification_type)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
             finally:
                 cur.close()
                 conn.close()
+            # Clients count the broadcast themselves, so no per-user push
+            unread_counters.incr_all(NOTIFICATIONS)
+            
+            emit('broadcast_notification', {**payload, 'id': f"b{broadcast_id}"}, room=ALL_USERS_ROOM)
         
         emit('broadcast_success', {'message': 'Notification sent successfully'})
         
@@ -3078,12 +2905,9 @@ def handle_mark_all_read(data):
         conn = get_db_connection()
         cur = conn.cursor()
         try:
-            cur.execute("""
-                UPDATE notifications 
-                SET is_read = TRUE 
-                WHERE user_id = %s AND is_read = FALSE
-            """, (user_id,))
+            mark_feed_read(cur, user_id)
             conn.commit()
+            unread_counters.reset(int(user_id), NOTIFICATIONS)
             
             emit('all_notifications_read', {
                 'user_id': user_id,
@@ -3195,6 +3019,7 @@ def handle_send_report_to_user(data):
 
 # ---------------------- Admin API Routes ----------------------
 @app.route('/admin/users')
+@cached_json(('users', 'requests'), ttl=30, scope='admin')
 def admin_users():
     if not session.get('is_admin'):
         return jsonify({"error": "Unauthorized"}), 403
@@ -3367,6 +3192,7 @@ def admin_send_ticket():
         conn.close()
 
 @app.route('/admin/analytics')
+@cached_json(('users', 'requests'), ttl=30, scope='admin')
 def admin_analytics():
     if not session.get('is_admin'):
         return jsonify({"error": "Unauthorized"}), 403
@@ -3377,6 +3203,7 @@ def admin_analytics():
 
 
 @app.route('/admin/stats')
+@cached_json(('users', 'requests'), ttl=30, scope='admin')
 def admin_stats():
     if not session.get('is_admin'):
         return jsonify({"error": "Unauthorized"}), 403
@@ -3393,6 +3220,12 @@ def admin_stats():
     })
 
 
+@app.route('/admin/cache-metrics')
+def admin_cache_metrics():
+    if not session.get('is_admin'):
+        return jsonify({"error": "Unauthorized"}), 403
+    return jsonify({**response_cache.metrics(), 'identity': identity_cache.metrics()})
+
 @app.route('/admin/requests')
 def admin_requests():
     if not session.get('is_admin'):
@@ -3615,8 +3448,6 @@ def user_request_details(request_id):
 @login_required
 def confirm_booking():
     data = request.get_json(silent=True) or {}
-    hotel_name = data.get('hotel') or 'N/A'
-    amount = data.get('amount') or 0
     rooms = data.get('rooms') or 1
     guests = data.get('guests') or 1
     checkin = data.get('checkin')
@@ -3625,9 +3456,19 @@ def confirm_booking():
     mobile = data.get('mobile')
     guest_details = data.get('guest_details', [])
 
+    # Name and price come from the hotel the results page rendered, never the client
+    hotel = inventory.lookup(data.get('inventory_ref'), 'hotels')
+    if not hotel:
+        return jsonify({"error": "Unknown hotel; please search again"}), 400
+    try:
+        nights = nights_between(checkin, checkout)
+        amount = hotel_total(hotel['price'], nights, rooms, discount=HOTEL_DISCOUNT).total
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid room count"}), 400
+
     booking_id = f"HOTEL-{random.randint(1000, 9999)}"
     details_obj = {
-        "hotel_name": hotel_name,
+        "hotel_name": hotel['name'],
         "total_amount": amount,
         "rooms": rooms,
         "guests": guests,
@@ -3637,17 +3478,18 @@ def confirm_booking():
         "mobile": mobile,
         "guest_details": guest_details,
         "simulated_payment": True,
-        "simulated_payment_at": datetime.now().isoformat()
+        "simulated_payment_at": datetime.now().isoformat(),
+        "nights": nights,
+        "price_per_night": hotel['price'],
+        "inventory_ref": hotel['inventory_ref']
     }
 
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        # Create ticket immediately
+        # The ticket is rendered by the ticket worker once the booking commits
         user_id = current_user.get_id()
-        pdf_filename = generate_pdf_ticket(booking_id, 'Hotel Booking', details_obj, user_id)
-        details_obj['ticket_pdf_url'] = f"/static/tickets/{pdf_filename}"
-        details_obj['ticket_generated_at'] = datetime.now().isoformat()
+        details_obj['ticket_status'] = 'pending'
 
         cur.execute("""
             INSERT INTO requests (user_id, booking_id, service_type, details, payment_status, admin_confirmation)
@@ -3662,13 +3504,16 @@ def confirm_booking():
             'Pending'
         ))
         new_id = cur.fetchone()[0]
+        enqueue_ticket(cur, new_id)
         conn.commit()
+        response_cache.invalidate('requests')
+        ticket_worker.notify()
 
         last_row = get_last_request_json()
         if last_row:
             socketio.emit('new_request', {'request': last_row})
 
-        return jsonify({"success": True, "booking_id": booking_id, "request_id": new_id})
+        return jsonify({"success": True, "booking_id": booking_id, "request_id": new_id, "ticket_status": "pending"})
     except Exception as e:
         conn.rollback()
         return jsonify({"error": str(e)}), 500
@@ -3716,11 +3561,9 @@ def confirm_car_booking():
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        # Create ticket immediately
+        # The ticket is rendered by the ticket worker once the booking commits
         user_id = current_user.get_id()
-        pdf_filename = generate_pdf_ticket(booking_id, 'Car Booking', details_obj, user_id)
-        details_obj['ticket_pdf_url'] = f"/static/tickets/{pdf_filename}"
-        details_obj['ticket_generated_at'] = datetime.now().isoformat()
+        details_obj['ticket_status'] = 'pending'
 
         cur.execute("""
             INSERT INTO requests (user_id, booking_id, service_type, details, payment_status, admin_confirmation)
@@ -3735,13 +3578,16 @@ def confirm_car_booking():
             'Pending'
         ))
         new_id = cur.fetchone()[0]
+        enqueue_ticket(cur, new_id)
         conn.commit()
+        response_cache.invalidate('requests')
+        ticket_worker.notify()
 
         last_row = get_last_request_json()
         if last_row:
             socketio.emit('new_request', {'request': last_row})
 
-        return jsonify({"success": True, "booking_id": booking_id, "request_id": new_id})
+        return jsonify({"success": True, "booking_id": booking_id, "request_id": new_id, "ticket_status": "pending"})
     except Exception as e:
         conn.rollback()
         logger.error(f"Car booking confirmation error: {e}")
@@ -3834,27 +3680,20 @@ def submit_car_booking():
         }
         target_class = class_map.get(car_class, 'Standard')
 
-        # Get coordinates
-        pickup_coords = CITY_COORDINATES.get(pickup, CITY_COORDINATES.get('Mumbai'))
-        if not pickup_coords: pickup_coords = {"lat": 19.0760, "lng": 72.8777}
+        # Get coordinates (unknown pickups fall back to Mumbai)
+        pickup_city = resolve_city(pickup, partial=True) or 'Mumbai'
+        pickup_coords = CITY_COORDINATES[pickup_city]
         
         # Determine Dropoff Coordinates
-        # 1. Check if dropoff is a known city
-        dropoff_clean = dropoff.split(',')[0].strip().title() # Handle "Delhi, India" etc
-        dropoff_coords = CITY_COORDINATES.get(dropoff_clean)
+        # 1. Check if dropoff is a known city ("Delhi, India", "New Delhi" etc)
+        dropoff_city = resolve_city(dropoff)
+        trip = city_matrix.get_matrix().trip(pickup_city, dropoff_city) if dropoff_city and dropoff_city != pickup_city else None
         
         # 2. If known city (Inter-city trip)
-        if dropoff_coords:
-            # Calculate Haversine distance for long trips
-            lat1, lon1 = pickup_coords["lat"], pickup_coords["lng"]
-            lat2, lon2 = dropoff_coords["lat"], dropoff_coords["lng"]
-            R = 6371 # Earth radius in km
-            dlat = math.radians(lat2 - lat1)
-            dlon = math.radians(lon2 - lon1)
-            a = math.sin(dlat/2) * math.sin(dlat/2) + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon/2) * math.sin(dlon/2)
-            c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-            distance_km = R * c
-            distance_km = round(distance_km, 1)
+        if trip:
+            dropoff_coords = CITY_COORDINATES[dropoff_city]
+            distance_km = trip.distance_km
+            trip_minutes = trip.drive_minutes
             
         else:
             # 3. Local trip (Random offset)
@@ -3867,6 +3706,7 @@ def submit_car_booking():
             dist_lng = (pickup_coords["lng"] - dropoff_coords["lng"]) * 111
             distance_km = math.sqrt(dist_lat**2 + dist_lng**2)
             distance_km = round(max(5, distance_km), 1)
+            trip_minutes = city_matrix.drive_minutes(distance_km)
 
         # Get user profile for budget filtering
         user_id = current_user.get_id()
@@ -3884,8 +3724,10 @@ def submit_car_booking():
             "Luxury": 50
         }
         
-        filtered_cars = [c for c in cars_data if c.get('cab_class') == target_class or target_class == 'Standard']
-        if not filtered_cars: filtered_cars = cars_data[:5]
+        # Standard searches see every class
+        filtered_cars = static_catalog.query('car', listing_class=None if target_class == 'Standard' else target_class,
+                                             sort='catalog').dicts()
+        if not filtered_cars: filtered_cars = static_catalog.query('car', sort='catalog', limit=5).dicts()
         
         for idx, car in enumerate(filtered_cars):
             cab_class = car.get('cab_class', 'Standard')
@@ -3912,6 +3754,7 @@ def submit_car_booking():
                 'driver_rating': round(random.uniform(4.5, 5.0), 1),
                 'eta': f"{eta} mins",
                 'distance': f"{distance_km} km",
+                'trip_time': f"{trip_minutes // 60}h {trip_minutes % 60:02d}m",
                 'price': est_price,
                 'pickup': pickup,
                 'dropoff': dropoff,
@@ -3945,7 +3788,7 @@ def submit_car_booking():
         return redirect(url_for('dashboard'))
 
 # ---------------------- Technician Booking ----------------------
-def generate_dynamic_technicians(service_type, city):
+def generate_dynamic_technicians(service_type, city, rng=random):
     """Generate realistic technicians for any city"""
     city_center = CITY_COORDINATES.get(city, {"lat": 19.0760, "lng": 72.8777})
     
@@ -3964,17 +3807,17 @@ def generate_dynamic_technicians(service_type, city):
     titles = service_titles.get(service_type, ['Service Expert', 'Technician', 'Specialist'])
     
     technicians = []
-    num_techs = random.randint(8, 12)
+    num_techs = rng.randint(8, 12)
     
     for i in range(num_techs):
-        name = f"{random.choice(first_names)} {random.choice(last_names)}"
-        experience = random.randint(2, 15)
-        rating = round(random.uniform(4.2, 5.0), 1)
-        jobs_done = random.randint(50, 500)
+        name = f"{rng.choice(first_names)} {rng.choice(last_names)}"
+        experience = rng.randint(2, 15)
+        rating = round(rng.uniform(4.2, 5.0), 1)
+        jobs_done = rng.randint(50, 500)
         
         # Location offset (within 5-10km)
-        lat_offset = random.uniform(-0.05, 0.05)
-        lng_offset = random.uniform(-0.05, 0.05)
+        lat_offset = rng.uniform(-0.05, 0.05)
+        lng_offset = rng.uniform(-0.05, 0.05)
         tech_lat = city_center["lat"] + lat_offset
         tech_lng = city_center["lng"] + lng_offset
         
@@ -3992,26 +3835,26 @@ def generate_dynamic_technicians(service_type, city):
         price = int(round(price, -1)) # Round to nearest 10
         
         # Generate Phone Number
-        phone = f"+91 {random.randint(70000, 99999)} {random.randint(10000, 99999)}"
+        phone = f"+91 {rng.randint(70000, 99999)} {rng.randint(10000, 99999)}"
         
         technicians.append({
-            "id": f"T{random.randint(1000, 9999)}",
+            "id": f"T{rng.randint(1000, 9999)}",
             "name": name,
-            "title": random.choice(titles),
+            "title": rng.choice(titles),
             "service_type": service_type.replace('_', ' ').title(),
             "experience": experience,
             "rating": rating,
             "jobs_completed": jobs_done,
             "price": price,
             "phone": phone, # Added Phone
-            "availability": "Available Now" if random.random() > 0.3 else f"Available at {random.randint(9, 18)}:00",
+            "availability": "Available Now" if rng.random() > 0.3 else f"Available at {rng.randint(9, 18)}:00",
             "location": city,
             "lat": tech_lat,
             "lng": tech_lng,
             "eta": f"{eta_mins} mins",
             "distance": f"{dist_km:.1f} km",
-            "verified": random.choice([True, True, False]),
-            "vaccinated": random.choice([True, True, False])
+            "verified": rng.choice([True, True, False]),
+            "vaccinated": rng.choice([True, True, False])
         })
         
     technicians.sort(key=lambda x: x['rating'], reverse=True)
@@ -4053,25 +3896,16 @@ def submit_technician_booking():
 
         # Get coordinates for map center
         normalized_location = location.split(',')[0].strip()
-        city_coords = CITY_COORDINATES.get(normalized_location, CITY_COORDINATES.get('Mumbai'))
-        if location not in CITY_COORDINATES:
-             # Try to find a partial match or default to Mumbai but keep the label
-             for key in CITY_COORDINATES:
-                 if key in location:
-                     city_coords = CITY_COORDINATES[key]
-                     break
+        # Partial matches resolve too; otherwise default to Mumbai but keep the label
+        city_coords = CITY_COORDINATES[resolve_city(location, partial=True) or 'Mumbai']
 
-        # Generate Dynamic Technicians
-        technicians = generate_dynamic_technicians(service_type, normalized_location)
+        # Generate Dynamic Technicians (stable per city, service and date)
+        technicians = inventory.search('technicians', service_date, normalized_location, service_type)
         
         # Filter if needed (though generator handles logic)
         # Apply urgency pricing surge if needed
-        if urgency == 'urgent':
-            for tech in technicians:
-                tech['price'] = int(tech['price'] * 1.5)
-        elif urgency == 'emergency':
-            for tech in technicians:
-                tech['price'] = int(tech['price'] * 2.0)
+        for tech in technicians:
+            tech['price'] = surge_price(tech['price'], urgency)
 
         # Select display count
         selected_technicians = technicians # Show all generated
@@ -4101,6 +3935,15 @@ def submit_technician_booking():
 def confirm_technician():
     data = request.get_json(silent=True) or {}
 
+    # Technician and fee come from what the results page rendered, never the client
+    technician = inventory.lookup(data.get("inventory_ref"), 'technicians')
+    if not technician:
+        return jsonify({"error": "Unknown technician; please search again"}), 400
+    urgency = str(data.get("urgency") or "normal").lower()
+    total_price = technician_total(surge_price(technician["price"], urgency)).total
+    data.update(technician_id=technician["id"], name=technician["name"],
+                technician_phone=technician["phone"])
+
     booking_id = f"TECH-{random.randint(1000, 9999)}"
     payload = json.dumps({
         "technician_id": data.get("technician_id"),
@@ -4111,30 +3954,26 @@ def confirm_technician():
         "service_date": data.get("service_date"),
         "service_time": data.get("service_time"),
         "description": data.get("description"),
-        "total_price": data.get("total_price"),
+        "total_price": total_price,
+        "urgency": urgency,
         "email": data.get("email"),
         "mobile": data.get("mobile"),
         "customer_name": data.get("customer_name"),
         "customer_address": data.get("customer_address"),
-        "alternate_phone": data.get("alternate_phone")
+        "alternate_phone": data.get("alternate_phone"),
+        "inventory_ref": technician["inventory_ref"]
     })
 
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        # Create ticket immediately
+        # The ticket is rendered by the ticket worker once the booking commits
         user_id = current_user.get_id()
-        pdf_filename = generate_pdf_ticket(booking_id, 'Technician Booking', json.loads(payload), user_id)
-        
-        # Update payload with ticket url
         details_obj = json.loads(payload)
-        details_obj['ticket_pdf_url'] = f"/static/tickets/{pdf_filename}"
-        details_obj['ticket_generated_at'] = datetime.now().isoformat()
+        details_obj['ticket_status'] = 'pending'
         payload = json.dumps(details_obj)
 
         # Auto-Approve Logic (Phase 3)
-        total_price = float(data.get("total_price", 0))
-        urgency = data.get("urgency", "normal").lower()
         admin_status = 'Pending'
         
         if urgency != 'emergency' and total_price < 2000:
@@ -4151,6 +3990,7 @@ def confirm_technician():
         cur.execute("""
             INSERT INTO requests (user_id, booking_id, service_type, details, payment_status, admin_confirmation, created_at)
             VALUES (%s, %s, %s, %s::jsonb, %s, %s, %s)
+            RETURNING id
         """, (
             user_id,
             booking_id,
@@ -4160,7 +4000,10 @@ def confirm_technician():
             admin_status,
             datetime.now()
         ))
+        enqueue_ticket(cur, cur.fetchone()[0])
         conn.commit()
+        response_cache.invalidate('requests')
+        ticket_worker.notify()
 
         last_row = get_last_request_json()
         if last_row:
@@ -4174,12 +4017,12 @@ def confirm_technician():
                     "request_id": last_row[0],
                     "booking_id": booking_id,
                     "service_type": "Technician Booking",
-                    "ticket_url": f"/static/tickets/{pdf_filename}"
+                    "ticket_status": "pending"
                 })
             except Exception as e:
                 app.logger.exception("socketio.emit payment_confirmed failed: %s", e)
 
-        return jsonify({"success": True, "booking_id": booking_id, "ticket_url": f"/static/tickets/{pdf_filename}"})
+        return jsonify({"success": True, "booking_id": booking_id, "ticket_status": "pending"})
     except Exception as e:
         conn.rollback()
         return jsonify({"error": str(e)}), 500
@@ -4247,37 +4090,22 @@ def submit_courier_booking():
             return redirect(url_for('dashboard'))
 
         # ── Distance Calculation ───────────────────────────────────
-        pickup_coords = CITY_COORDINATES.get(pickup.split(',')[0].strip().title())
-        if not pickup_coords:
-            # Try partial match or default
-            for key, val in CITY_COORDINATES.items():
-                if key in pickup:
-                    pickup_coords = val
-                    break
-            if not pickup_coords: pickup_coords = CITY_COORDINATES.get('Mumbai')
-
-        dropoff_coords = CITY_COORDINATES.get(dropoff.split(',')[0].strip().title())
-        if not dropoff_coords:
-            for key, val in CITY_COORDINATES.items():
-                if key in dropoff:
-                    dropoff_coords = val
-                    break
-            if not dropoff_coords: 
-                # Random offset for local delivery if unknown
-                dropoff_coords = {
-                    "lat": pickup_coords["lat"] + random.uniform(-0.1, 0.1),
-                    "lng": pickup_coords["lng"] + random.uniform(-0.1, 0.1)
-                }
-
-        # Calculate Distance (Haversine)
-        R = 6371
-        lat1, lon1 = math.radians(pickup_coords["lat"]), math.radians(pickup_coords["lng"])
-        lat2, lon2 = math.radians(dropoff_coords["lat"]), math.radians(dropoff_coords["lng"])
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-        distance_km = round(R * c, 1)
+        # Partial matches resolve too; unknown pickups default to Mumbai
+        pickup_city = resolve_city(pickup, partial=True) or 'Mumbai'
+        pickup_coords = CITY_COORDINATES[pickup_city]
+
+        dropoff_city = resolve_city(dropoff, partial=True)
+        if dropoff_city:
+            dropoff_coords = CITY_COORDINATES[dropoff_city]
+            distance_km = city_matrix.get_matrix().distance_km(pickup_city, dropoff_city)
+        else:
+            # Random offset for local delivery if unknown
+            dropoff_coords = {
+                "lat": pickup_coords["lat"] + random.uniform(-0.1, 0.1),
+                "lng": pickup_coords["lng"] + random.uniform(-0.1, 0.1)
+            }
+            distance_km = round(haversine_km(pickup_coords["lat"], pickup_coords["lng"],
+                                             dropoff_coords["lat"], dropoff_coords["lng"]), 1)
         if distance_km < 2: distance_km = 5.0 # Min distance
 
         # ── Pricing logic ──────────────────────────────────────────
@@ -4434,11 +4262,9 @@ def confirm_courier():
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        # Create ticket immediately
+        # The ticket is rendered by the ticket worker once the booking commits
         user_id = current_user.get_id()
-        pdf_filename = generate_pdf_ticket(booking_id, 'Courier Booking', payload, user_id)
-        payload['ticket_pdf_url'] = f"/static/tickets/{pdf_filename}"
-        payload['ticket_generated_at'] = datetime.now().isoformat()
+        payload['ticket_status'] = 'pending'
 
         # Auto-Approve Logic (Phase 3)
         admin_status = 'Pending'
@@ -4456,6 +4282,7 @@ def confirm_courier():
             INSERT INTO requests
             (user_id, booking_id, service_type, details, payment_status, admin_confirmation)
             VALUES (%s, %s, %s, %s::jsonb, %s, %s)
+            RETURNING id
         """, (
             user_id,
             booking_id,
@@ -4464,7 +4291,10 @@ def confirm_courier():
             'Confirmed',
             admin_status
         ))
+        enqueue_ticket(cur, cur.fetchone()[0])
         conn.commit()
+        response_cache.invalidate('requests')
+        ticket_worker.notify()
 
         row = get_last_request_json()
         if row:
@@ -4473,14 +4303,14 @@ def confirm_courier():
                 "request_id": row[0],
                 "booking_id": booking_id,
                 "service_type": 'Courier Booking',
-                "ticket_url": f"/static/tickets/{pdf_filename}"
+                "ticket_status": "pending"
             }, to=None)
 
         return jsonify({
             "success": True,
             "booking_id": booking_id,
             "message": "Booking confirmed!",
-            "ticket_url": f"/static/tickets/{pdf_filename}"
+            "ticket_status": "pending"
         })
 
     except Exception as e:
@@ -4503,35 +4333,24 @@ def get_admin_chat_users():
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        # Get list of users who have support messages
-        # DISTINCT ON user_id to get unique users, ordered by latest message
-        query = """
-            SELECT DISTINCT ON (u.id) 
-                u.id, u.full_name, u.profile_picture,
-                m.message, m.created_at, m.is_read, m.sender_type
-            FROM users u
-            JOIN support_messages m ON u.id = m.user_id
-            ORDER BY u.id, m.created_at DESC
-        """
-        cur.execute(query)
-        rows = cur.fetchall()
+        # Users who have support messages, most recent conversation first
+        conversations, next_cursor = list_conversations(
+            cur, cursor=request.args.get('cursor'), limit=int(request.args.get('limit', 50))
+        )
         
         users = []
-        for r in rows:
+        for c in conversations:
             users.append({
-                'id': r[0],
-                'name': r[1],
-                'profile_picture': r[2] or '',
-                'last_message': r[3],
-                'timestamp': r[4].isoformat() if r[4] else '',
-                'is_read': r[5],
-                'last_sender': r[6] # 'user' or 'admin'
+                'id': c['id'],
+                'name': c['name'],
+                'profile_picture': c['profile_picture'],
+                'last_message': c['last_message'],
+                'timestamp': c['last_message_at'].isoformat() if c['last_message_at'] else '',
+                'is_read': c['unread_count'] == 0,
+                'last_sender': c['last_sender'] # 'user' or 'admin'
             })
-            
-        # Sort users by most recent message descending
-        users.sort(key=lambda x: x['timestamp'], reverse=True)
         
-        return jsonify({'success': True, 'users': users})
+        return jsonify({'success': True, 'users': users, 'next_cursor': next_cursor})
     except Exception as e:
         logger.error(f"Admin chat users error: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -4544,38 +4363,31 @@ def get_admin_chat_users():
 def get_admin_chat_history(user_id):
     if not session.get('is_admin'):
         return jsonify({"error": "Unauthorized"}), 403
+    try:
+        page = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        # Mark messages from this user as read
-        cur.execute("UPDATE support_messages SET is_read = TRUE WHERE user_id = %s AND sender_type = 'user'", (user_id,))
-        conn.commit()
+        if page['before_id'] is None:
+            # Mark messages from this user as read
+            mark_read(cur, user_id, 'admin')
+            conn.commit()
         
-        # Fetch history from support_messages
-        query = """
-            SELECT id, user_id, sender_type, message, created_at, is_read, attachment_url
-            FROM support_messages 
-            WHERE user_id = %s
-            ORDER BY created_at ASC
-        """
-        cur.execute(query, (user_id,))
-        rows = cur.fetchall()
+        # Fetch one page of history from support_messages
+        rows, has_more = fetch_page(cur, user_id, **page)
         
         messages = []
         for r in rows:
-            messages.append({
-                'id': r[0],
-                'user_id': r[1],
-                'sender_type': r[2], # 'user' or 'admin'
-                'message': r[3],
-                'timestamp': r[4].isoformat() if r[4] else '',
-                'is_read': r[5],
-                'attachment_url': r[6],
-                'is_admin': r[2] == 'admin'
-            })
+            msg = message_dict(r)
+            msg['user_id'] = user_id
+            msg['attachment_url'] = msg['file_path']
+            msg['is_admin'] = msg['sender_type'] == 'admin'
+            messages.append(msg)
             
-        return jsonify({'success': True, 'messages': messages})
+        return jsonify({'success': True, **page_payload(messages, has_more, after_id=page['after_id'])})
     except Exception as e:
         logger.error(f"Admin chat history error: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -4588,36 +4400,25 @@ def get_admin_chat_history(user_id):
 def get_chat_history():
     """User fetching their own support chat history"""
     user_id = current_user.get_id()
+    try:
+        page = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        query = """
-            SELECT id, sender_type, message, created_at, is_read, attachment_url
-            FROM support_messages 
-            WHERE user_id = %s
-            ORDER BY created_at ASC
-        """
-        cur.execute(query, (user_id,))
-        rows = cur.fetchall()
+        rows, has_more = fetch_page(cur, user_id, **page)
         
         messages = []
         for r in rows:
-            sender_type = r[1]
+            msg = message_dict(r)
+            msg['attachment_url'] = msg['file_path']
             # For the user: 'user' means "Me", 'admin' means "Support"
-            is_me = (sender_type == 'user')
-            
-            messages.append({
-                'id': r[0],
-                'sender_type': sender_type,
-                'message': r[2],
-                'timestamp': r[3].isoformat() if r[3] else '',
-                'is_read': r[4],
-                'attachment_url': r[5],
-                'is_me': is_me
-            })
+            msg['is_me'] = msg['sender_type'] == 'user'
+            messages.append(msg)
             
-        return jsonify({'success': True, 'messages': messages})
+        return jsonify({'success': True, **page_payload(messages, has_more, after_id=page['after_id'])})
     except Exception as e:
         logger.error(f"User chat history error: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -4667,7 +4468,10 @@ def handle_chat_message(data):
         """, (db_user_id, sender_type, message))
         
         msg_id, timestamp = cur.fetchone()
+        record_message(cur, db_user_id, msg_id, sender_type, message, timestamp)
         conn.commit()
+        if sender_type == 'admin':
+            unread_counters.incr(int(db_user_id), SUPPORT)
         
         msg_data = {
             'id': msg_id,
@@ -4724,6 +4528,7 @@ def admin_send_report():
             RETURNING id, created_at
         """, (user_id, message, file_url))
         msg_id, timestamp = cur.fetchone()
+        record_message(cur, user_id, msg_id, 'admin', message, timestamp)
         
         # Insert Report Metadata
         cur.execute("""
@@ -4734,6 +4539,8 @@ def admin_send_report():
         conn.commit()
         cur.close()
         conn.close()
+        response_cache.invalidate('reports')
+        unread_counters.incr(int(user_id), SUPPORT)
         
         # Emit via Socket
         msg_data = {
@@ -4783,20 +4590,11 @@ def dashboard():
     cur = conn.cursor()
     
     try:
-        cur.execute("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name = 'users' 
-            AND table_schema = 'public'
-        """)
-        existing_columns = [row[0] for row in cur.fetchall()]
-        
         select_fields = ["full_name", "email", "username"]
         
+        # Optional contact columns, from the cached schema registry
         optional_fields = ['address', 'phone', 'whatsapp', 'instagram', 'facebook', 'profile_picture']
-        for field in optional_fields:
-            if field in existing_columns:
-                select_fields.append(field)
+        select_fields += schema.present('users', optional_fields)
         
         query = f"SELECT {', '.join(select_fields)} FROM users WHERE id = %s"
         
@@ -4849,7 +4647,11 @@ def dashboard():
             
             username = contact.get('name') or contact.get('email', '').split('@')[0] or 'User'
             
-            notifications = get_user_notifications(user_id)
+            try:
+                notifications, notifications_cursor = get_user_notifications(user_id)
+            except Exception as e:
+                logger.error(f"Error fetching notifications: {e}")
+                notifications, notifications_cursor = [], None
             unread_count = get_unread_count(user_id)
 
             return render_template('dashboard.html',
@@ -4857,6 +4659,7 @@ def dashboard():
                        contact=contact,
                        requests=requests,
                        notifications=notifications,
+                       notifications_cursor=notifications_cursor,
                        unread_count=unread_count,
                        current_user_id=user_id)
         else:
@@ -4892,13 +4695,7 @@ def save_contact():
     cur = conn.cursor()
     
     try:
-        cur.execute("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name = 'users' 
-            AND table_schema = 'public'
-        """)
-        existing_columns = [row[0] for row in cur.fetchall()]
+        existing_columns = schema.columns('users')
         
         update_fields = []
         values = []
@@ -4928,6 +4725,7 @@ def save_contact():
         
         cur.execute(query, values)
         conn.commit()
+        invalidate_identity(user_id)
         
         flash("Contact details updated successfully!", "success")
         
@@ -4966,9 +4764,9 @@ def upload_profile_picture():
             ext = file.filename.rsplit('.', 1)[1].lower()
             filename = secure_filename(f"user_{current_user.get_id()}_{int(time.time())}.{ext}")
             
-            # Save file
-            save_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(save_path)
+            # Save file (capped while it streams in), then queue its thumbnail
+            avatar_store.save_stream(filename, LimitedStream(file.stream, SIZE_LIMITS[AVATAR]))
+            variant_worker.submit(avatar_store, filename, [THUMB])
             
             # Save to database
             conn = get_db_connection()
@@ -4976,10 +4774,11 @@ def upload_profile_picture():
             try:
                 cur.execute("UPDATE users SET profile_picture = %s WHERE id = %s", (filename, current_user.get_id()))
                 conn.commit()
+                invalidate_identity(current_user.get_id())
                 
                 # Success
                 msg = 'Profile picture updated successfully!'
-                new_url = url_for('static', filename='uploads/profile_pictures/' + filename)
+                new_url = avatar_store.url_for(variant_name(filename, THUMB.name))
                 
                 if is_ajax:
                     return jsonify({
@@ -4999,6 +4798,10 @@ def upload_profile_picture():
                 cur.close()
                 conn.close()
                 
+        except UploadTooLarge as e:
+            msg = str(e)
+            if is_ajax: return jsonify({'success': False, 'message': msg}), 413
+            flash(msg, 'error')
         except Exception as e:
             logger.error(f"File Save Error: {e}")
             msg = 'Error saving file.'
@@ -5089,15 +4892,12 @@ def submit_hotel_booking():
         flash("Invalid date format. Please use the date picker.", "danger")
         return redirect(url_for('dashboard'))
 
-    # Check if city is supported or generate dynamic data
-    if destination in hotels_data:
-        all_hotels = hotels_data[destination]
-    else:
-        # Dynamic generation for all other cities
-        all_hotels = generate_dynamic_hotels(destination)
-        
+    # Same city and check-in date always yields the same hotels, indexed by price
+    hotel_catalog = inventory.index('hotels', checkin, destination)
+    all_hotels = hotel_catalog.query('hotel', sort='catalog').dicts()
+
     # Get city coordinates for map
-    city_coords = CITY_COORDINATES.get(destination)
+    city_coords = CITY_COORDINATES.get(resolve_city(destination))
     if not city_coords and all_hotels:
         # Fallback: use first hotel's coords
         city_coords = {"lat": all_hotels[0]['lat'], "lng": all_hotels[0]['lng']}
@@ -5138,19 +4938,15 @@ def submit_hotel_booking():
 
         # Filter hotels by price
         if budget_limit > 0:
-            filtered_hotels = [h for h in all_hotels if h.get('price', 0) <= budget_limit]
+            filtered_hotels = hotel_catalog.query('hotel', max_price=budget_limit, sort='catalog').dicts()
         else:
             filtered_hotels = []
 
     # ── User Defined Price Range Filter (Overrides budget if specific range provided) ──
     # If user manually sets filters in "Modify Search", we respect that over profile budget
     if 'min_price' in request.form or 'min_price' in request.args:
-        filtered_hotels = [
-            h for h in all_hotels 
-            if min_price <= h.get('price', 0) <= max_price
-        ]
+        filtered_hotels = hotel_catalog.query('hotel', min_price=min_price, max_price=max_price, sort='catalog').dicts()
 
-    random.shuffle(filtered_hotels)
     # selected_hotels = filtered_hotels[:min(len(filtered_hotels), 6)]  # Show up to 6
     selected_hotels = filtered_hotels # Show all matching for better filtering experience
 
@@ -5242,11 +5038,44 @@ def submit_travel_booking():
         flash("Invalid date format. Please use the date picker.", "danger")
         return redirect(url_for('dashboard'))
 
-    # Generate flights
-    flights = generate_flight_data(origin, destination, travel_class)
-
-    display_count = random.choice([5, 6])
-    displayed_flights = random.sample(flights, min(display_count, len(flights))) if len(flights) > display_count else flights
+    # Server-side filters, sort and paging over the route's daily schedule
+    try:
+        max_stops = int(request.values['stops']) if request.values.get('stops') else None
+    except ValueError:
+        max_stops = None
+    departure_window = request.values.get('departure_window') if request.values.get('departure_window') in DEPARTURE_WINDOWS else None
+    airline_filter = request.values.get('airline', '').strip()
+    refundable_only = request.values.get('refundable') == '1'
+    sort = request.values.get('sort') if request.values.get('sort') in FLIGHT_SORT_KEYS else 'price'
+    try:
+        page = max(1, int(request.values.get('page', 1)))
+    except (ValueError, TypeError):
+        page = 1
+
+    results = flight_search.search(FlightQuery(
+        resolve_city(origin) or origin, resolve_city(destination) or destination, departure_date, travel_class,
+        max_stops=max_stops,
+        departure_window=departure_window,
+        airlines=frozenset([airline_filter]) if airline_filter else frozenset(),
+        refundable=True if refundable_only else None,
+        sort=sort,
+        offset=(page - 1) * FLIGHTS_PER_PAGE,
+        limit=FLIGHTS_PER_PAGE,
+    ))
+    flight_filters = {
+        'stops': '' if max_stops is None else max_stops,
+        'departure_window': departure_window or '',
+        'airline': airline_filter,
+        'refundable': '1' if refundable_only else '',
+        'sort': sort,
+    }
+    page_args = {k: v for k, v in {
+        'origin': origin, 'destination': destination, 'departure_date': departure_date,
+        'return_date': return_date, 'adults': adults, 'children': children, 'infants': infants,
+        'class': travel_class, **flight_filters,
+    }.items() if v not in (None, '')}
+    prev_page_url = url_for('submit_travel_booking', page=page - 1, **page_args) if page > 1 else None
+    next_page_url = url_for('submit_travel_booking', page=page + 1, **page_args) if results.has_more else None
 
     arrival_date = departure_date  # Or calculate if needed
 
@@ -5262,141 +5091,26 @@ def submit_travel_booking():
                            children=children,
                            infants=infants,
                            travel_class=travel_class,
-                           flights=displayed_flights,
+                           flights=list(results.flights),
+                           total_flights=results.total,
+                           flight_filters=flight_filters,
+                           airline_names=[a['name'] for a in AIRLINES],
+                           page=page,
+                           prev_page_url=prev_page_url,
+                           next_page_url=next_page_url,
                            current_user_id=current_user.get_id())
 
-def generate_flight_data(origin, destination, travel_class):
-    """Generate realistic flight data"""
-    flights = []
-    
-    # Expanded Airlines List
-    airlines = [
-        {'name': 'IndiGo', 'code': '6E', 'hub': 'DEL'},
-        {'name': 'Air India', 'code': 'AI', 'hub': 'DEL'},
-        {'name': 'Vistara', 'code': 'UK', 'hub': 'DEL'},
-        {'name': 'SpiceJet', 'code': 'SG', 'hub': 'DEL'},
-        {'name': 'Air India Express', 'code': 'IX', 'hub': 'CCJ'},
-        {'name': 'Akasa Air', 'code': 'QP', 'hub': 'BOM'},
-        {'name': 'Alliance Air', 'code': '9I', 'hub': 'DEL'},
-        {'name': 'Star Air', 'code': 'S5', 'hub': 'BLR'}
-    ]
-    
-    # Expanded Airport Codes (Major + Tier 2)
-    airport_codes = {
-        'Mumbai': 'BOM', 'Delhi': 'DEL', 'Bangalore': 'BLR', 'Chennai': 'MAA',
-        'Hyderabad': 'HYD', 'Kolkata': 'CCU', 'Pune': 'PNQ', 'Goa': 'GOI',
-        'Jaipur': 'JAI', 'Ahmedabad': 'AMD', 'Lucknow': 'LKO', 'Cochin': 'COK',
-        'Patna': 'PAT', 'Indore': 'IDR', 'Chandigarh': 'IXC', 'Nagpur': 'NAG',
-        'Bhubaneswar': 'BBI', 'Coimbatore': 'CJB', 'Thiruvananthapuram': 'TRV',
-        'Visakhapatnam': 'VTZ', 'Surat': 'STV', 'Varanasi': 'VNS', 'Guwahati': 'GAU',
-        'Amritsar': 'ATQ', 'Ranchi': 'IXR', 'Raipur': 'RPR', 'Bhopal': 'BHO'
-    }
-    
-    # Dynamic Code Generation for unknown cities
-    origin_code = airport_codes.get(origin, origin[:3].upper())
-    destination_code = airport_codes.get(destination, destination[:3].upper())
-    
-    # Calculate Approximate Distance & Duration (Mock logic)
-    # Using lat/long distance would be better, but mock logic suffices for realism
-    # Base duration 1h + random factor
-    base_duration_mins = random.randint(60, 180) 
-    
-    num_flights = random.randint(12, 18)
-    
-    for i in range(num_flights):
-        airline = random.choice(airlines)
-        flight_number = f"{airline['code']}{random.randint(100, 999)}"
-        flight_name = f"{airline['name']} {flight_number}"
-        
-        # Smart Departure Times (Morning, Afternoon, Evening, Night)
-        time_slot = random.choice(['morning', 'morning', 'afternoon', 'evening', 'night'])
-        if time_slot == 'morning': departure_hour = random.randint(5, 11)
-        elif time_slot == 'afternoon': departure_hour = random.randint(12, 16)
-        elif time_slot == 'evening': departure_hour = random.randint(17, 21)
-        else: departure_hour = random.randint(22, 23) # or early morning 0-4
-        
-        departure_minute = random.choice([0, 5, 10, 15, 20, 25, 30, 35, 40, 45, 50, 55])
-        
-        # Duration variation
-        duration_minutes = base_duration_mins + random.randint(-15, 15)
-        duration_hours = duration_minutes // 60
-        duration_remaining_minutes = duration_minutes % 60
-        
-        # Arrival Time Calculation
-        departure_total_mins = departure_hour * 60 + departure_minute
-        arrival_total_mins = (departure_total_mins + duration_minutes) % (24 * 60)
-        arrival_hour = arrival_total_mins // 60
-        arrival_minute = arrival_total_mins % 60
-        
-        # Stops Logic
-        stops = random.choices([0, 1, 2], weights=[70, 25, 5], k=1)[0]
-        if stops > 0:
-            duration_hours += stops * 2 # Add layover time
-        
-        # Price Logic
-        base_price_map = {
-            'economy': random.randint(3000, 6000),
-            'premium_economy': random.randint(5500, 9000),
-            'business': random.randint(12000, 25000),
-            'first': random.randint(25000, 45000)
-        }
-        price = base_price_map.get(travel_class, 4000)
-        
-        # Adjust price based on stops (cheaper) and time (expensive morning/evening)
-        if stops > 0: price *= 0.85
-        if 8 <= departure_hour <= 10 or 17 <= departure_hour <= 19: price *= 1.10
-        
-        price = int(price / 100) * 100 + 99 # Make it look like 4999
-        
-        baggage_allowance = {
-            'economy': "15kg (1 Pc)",
-            'premium_economy': "25kg (2 Pcs)",
-            'business': "35kg (2 Pcs)",
-            'first': "40kg (3 Pcs)"
-        }.get(travel_class, "15kg")
-        
-        flight_data = {
-            'airline': airline['name'],
-            'departure_time': f'{departure_hour:02d}:{departure_minute:02d}',
-            'arrival_time': f'{arrival_hour:02d}:{arrival_minute:02d}',
-            'origin': origin,
-            'destination': destination,
-            'origin_code': origin_code,
-            'destination_code': destination_code,
-            'flight_no': flight_number,
-            'flight_name': flight_name,
-            'duration': f'{duration_hours}h {duration_remaining_minutes:02d}m',
-            'travel_class': travel_class,
-            'seats_available': random.randint(2, 25),
-            'price': int(price),
-            'status': 'On Time',
-            'baggage_allowance': baggage_allowance,
-            'meal_included': travel_class != 'economy' or random.choice([True, False]),
-            'wifi_available': travel_class != 'economy',
-            'stops': stops,
-            'refundable': random.choice([True, False]),
-            'deal': random.choice(['', '', '', 'Fastest', 'Cheapest', 'Best Value']),
-            'lat_origin': CITY_COORDINATES.get(origin, {}).get('lat', 20.59), # Pass coords for map
-            'lng_origin': CITY_COORDINATES.get(origin, {}).get('lng', 78.96),
-            'lat_dest': CITY_COORDINATES.get(destination, {}).get('lat', 28.61),
-            'lng_dest': CITY_COORDINATES.get(destination, {}).get('lng', 77.20)
-        }
-        flights.append(flight_data)
-    
-    flights.sort(key=lambda x: x['price'])
-    
-    return flights
-
 # ---------------------- PDF Ticket download ----------------------
 @app.route('/download-ticket/<booking_id>')
 @login_required
 def download_ticket(booking_id):
-    filename = f"ticket_{booking_id}.pdf"
-    path = TICKETS_DIR / filename
-    if not path.exists():
+    filename = latest_ticket(ticket_dir(ticket_store.root, booking_id), booking_id)
+    if not filename and ticket_store.legacy_dir:
+        filename = latest_ticket(ticket_store.legacy_dir, booking_id)
+    if not filename:
         flash("PDF ticket not available yet.", "danger")
         return redirect(url_for('dashboard'))
-    return send_from_directory(str(TICKETS_DIR), filename, as_attachment=True)
+    return send_artifact(ticket_store, filename, as_attachment=True)
 
 # ---------------------- Flight: confirm (mock payment) ----------------------
 @app.route('/confirm-flight', methods=['POST'])
@@ -5447,6 +5161,13 @@ def confirm_flight():
         "special_requests": data.get('special_requests', '')
     }
     
+    # Prefer the flight the results page rendered over client-sent fields
+    if isinstance(flight_data, dict):
+        flight_item = flight_search.lookup(flight_data.get('inventory_ref'))
+        if flight_item:
+            flight_data = flight_item
+            details_obj['inventory_ref'] = flight_item['inventory_ref']
+
     if isinstance(flight_data, dict):
         details_obj.update({
             "airline": flight_data.get('airline', 'N/A'),
@@ -5494,11 +5215,9 @@ def confirm_flight():
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        # Create ticket immediately
+        # The ticket is rendered by the ticket worker once the booking commits
         user_id = current_user.get_id()
-        pdf_filename = generate_pdf_ticket(booking_id, 'Flight Booking', details_obj, user_id)
-        details_obj['ticket_pdf_url'] = f"/static/tickets/{pdf_filename}"
-        details_obj['ticket_generated_at'] = datetime.now().isoformat()
+        details_obj['ticket_status'] = 'pending'
 
         cur.execute("""
             INSERT INTO requests (user_id, booking_id, service_type, details, payment_status, admin_confirmation)
@@ -5513,7 +5232,10 @@ def confirm_flight():
             'Pending'
         ))
         new_id = cur.fetchone()[0]
+        enqueue_ticket(cur, new_id)
         conn.commit()
+        response_cache.invalidate('requests')
+        ticket_worker.notify()
         
         return jsonify({
             "success": True, 
@@ -5521,7 +5243,7 @@ def confirm_flight():
             "request_id": new_id,
             "flight_no": details_obj['flight_no'],
             "message": "Flight booking confirmed successfully!",
-            "ticket_url": f"/static/tickets/{pdf_filename}"
+            "ticket_status": "pending"
         })
         
     except Exception as e:
@@ -5539,11 +5261,27 @@ def mark_notifications_read_route():
     mark_notifications_read(current_user.get_id())
     return jsonify({"success": True})
 
+@app.route('/api/notifications')
+@login_required
+def api_notifications():
+    """Notification feed, newest first; pass next_cursor back as ?cursor= for older items"""
+    try:
+        limit = int(request.args.get('limit', NOTIFICATION_PAGE_SIZE))
+        notifications, next_cursor = get_user_notifications(
+            current_user.get_id(), request.args.get('cursor'), limit
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error fetching notifications: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+    return jsonify({'success': True, 'notifications': notifications, 'next_cursor': next_cursor})
+
 @app.route('/get-unread-count')
 @login_required
 def get_unread_count_route():
-    count = get_unread_count(current_user.get_id())
-    return jsonify({"unread_count": count})
+    user_id = current_user.get_id()
+    return jsonify({"unread_count": get_unread_count(user_id), "support_unread_count": get_user_unread_count(user_id)})
 
 @app.route('/logout')
 @login_required
@@ -5690,6 +5428,7 @@ def reset_password(token):
             cur.execute("UPDATE users SET password = %s WHERE id = %s", (new_password, user_id))
             cur.execute("UPDATE password_reset_tokens SET used = TRUE WHERE token = %s", (token,))
             conn.commit()
+            invalidate_identity(user_id)
             
             flash("Password reset successfully! Please login with your new password.", "success")
             return redirect(url_for('login'))
@@ -5780,6 +5519,7 @@ def fix_existing_flight_numbers():
                 continue
         
         conn.commit()
+        response_cache.invalidate('requests')
         print(f"Updated {len(rows)} flight bookings")
         
     except Exception as e:
@@ -5886,6 +5626,7 @@ def api_dismiss_recommendation():
 
 @app.route('/api/user-profile')
 @login_required
+@cached_json(('lifestyle_profiles',), ttl=300)
 def api_user_profile():
     """Get user lifestyle profile data for pre-filling booking forms"""
     try:
@@ -5921,6 +5662,7 @@ def api_user_profile():
 
 @app.route('/api/lifestyle-recommendations')
 @login_required
+@cached_json(('lifestyle_profiles', 'ai_recommendations'), ttl=300)
 def api_lifestyle_recommendations():
     """Get AI-powered recommendations based on comprehensive lifestyle profile.
 
@@ -6499,157 +6241,9 @@ def api_nearby_services():
         
         services = []
         
-        # City boundary boxes - ACCURATE land boundaries to prevent services on water/forest
-        # Format: (min_lat, max_lat, min_lng, max_lng) - strict land-only boundaries
-        CITY_BOUNDARIES = {
-            # Mumbai - Avoid Arabian Sea (west), avoid Thane Creek (east)
-            'Mumbai': (18.90, 19.27, 72.82, 72.96),
-
-            # Pune - Avoid hills and forest areas
-            'Pune': (18.42, 18.63, 73.75, 73.95),
-
-            # Nashik - City center, avoid Sahyadri hills
-            'Nashik': (19.95, 20.05, 73.75, 73.85),
-
-            # Delhi - NCR boundaries
-            'Delhi': (28.50, 28.75, 77.05, 77.30),
-
-            # Bangalore - City limits, avoid outskirts
-            'Bangalore': (12.90, 13.10, 77.50, 77.70),
-
-            # Default tight boundary for unknown cities
-            'default': None
-        }
-
-        # Advanced land validation - city-specific checks
-        def is_on_land(lat, lng, city_name):
-            """
-            Validates if coordinates are on habitable land.
-            Returns False for water bodies, forests, restricted areas.
-            """
-            if city_name == 'Mumbai':
-                # Mumbai's unique geography - peninsula with Arabian Sea on west
-                # South Mumbai (lat < 18.95): Very narrow, avoid west coast
-                if lat < 18.95:
-                    # South Mumbai: Only lng > 72.825 (Nariman Point eastward)
-                    return lng > 72.825
-
-                # Central Mumbai (18.95 - 19.05): Wider
-                elif lat < 19.05:
-                    return 72.82 <= lng <= 72.89
-
-                # North Mumbai/Suburbs (19.05 - 19.20): Widest part
-                elif lat < 19.20:
-                    return 72.82 <= lng <= 72.95
-
-                # Far North (>19.20): Narrower again
-                else:
-                    return 72.84 <= lng <= 72.92
-
-            elif city_name == 'Pune':
-                # Pune: Avoid Western Ghats hills
-                # Hills mostly to the west and north
-                if lat > 18.58:  # North Pune
-                    return lng > 73.80  # Avoid Lonavala direction
-                return True
-
-            elif city_name == 'Delhi':
-                # Delhi: Yamuna River on east, avoid it
-                if lng > 77.28:  # East of Yamuna
-                    return False
-                return True
-
-            elif city_name == 'Bangalore':
-                # Bangalore: Generally landlocked, safe
-                return True
-
-            # Unknown cities: Be conservative
-            return True
-
-        def calculate_distance(lat1, lng1, lat2, lng2):
-            """Calculate accurate distance in km using Haversine formula"""
-            import math
-            R = 6371  # Earth's radius in km
-
-            lat1_rad = math.radians(lat1)
-            lat2_rad = math.radians(lat2)
-            dlat = math.radians(lat2 - lat1)
-            dlng = math.radians(lng2 - lng1)
-
-            a = math.sin(dlat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlng/2)**2
-            c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-
-            return R * c
-
-        def get_nearby_coords(center_lat, center_lng, max_dist_km):
-            """
-            Generate realistic coordinates within radius.
-            - Validates against city boundaries
-            - Checks for water bodies / forests
-            - Respects actual distance (not approximate)
-            - More attempts for stricter validation
-            """
-            import math
-
-            # Get city boundary if available
-            boundary = CITY_BOUNDARIES.get(city, CITY_BOUNDARIES.get('default'))
-
-            max_attempts = 50  # Increased from 20 to 50 for better coverage
-            successful_attempts = 0
-
-            for attempt in range(max_attempts):
-                # Generate random angle (0 to 360 degrees)
-                angle = random.uniform(0, 2 * math.pi)
-
-                # Distance: Use sqrt for uniform circular distribution
-                # Ensure minimum distance of 0.3km to avoid too close
-                distance = math.sqrt(random.uniform(0.3**2, max_dist_km**2))
-
-                # Convert distance to lat/lng offsets
-                # 1 degree latitude ≈ 111km
-                # 1 degree longitude ≈ 111km * cos(latitude)
-                lat_offset = (distance / 111.0) * math.cos(angle)
-                lng_offset = (distance / (111.0 * math.cos(math.radians(center_lat)))) * math.sin(angle)
-
-                new_lat = center_lat + lat_offset
-                new_lng = center_lng + lng_offset
-
-                # Calculate actual distance for verification
-                actual_distance = calculate_distance(center_lat, center_lng, new_lat, new_lng)
-
-                # Skip if distance miscalculation (should not happen, but safety check)
-                if actual_distance > max_dist_km * 1.1:  # 10% tolerance
-                    continue
-
-                # Validate against city boundary
-                if boundary:
-                    min_lat, max_lat, min_lng, max_lng = boundary
-                    if not (min_lat <= new_lat <= max_lat and min_lng <= new_lng <= max_lng):
-                        continue
-
-                # Validate land check
-                if not is_on_land(new_lat, new_lng, city):
-                    continue
-
-                # Valid location found!
-                return new_lat, new_lng, round(actual_distance, 1)
-
-            # Fallback: If all attempts failed, place near center of valid area
-            logger.warning(f"Could not find valid location after {max_attempts} attempts, using fallback")
-
-            if boundary:
-                min_lat, max_lat, min_lng, max_lng = boundary
-                # Try center of boundary with small random offset
-                for _ in range(10):
-                    safe_lat = (min_lat + max_lat) / 2 + random.uniform(-0.02, 0.02)
-                    safe_lng = (min_lng + max_lng) / 2 + random.uniform(-0.02, 0.02)
-
-                    if is_on_land(safe_lat, safe_lng, city):
-                        dist = calculate_distance(center_lat, center_lng, safe_lat, safe_lng)
-                        return safe_lat, safe_lng, round(min(dist, max_dist_km), 1)
-
-            # Ultimate fallback: Use center location
-            return center_lat, center_lng, 0.5
+        # Markers are placed on land using the precomputed city land mask;
+        # one sampler per request, one draw per placed service.
+        nearby = landmask.nearby_sampler(city, lat, lng, radius)
 
         # Hotels - Filtered by budget
         all_hotels = [
@@ -6718,13 +6312,13 @@ def api_nearby_services():
 
         # Generate nearby instances for hotels
         for h in target_hotels:
-            h_lat, h_lng, dist = get_nearby_coords(lat, lng, radius)
+            h_lat, h_lng, dist = nearby.draw(random)
             h_copy = h.copy()
             h_copy.update({'lat': h_lat, 'lng': h_lng, 'distance': dist})
             services.append(h_copy)
 
         # Technicians
-        tech_lat, tech_lng, tech_dist = get_nearby_coords(lat, lng, radius)
+        tech_lat, tech_lng, tech_dist = nearby.draw(random)
         services.append({
             'id': 3,
             'name': 'QuickFix Home Services',
@@ -6749,7 +6343,7 @@ def api_nearby_services():
         if not target_cars: target_cars = all_cars # Fallback
 
         for c in target_cars:
-            c_lat, c_lng, c_dist = get_nearby_coords(lat, lng, radius)
+            c_lat, c_lng, c_dist = nearby.draw(random)
             services.append({
                 'id': c['id'],
                 'name': c['name'],
@@ -6765,7 +6359,7 @@ def api_nearby_services():
             })
 
         # Couriers
-        cour_lat, cour_lng, cour_dist = get_nearby_coords(lat, lng, radius)
+        cour_lat, cour_lng, cour_dist = nearby.draw(random)
         services.append({
             'id': 6,
             'name': 'Express Courier Hub',
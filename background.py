@@ -0,0 +1,53 @@
+"""Daemon threads that repeat one unit of work until stopped.
+
+Sweepers, reconcilers and queue workers share this loop instead of each
+keeping its own copy of ``start``/``stop``/``_run``.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicWorker:
+    """Calls ``run_once`` on a daemon thread every ``interval`` seconds.
+
+    Subclasses set ``name`` (the thread name) and implement ``run_once``.
+    With ``run_first`` a round runs as soon as the thread starts; otherwise
+    the first one runs after ``interval``. ``interval=0`` suits queue
+    workers whose ``run_once`` blocks on its own. An exception from a
+    round is logged and the loop carries on.
+    """
+
+    name = "periodic-worker"
+    run_first = False
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def run_once(self) -> None:
+        raise NotImplementedError
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        if not self.run_first and self._stop.wait(self.interval):
+            return
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"{self.name} failed: {e}")
+            self._stop.wait(self.interval)
@@ -0,0 +1,117 @@
+"""Peak memory of receiving a large attachment, chunked vs. in one message.
+
+    python -m benchmarks.bench_chunked_upload [--size-mb 100] [--chunk-kb 256]
+
+Writes a random file of ``--size-mb`` to a temp directory, then receives it
+into a deduplicating ``ArtifactStore`` in two ways. Python allocations are
+traced with ``tracemalloc``:
+
+* ``chunked``: ``realtime.transfers.ChunkedUploads``, fed one binary chunk
+  at a time, as Socket.IO delivers them. Only the current chunk is held, and
+  the running SHA-256 is handed to the store, so nothing is reread.
+* ``one-message``: the whole file arrives as one base64 string, which is how
+  a JSON socket payload carries binary. It is decoded, then written.
+
+For each mode it reports the peak traced memory, the time taken and the
+number of bytes the store read back from disk to hash, counted by wrapping
+the ``open`` that ``storage.store`` uses.
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import builtins
+import hashlib
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import storage.store
+from realtime.transfers import ChunkedUploads
+from storage.store import ArtifactStore
+
+_MB = 1024 * 1024
+
+
+def make_source(path: Path, size: int) -> None:
+    block = hashlib.sha256(b"seed").digest() * (_MB // 32)
+    with open(path, "wb") as f:
+        for i, start in enumerate(range(0, size, _MB)):
+            # Vary each block so dedupe cannot collapse it
+            f.write((i.to_bytes(8, "big") + block[8:])[:size - start])
+
+
+@contextmanager
+def count_store_reads() -> Iterator[list[int]]:
+    """Count the bytes ``storage.store`` reads from files while the block runs."""
+    total = [0]
+
+    def counting_open(*args, **kwargs):
+        f = builtins.open(*args, **kwargs)
+        read = f.read
+
+        def counted(*a):
+            data = read(*a)
+            total[0] += len(data)
+            return data
+
+        f.read = counted
+        return f
+
+    storage.store.open = counting_open
+    try:
+        yield total
+    finally:
+        del storage.store.open
+
+
+def receive_chunked(store: ArtifactStore, source: Path, chunk_size: int) -> None:
+    uploads = ChunkedUploads(store, chunk_size=chunk_size)
+    size = source.stat().st_size
+    upload = uploads.begin("bench", "chunked.bin", size, limit=size)
+    with open(source, "rb") as f:
+        while chunk := f.read(chunk_size):
+            uploads.write(upload.id, "bench", upload.offset, chunk)
+    uploads.finish(upload.id, "bench")
+
+
+def receive_one_message(store: ArtifactStore, source: Path) -> None:
+    payload = base64.b64encode(source.read_bytes()).decode("ascii")
+    tmp = store.tmp_path("message.bin")
+    tmp.write_bytes(base64.b64decode(payload))
+    store.put_file("message.bin", tmp)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=100)
+    parser.add_argument("--chunk-kb", type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = Path(tmpdir) / "source.bin"
+        make_source(source, int(args.size_mb * _MB))
+        print(f"file: {source.stat().st_size / _MB:g} MiB, chunks of {args.chunk_kb} KiB")
+        print(f"{'mode':<14}{'peak MiB':>10}{'seconds':>10}{'reread MiB':>12}")
+
+        modes = [
+            ("chunked", lambda store: receive_chunked(store, source, args.chunk_kb * 1024)),
+            ("one-message", lambda store: receive_one_message(store, source)),
+        ]
+        for label, receive in modes:
+            store = ArtifactStore(Path(tmpdir) / label, "/bench", dedupe=True)
+            with count_store_reads() as reread:
+                tracemalloc.start()
+                start = time.perf_counter()
+                receive(store)
+                elapsed = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            print(f"{label:<14}{peak / _MB:>10.2f}{elapsed:>10.2f}{reread[0] / _MB:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Confirm-endpoint latency benchmark for ticket generation.
+
+    python -m benchmarks.bench_confirm_tickets --base-url http://localhost:5000 \\
+        --username alice --password secret [--requests 200] [--concurrency 4]
+    python -m benchmarks.bench_confirm_tickets --render-only [--requests 50]
+
+The first form logs in against a running server and times ``/confirm-booking``
+end to end. Run it once on a build that renders tickets inline and once on a
+build with the ticket worker to compare p50/p95/p99 before and after. Every
+request creates a real booking, so point it at a scratch database.
+
+``--render-only`` needs no server: it times ``render_ticket`` alone, which is
+the work the ticket worker takes off the request path.
+"""
+from __future__ import annotations
+
+import argparse
+import http.cookiejar
+import json
+import statistics
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+HOTEL_BOOKING = {
+    "hotel": "Benchmark Residency",
+    "amount": 8400,
+    "rooms": 1,
+    "guests": 2,
+    "checkin": "2026-11-02",
+    "checkout": "2026-11-04",
+    "email": "bench@example.com",
+    "mobile": "9876543210",
+    "guest_details": [{"name": "Bench Guest", "age": 30}],
+}
+
+
+def report(label: str, timings: list[float]) -> None:
+    ordered = sorted(timings)
+    p50 = ordered[len(ordered) // 2] * 1e3
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)] * 1e3
+    p99 = ordered[max(0, int(len(ordered) * 0.99) - 1)] * 1e3
+    print(f"{label:<16} n={len(timings):<5} p50 {p50:8.1f}ms   p95 {p95:8.1f}ms   p99 {p99:8.1f}ms   "
+          f"mean {statistics.fmean(timings) * 1e3:8.1f}ms")
+
+
+def login(base_url: str, username: str, password: str) -> urllib.request.OpenerDirector:
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    form = urllib.parse.urlencode({"username": username, "password": password}).encode()
+    with opener.open(f"{base_url}/login", data=form) as response:
+        if not response.geturl().rstrip("/").endswith("/dashboard"):
+            raise SystemExit(f"Login as {username!r} failed")
+    return opener
+
+
+def confirm_once(opener: urllib.request.OpenerDirector, base_url: str) -> float:
+    request = urllib.request.Request(
+        f"{base_url}/confirm-booking",
+        data=json.dumps(HOTEL_BOOKING).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    start = time.perf_counter()
+    with opener.open(request) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def bench_endpoint(args: argparse.Namespace) -> None:
+    opener = login(args.base_url, args.username, args.password)
+    confirm_once(opener, args.base_url)  # warm up connections and lazy startup work
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        timings = list(pool.map(lambda _: confirm_once(opener, args.base_url), range(args.requests)))
+    report("/confirm-booking", timings)
+
+
+def bench_render(args: argparse.Namespace) -> None:
+    # Imported here so timing a server does not need ReportLab locally
+    from tickets.render import render_ticket
+
+    with tempfile.TemporaryDirectory() as tickets_dir:
+        timings = []
+        for i in range(args.requests):
+            start = time.perf_counter()
+            render_ticket(f"HOTEL-{i:04d}", "Hotel Booking", dict(HOTEL_BOOKING, hotel_name=HOTEL_BOOKING["hotel"]), tickets_dir)
+            timings.append(time.perf_counter() - start)
+    report("render_ticket", timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:5000")
+    parser.add_argument("--username")
+    parser.add_argument("--password")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--render-only", action="store_true")
+    args = parser.parse_args()
+
+    if args.render_only:
+        bench_render(args)
+    elif not (args.username and args.password):
+        parser.error("--username and --password are required unless --render-only is given")
+    else:
+        bench_endpoint(args)
+
+
+if __name__ == "__main__":
+    main()
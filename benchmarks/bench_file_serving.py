@@ -0,0 +1,103 @@
+"""Bytes copied through Python per ticket download.
+
+    python -m benchmarks.bench_file_serving [--size-kb 256] [--downloads 200]
+
+Stores a synthetic ticket of ``--size-kb`` and downloads it through the app's
+WSGI callable (no server, no database) in several ways:
+
+* ``full``: a plain GET on a server without ``wsgi.file_wrapper``, such as the
+  Werkzeug dev server. Every byte is read and yielded by Python.
+* ``full+file_wrapper``: the same GET under a server that provides
+  ``wsgi.file_wrapper`` (gunicorn, which uses ``sendfile``). The app hands
+  over the open file and copies nothing.
+* ``revalidate``: a GET with ``If-None-Match`` set to the current ETag. It
+  returns 304 and no body.
+* ``range``: ``Range: bytes=0-65535``, for example a viewer fetching the
+  first page.
+* ``x-accel``: ``FILE_OFFLOAD=x-accel``. The response only carries an
+  ``X-Accel-Redirect`` header, and nginx sends the file.
+
+For each mode it reports the status, the bytes Python copied per download and
+the time per download. It also reports the bytes hashed for ETags, which
+should be one file's worth, since the digest is cached.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+import uuid
+
+
+class CountingFileWrapper:
+    """Stands in for a server's ``wsgi.file_wrapper``: takes the file and never reads it."""
+
+    def __init__(self, file, block_size=8192):
+        self.file = file
+
+    def __iter__(self):
+        return iter(())
+
+    def close(self):
+        self.file.close()
+
+
+def download(app, path: str, headers: dict, file_wrapper: bool) -> tuple[str, int]:
+    from werkzeug.test import EnvironBuilder
+
+    environ = EnvironBuilder(path=path, headers=headers).get_environ()
+    if file_wrapper:
+        environ['wsgi.file_wrapper'] = CountingFileWrapper
+    status = []
+    body = app.wsgi_app(environ, lambda s, h, exc_info=None: status.append(s))
+    copied = 0
+    try:
+        for chunk in body:
+            copied += len(chunk)
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+    return status[0], copied
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-kb", type=int, default=256)
+    parser.add_argument("--downloads", type=int, default=200)
+    args = parser.parse_args()
+
+    import app as web
+
+    name = f"ticket_BENCH-{uuid.uuid4().hex[:8]}_{'0' * 16}.pdf"
+    tmp = web.ticket_store.tmp_path(name)
+    tmp.write_bytes(b"%PDF-1.4\n" + os.urandom(args.size_kb * 1024))
+    web.ticket_store.put_file(name, tmp)
+    url = web.ticket_store.url_for(name)
+    etag = web.file_etags.get(web.ticket_store.resolve(name))
+
+    modes = [
+        ("full", {}, False, ''),
+        ("full+file_wrapper", {}, True, ''),
+        ("revalidate", {"If-None-Match": f'"{etag}"'}, False, ''),
+        ("range", {"Range": "bytes=0-65535"}, False, ''),
+        ("x-accel", {}, False, 'x-accel'),
+    ]
+    print(f"file: {args.size_kb} KiB, {args.downloads} downloads per mode")
+    print(f"{'mode':<20}{'status':<22}{'copied/dl':>12}{'ms/dl':>10}")
+    try:
+        for label, headers, file_wrapper, offload in modes:
+            web.FILE_OFFLOAD = offload
+            total = 0
+            start = time.perf_counter()
+            for _ in range(args.downloads):
+                status, copied = download(web.app, url, headers, file_wrapper)
+                total += copied
+            elapsed = time.perf_counter() - start
+            print(f"{label:<20}{status:<22}{total // args.downloads:>12,}{elapsed / args.downloads * 1000:>10.3f}")
+    finally:
+        web.ticket_store.delete(name)
+    print(f"bytes hashed for ETags: {web.file_etags.hashed_bytes:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Bulk route query benchmark for the flight search engine.
+
+    python -m benchmarks.bench_flights [--queries 20000] [--seed 1]
+
+Reports schedule precompute time, then throughput and latency percentiles for
+a mixed batch of searches, first against a cold results cache and then warm.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+from itertools import permutations
+
+from flights.airlines import AIRLINES, CLASS_FARE_MULTIPLIER
+from flights.search import DEPARTURE_WINDOWS, SORT_KEYS, FlightQuery, FlightSearch
+from geo.cities import CITY_COORDINATES
+
+
+def make_queries(n: int, rng: random.Random) -> list[FlightQuery]:
+    pairs = list(permutations(CITY_COORDINATES, 2))
+    windows = [None, *DEPARTURE_WINDOWS]
+    queries = []
+    for _ in range(n):
+        origin, destination = rng.choice(pairs)
+        queries.append(FlightQuery(
+            origin, destination,
+            date=f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            travel_class=rng.choice(list(CLASS_FARE_MULTIPLIER)),
+            max_stops=rng.choice([None, None, 0, 1]),
+            departure_window=rng.choice(windows),
+            airlines=frozenset([rng.choice(AIRLINES)["name"]]) if rng.random() < 0.2 else frozenset(),
+            refundable=rng.choice([None, None, True]),
+            sort=rng.choice(SORT_KEYS),
+            offset=rng.choice([0, 0, 6]),
+            limit=6,
+        ))
+    return queries
+
+
+def run(engine: FlightSearch, queries: list[FlightQuery]) -> list[float]:
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        engine.search(query)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label: str, timings: list[float]) -> None:
+    ordered = sorted(timings)
+    total = sum(timings)
+    p50 = ordered[len(ordered) // 2] * 1e6
+    p99 = ordered[int(len(ordered) * 0.99) - 1] * 1e6
+    print(f"{label:<14} {len(timings) / total:>10.0f} q/s   p50 {p50:7.1f}us   p99 {p99:7.1f}us   "
+          f"mean {statistics.fmean(timings) * 1e6:7.1f}us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    engine = FlightSearch(CITY_COORDINATES, cache_size=args.queries)
+    start = time.perf_counter()
+    routes = engine.precompute()
+    print(f"precomputed {routes} routes in {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+    queries = make_queries(args.queries, random.Random(args.seed))
+    report("cold cache", run(engine, queries))
+    report("warm cache", run(engine, queries))
+
+
+if __name__ == "__main__":
+    main()
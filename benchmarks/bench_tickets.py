@@ -0,0 +1,123 @@
+"""Ticket rendering throughput, precompiled templates against a baseline.
+
+    python -m benchmarks.bench_tickets [--tickets 200] [--processes 1] [--baseline REV]
+
+Renders the same mix of hotel, car, flight, technician and courier tickets
+with the current ``tickets.render`` and with ``tickets/render.py`` as it was
+at ``REV`` (by default the commit before ``tickets/templates.py`` was added,
+which built every style per ticket). Reports tickets/sec in total and per
+core; ``--processes`` spreads the batch over that many worker processes.
+"""
+from __future__ import annotations
+
+import argparse
+import subprocess
+import tempfile
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor
+from itertools import cycle, islice
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+SAMPLES = [
+    ("Hotel Booking", {
+        "hotel_name": "Sea Breeze Residency", "checkin": "2026-11-02", "checkout": "2026-11-04",
+        "rooms": 1, "guests": 2, "email": "guest@example.com", "mobile": "9876543210", "total_amount": 8400,
+        "guest_details": [{"room": 1, "title": "Ms", "name": "Asha Rao", "type": "Adult"},
+                          {"room": 1, "title": "Mr", "name": "Vikram Rao", "type": "Adult"}],
+    }),
+    ("Car Booking", {
+        "car_model": "Toyota Innova", "cab_class": "SUV", "pickup": "Andheri East, Mumbai", "dropoff": "Pune",
+        "pickup_date": "2026-11-02", "pickup_time": "09:30", "passengers": 3, "total_price": 4200,
+        "passengers_details": [{"name": "Asha Rao", "age": 34, "gender": "F"}],
+    }),
+    ("Flight Booking", {
+        "airline": "IndiGo", "flight_no": "6E432", "origin": "Mumbai", "origin_code": "BOM",
+        "destination": "Delhi", "destination_code": "DEL", "departure_time": "07:45", "arrival_time": "09:55",
+        "travel_class": "economy", "duration": "2h 10m", "price": 6240,
+        "traveller_details": [{"title": "Ms", "full_name": "Asha Rao"}],
+    }),
+    ("Technician Booking", {
+        "service_type": "ac_repair", "name": "Ravi Kumar", "service_date": "2026-11-02", "service_time": "14:00",
+        "location": "Koramangala, Bangalore", "description": "AC not cooling", "total_price": 899,
+        "technician_id": "TECH-0042", "customer_name": "Asha Rao", "customer_address": "12 MG Road",
+        "mobile": "9876543210", "email": "guest@example.com",
+    }),
+    ("Courier Booking", {
+        "courier_name": "BlueDart", "pickup_location": "Mumbai", "dropoff_location": "Chennai",
+        "pickup_date": "2026-11-02", "pickup_time": "11:00", "package_weight_kg": 2.5, "courier_type": "express",
+        "delivery_duration": "2 days", "total_price_inr": 640,
+        "sender": {"name": "Asha Rao", "phone": "9876543210", "full_address": "12 MG Road, Mumbai"},
+        "receiver": {"name": "Vikram Rao", "phone": "9876501234", "full_address": "4 Beach Road, Chennai"},
+    }),
+]
+
+
+def default_baseline() -> str:
+    added = subprocess.run(
+        ["git", "log", "--diff-filter=A", "--format=%H", "--", "tickets/templates.py"],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    ).stdout.split()
+    if not added:
+        raise SystemExit("tickets/templates.py is not committed yet; pass --baseline")
+    return f"{added[-1]}^"
+
+
+def load_renderer(baseline: str | None):
+    """``render_ticket`` from the working tree, or from ``tickets/render.py`` at a git revision."""
+    if baseline is None:
+        from tickets.render import render_ticket
+        return render_ticket
+    source = subprocess.run(
+        ["git", "show", f"{baseline}:tickets/render.py"],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    module = types.ModuleType("baseline_render")
+    exec(compile(source, f"{baseline}:tickets/render.py", "exec"), module.__dict__)
+    return module.render_ticket
+
+
+def render_batch(baseline: str | None, count: int, offset: int) -> float:
+    render_ticket = load_renderer(baseline)
+    with tempfile.TemporaryDirectory() as tickets_dir:
+        start = time.perf_counter()
+        for i, (service_type, details) in enumerate(islice(cycle(SAMPLES), count)):
+            render_ticket(f"BENCH-{offset + i:05d}", service_type, details, tickets_dir)
+        return time.perf_counter() - start
+
+
+def run(label: str, baseline: str | None, tickets: int, processes: int) -> None:
+    if processes == 1:
+        render_batch(baseline, len(SAMPLES), 0)  # warm up imports and one-off setup
+        elapsed = render_batch(baseline, tickets, 0)
+        busy = elapsed
+    else:
+        share = tickets // processes
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            list(pool.map(render_batch, [baseline] * processes, [len(SAMPLES)] * processes, [0] * processes))
+            start = time.perf_counter()
+            per_process = list(pool.map(render_batch, [baseline] * processes, [share] * processes,
+                                        range(0, tickets, share)))
+            elapsed = time.perf_counter() - start
+        tickets = share * processes
+        busy = sum(per_process)
+    print(f"{label:<10} {tickets / elapsed:8.1f} tickets/s   {tickets / busy:8.1f} tickets/s/core   "
+          f"{elapsed / tickets * 1e3:7.2f} ms/ticket wall")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=200)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--baseline", help="git revision to compare against")
+    args = parser.parse_args()
+
+    baseline = args.baseline or default_baseline()
+    run("baseline", baseline, args.tickets, args.processes)
+    run("templates", None, args.tickets, args.processes)
+
+
+if __name__ == "__main__":
+    main()
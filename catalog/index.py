@@ -0,0 +1,179 @@
+"""Indexed in-memory catalog of hotels, cars and technicians.
+
+Every listing is filed under each combination of its kind, city, class and
+service type, and each of those buckets is kept sorted by price. A query is a
+dict lookup for its bucket plus two bisects for the price range, so search
+pages no longer scan every listing on each request. Each bucket also keeps
+its listings in catalog order, so catalog-sorted pages are sliced (or, with
+a price range, walked up to the page end) without sorting.
+"""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from heapq import merge
+from dataclasses import dataclass
+from itertools import islice, product
+from typing import Any, Callable, Iterable
+
+from catalog.records import Listing
+
+# Ascending sort keys; the seq tie-break keeps catalog order among equals.
+SORT_KEYS: dict[str, Callable[[Listing], tuple]] = {
+    "price": lambda l: (l.price, l.seq),
+    "-price": lambda l: (-l.price, l.seq),
+    "rating": lambda l: (l.rating, l.seq),
+    "-rating": lambda l: (-l.rating, l.seq),
+    "catalog": lambda l: (l.seq,),
+}
+
+
+def _norm(value: Any) -> Any:
+    return value.strip().casefold() if isinstance(value, str) else value
+
+
+@dataclass(frozen=True)
+class Page:
+    items: list[Listing]
+    total: int
+    offset: int = 0
+    limit: int | None = None
+
+    @property
+    def has_more(self) -> bool:
+        return self.offset + len(self.items) < self.total
+
+    def dicts(self) -> list[dict[str, Any]]:
+        return [listing.to_dict() for listing in self.items]
+
+
+class PriceIndex:
+    """Listings sorted by price, with the prices in a parallel array for bisect.
+
+    ``ordered`` holds the same listings in catalog order.
+    """
+
+    __slots__ = ("prices", "listings", "ordered")
+
+    def __init__(self) -> None:
+        self.prices = array("d")
+        self.listings: list[Listing] = []
+        self.ordered: list[Listing] = []
+
+    def extend(self, listings: Iterable[Listing]) -> None:
+        """Add listings newer (higher ``seq``) than any already indexed."""
+        batch = list(listings)
+        self.ordered.extend(batch)
+        key = SORT_KEYS["price"]
+        if len(batch) == 1:
+            # A single add: insert in place rather than rebuilding both arrays
+            listing = batch[0]
+            position = bisect_right(self.listings, key(listing), key=key)
+            self.listings.insert(position, listing)
+            self.prices.insert(position, listing.price)
+            return
+        batch.sort(key=key)
+        # Merge the sorted batch in instead of re-sorting the whole bucket
+        self.listings = list(merge(self.listings, batch, key=key))
+        self.prices = array("d", (listing.price for listing in self.listings))
+
+    def span(self, min_price: float | None, max_price: float | None) -> tuple[int, int]:
+        lo = 0 if min_price is None else bisect_left(self.prices, min_price)
+        hi = len(self.prices) if max_price is None else bisect_right(self.prices, max_price)
+        return lo, max(lo, hi)
+
+    def __len__(self) -> int:
+        return len(self.listings)
+
+
+class Catalog:
+    def __init__(self, listings: Iterable[Listing] = ()) -> None:
+        self._indexes: dict[tuple, PriceIndex] = {}
+        self._by_id: dict[tuple[str, str], Listing] = {}
+        self._size = 0
+        self.extend(listings)
+
+    @staticmethod
+    def _keys(listing: Listing) -> set[tuple]:
+        # A listing is reachable with or without each of its optional filters
+        return {
+            (listing.kind, city, listing_class, service_type)
+            for city, listing_class, service_type in product(
+                {_norm(listing.city), None},
+                {_norm(listing.listing_class), None},
+                {_norm(listing.service_type), None},
+            )
+        }
+
+    def extend(self, listings: Iterable[Listing]) -> None:
+        """Add listings in catalog order, re-sorting each touched bucket once."""
+        pending: dict[tuple, list[Listing]] = {}
+        for listing in listings:
+            listing.seq = self._size
+            self._size += 1
+            self._by_id[(listing.kind, listing.id)] = listing
+            for key in self._keys(listing):
+                pending.setdefault(key, []).append(listing)
+        for key, batch in pending.items():
+            self._indexes.setdefault(key, PriceIndex()).extend(batch)
+
+    def add(self, listing: Listing) -> None:
+        self.extend((listing,))
+
+    def get(self, kind: str, listing_id: str) -> Listing | None:
+        return self._by_id.get((kind, listing_id))
+
+    def query(
+        self,
+        kind: str,
+        *,
+        city: str | None = None,
+        listing_class: str | None = None,
+        service_type: str | None = None,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        where: Callable[[Listing], bool] | None = None,
+        sort: str = "price",
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> Page:
+        """Filter, sort and paginate one bucket of the catalog.
+
+        Equality filters pick the bucket and the price range is two bisects.
+        Price-sorted pages without ``where`` are sliced straight out of the
+        index; anything else only touches the listings inside the range.
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort}")
+        offset = max(0, int(offset or 0))
+
+        index = self._indexes.get((kind, _norm(city), _norm(listing_class), _norm(service_type)))
+        if index is None:
+            return Page([], 0, offset, limit)
+        lo, hi = index.span(min_price, max_price)
+
+        if where is None and sort == "price":
+            start = min(hi, lo + offset)
+            stop = hi if limit is None else min(hi, start + limit)
+            return Page(index.listings[start:stop], hi - lo, offset, limit)
+
+        if where is None and sort == "catalog":
+            stop = None if limit is None else offset + limit
+            if lo == 0 and hi == len(index):
+                return Page(index.ordered[offset:stop], hi - lo, offset, limit)
+            # The bisects already give the total; walk catalog order only to the page end
+            low = index.prices[lo] if lo < hi else 0.0
+            high = index.prices[hi - 1] if lo < hi else -1.0
+            in_range = (listing for listing in index.ordered if low <= listing.price <= high)
+            return Page(list(islice(in_range, offset, stop)), hi - lo, offset, limit)
+
+        matches = index.listings[lo:hi]
+        if where is not None:
+            matches = [listing for listing in matches if where(listing)]
+        if sort != "price":
+            matches.sort(key=SORT_KEYS[sort])
+        stop = None if limit is None else offset + limit
+        return Page(matches[offset:stop], len(matches), offset, limit)
+
+    def __len__(self) -> int:
+        return self._size
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from typing import Any
+
+
+class Listing:
+    """Compact index entry for one hotel, car or technician.
+
+    Only the fields the catalog filters and sorts on live in slots; the full
+    display payload stays in ``data`` and is shared, never copied, until a
+    caller asks for ``to_dict()``.
+    """
+
+    __slots__ = ("id", "kind", "city", "listing_class", "service_type", "price", "rating", "seq", "data")
+
+    def __init__(self, id: str, kind: str, price: float, *, city: str | None = None,
+                 listing_class: str | None = None, service_type: str | None = None,
+                 rating: float = 0.0, seq: int = 0, data: dict[str, Any] | None = None) -> None:
+        self.id = id
+        self.kind = kind
+        self.city = city
+        self.listing_class = listing_class
+        self.service_type = service_type
+        self.price = float(price or 0)
+        self.rating = float(rating or 0)
+        self.seq = seq
+        self.data = data if data is not None else {}
+
+    def to_dict(self) -> dict[str, Any]:
+        return dict(self.data)
+
+    def __repr__(self) -> str:
+        return f"Listing({self.kind}:{self.id} {self.price:.0f})"
+
+
+def hotel_listing(data: dict[str, Any], city: str | None = None) -> Listing:
+    return Listing(data.get("inventory_ref") or f"{city}:{data.get('name')}", "hotel", data.get("price", 0),
+                   city=city, rating=data.get("rating", 0), data=data)
+
+
+def car_listing(data: dict[str, Any], city: str | None = None) -> Listing:
+    return Listing(data.get("id") or data.get("model"), "car", data.get("price", 0),
+                   city=city, listing_class=data.get("cab_class"), rating=data.get("rating", 0), data=data)
+
+
+def technician_listing(data: dict[str, Any]) -> Listing:
+    return Listing(data.get("inventory_ref") or data.get("id"), "technician", data.get("price", 0),
+                   city=data.get("location"), service_type=data.get("service_type"),
+                   rating=data.get("rating", 0), data=data)
@@ -0,0 +1,20 @@
+"""
+Shared pytest fixtures.
+"""
+
+import pytest
+
+
+class FakeClock:
+    """A ``clock`` callable for time-based code; tests move ``now`` forward by hand."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
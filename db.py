@@ -1,6 +1,8 @@
 # db.py - UPDATED VERSION
 import psycopg2
 
+from schema import SchemaCapabilities
+
 def get_db_connection():
     return psycopg2.connect(
         host="localhost",
@@ -9,85 +11,65 @@ def get_db_connection():
         password="password"
     )
 
+def load_columns(tables):
+    """Column names of each of ``tables`` in the public schema, in one catalog query"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT table_name, column_name
+            FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = ANY(%s)
+        """, (list(tables),))
+        columns = {}
+        for table, column in cur.fetchall():
+            columns.setdefault(table, set()).add(column)
+        return columns
+    finally:
+        cur.close()
+        conn.close()
+
+# Optional columns, read once and refreshed after schema changes (see schema.py)
+schema = SchemaCapabilities(load_columns)
+
+# lifestyle_profiles columns every install has; latitude/longitude are optional
+PROFILE_COLUMNS = [
+    'age_group', 'profession', 'monthly_budget', 'lifestyle_type',
+    'travel_frequency', 'travel_style', 'typical_group_size', 'preferred_cab_type',
+    'dietary_pref', 'city', 'area', 'home_owner', 'interests', 'preferred_services'
+]
+COORDINATE_COLUMNS = ['latitude', 'longitude']
+
+def _profile_columns():
+    return PROFILE_COLUMNS + (COORDINATE_COLUMNS if schema.has_profile_coordinates else [])
+
 def save_user_profile_comprehensive(user_id, profile_data):
     """Save or update comprehensive user lifestyle profile to lifestyle_profiles table"""
     conn = get_db_connection()
     cur = conn.cursor()
     
     try:
+        columns = _profile_columns()
+        values = [profile_data.get(column) for column in columns]
+        
         # Check if profile exists
         cur.execute("SELECT id FROM lifestyle_profiles WHERE user_id = %s", (user_id,))
         existing = cur.fetchone()
         
         if existing:
             # Update existing profile
-            cur.execute("""
-                UPDATE lifestyle_profiles SET
-                    age_group = %s,
-                    profession = %s,
-                    monthly_budget = %s,
-                    lifestyle_type = %s,
-                    travel_frequency = %s,
-                    travel_style = %s,
-                    typical_group_size = %s,
-                    preferred_cab_type = %s,
-                    dietary_pref = %s,
-                    city = %s,
-                    area = %s,
-                    latitude = %s,
-                    longitude = %s,
-                    home_owner = %s,
-                    interests = %s,
-                    preferred_services = %s,
-                    updated_at = NOW()
+            assignments = ', '.join(f"{column} = %s" for column in columns)
+            cur.execute(f"""
+                UPDATE lifestyle_profiles SET {assignments}, updated_at = NOW()
                 WHERE user_id = %s
-            """, (
-                profile_data.get('age_group'),
-                profile_data.get('profession'),
-                profile_data.get('monthly_budget'),
-                profile_data.get('lifestyle_type'),
-                profile_data.get('travel_frequency'),
-                profile_data.get('travel_style'),
-                profile_data.get('typical_group_size'),
-                profile_data.get('preferred_cab_type'),
-                profile_data.get('dietary_pref'),
-                profile_data.get('city'),
-                profile_data.get('area'),
-                profile_data.get('latitude'),
-                profile_data.get('longitude'),
-                profile_data.get('home_owner'),
-                profile_data.get('interests'),
-                profile_data.get('preferred_services'),
-                user_id
-            ))
+            """, values + [user_id])
         else:
             # Insert new profile
-            cur.execute("""
-                INSERT INTO lifestyle_profiles (
-                    user_id, age_group, profession, monthly_budget, lifestyle_type,
-                    travel_frequency, travel_style, typical_group_size, preferred_cab_type,
-                    dietary_pref, city, area, latitude, longitude, home_owner,
-                    interests, preferred_services
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                user_id,
-                profile_data.get('age_group'),
-                profile_data.get('profession'),
-                profile_data.get('monthly_budget'),
-                profile_data.get('lifestyle_type'),
-                profile_data.get('travel_frequency'),
-                profile_data.get('travel_style'),
-                profile_data.get('typical_group_size'),
-                profile_data.get('preferred_cab_type'),
-                profile_data.get('dietary_pref'),
-                profile_data.get('city'),
-                profile_data.get('area'),
-                profile_data.get('latitude'),
-                profile_data.get('longitude'),
-                profile_data.get('home_owner'),
-                profile_data.get('interests'),
-                profile_data.get('preferred_services')
-            ))
+            placeholders = ', '.join(['%s'] * (len(columns) + 1))
+            cur.execute(f"""
+                INSERT INTO lifestyle_profiles (user_id, {', '.join(columns)})
+                VALUES ({placeholders})
+            """, [user_id] + values)
         
         conn.commit()
         return True
@@ -100,18 +82,14 @@ def save_user_profile_comprehensive(user_id, profile_data):
         conn.close()
 
 def get_user_profile(user_id):
-    """Get comprehensive user lifestyle profile - UPDATED to remove latitude/longitude"""
+    """Get comprehensive user lifestyle profile (latitude/longitude when the table has them)"""
     conn = get_db_connection()
     cur = conn.cursor()
     
     try:
-        # REMOVED latitude and longitude from the SELECT query
-        cur.execute("""
-            SELECT 
-                age_group, profession, monthly_budget, lifestyle_type,
-                travel_frequency, travel_style, typical_group_size, preferred_cab_type,
-                dietary_pref, city, area, home_owner,
-                interests, preferred_services, created_at, updated_at
+        columns = _profile_columns() + ['created_at', 'updated_at']
+        cur.execute(f"""
+            SELECT {', '.join(columns)}
             FROM lifestyle_profiles 
             WHERE user_id = %s
         """, (user_id,))
@@ -119,25 +97,7 @@ def get_user_profile(user_id):
         profile_data = cur.fetchone()
         
         if profile_data:
-            return {
-                'age_group': profile_data[0],
-                'profession': profile_data[1],
-                'monthly_budget': profile_data[2],
-                'lifestyle_type': profile_data[3],
-                'travel_frequency': profile_data[4],
-                'travel_style': profile_data[5],
-                'typical_group_size': profile_data[6],
-                'preferred_cab_type': profile_data[7],
-                'dietary_pref': profile_data[8],
-                'city': profile_data[9],
-                'area': profile_data[10],
-                # Note: latitude and longitude are removed since they don't exist in the table
-                'home_owner': profile_data[11],
-                'interests': profile_data[12],
-                'preferred_services': profile_data[13],
-                'created_at': profile_data[14],
-                'updated_at': profile_data[15]
-            }
+            return dict(zip(columns, profile_data))
         return None
         
     except Exception as e:
@@ -145,4 +105,4 @@ def get_user_profile(user_id):
         return None
     finally:
         cur.close()
-        conn.close()
\ No newline at end of file
+        conn.close()
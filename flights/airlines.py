@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+AIRLINES: tuple[dict[str, str], ...] = (
+    {"name": "IndiGo", "code": "6E", "hub": "DEL"},
+    {"name": "Air India", "code": "AI", "hub": "DEL"},
+    {"name": "Vistara", "code": "UK", "hub": "DEL"},
+    {"name": "SpiceJet", "code": "SG", "hub": "DEL"},
+    {"name": "Air India Express", "code": "IX", "hub": "CCJ"},
+    {"name": "Akasa Air", "code": "QP", "hub": "BOM"},
+    {"name": "Alliance Air", "code": "9I", "hub": "DEL"},
+    {"name": "Star Air", "code": "S5", "hub": "BLR"},
+)
+
+# Major + Tier 2 airports
+AIRPORT_CODES: dict[str, str] = {
+    "Mumbai": "BOM", "Delhi": "DEL", "Bangalore": "BLR", "Chennai": "MAA",
+    "Hyderabad": "HYD", "Kolkata": "CCU", "Pune": "PNQ", "Goa": "GOI",
+    "Jaipur": "JAI", "Ahmedabad": "AMD", "Lucknow": "LKO", "Cochin": "COK",
+    "Patna": "PAT", "Indore": "IDR", "Chandigarh": "IXC", "Nagpur": "NAG",
+    "Bhubaneswar": "BBI", "Coimbatore": "CJB", "Thiruvananthapuram": "TRV",
+    "Visakhapatnam": "VTZ", "Surat": "STV", "Varanasi": "VNS", "Guwahati": "GAU",
+    "Amritsar": "ATQ", "Ranchi": "IXR", "Raipur": "RPR", "Bhopal": "BHO",
+}
+
+# Fare multipliers over the economy fare, roughly the old per-class price bands
+CLASS_FARE_MULTIPLIER: dict[str, float] = {
+    "economy": 1.0,
+    "premium_economy": 1.6,
+    "business": 4.0,
+    "first": 7.5,
+}
+
+BAGGAGE_ALLOWANCE: dict[str, str] = {
+    "economy": "15kg (1 Pc)",
+    "premium_economy": "25kg (2 Pcs)",
+    "business": "35kg (2 Pcs)",
+    "first": "40kg (3 Pcs)",
+}
+
+
+def airport_code(city: str) -> str:
+    # Dynamic code generation for unknown cities
+    return AIRPORT_CODES.get(city, city[:3].upper())
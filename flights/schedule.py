@@ -0,0 +1,130 @@
+"""Daily flight schedules per city pair.
+
+A route's timetable is the same every day, so it is built once from the
+city-pair distance matrix and stored column-wise in small arrays. Sort orders
+are precomputed per route; searches only walk those arrays and never re-sort.
+"""
+from __future__ import annotations
+
+import hashlib
+import random
+from array import array
+from typing import Any
+
+from flights.airlines import AIRLINES, airport_code
+from geo.distance import haversine_km
+from geo.matrix import flight_minutes, get_matrix
+
+LAYOVER_MINS = 120
+# Used when either city has no coordinates
+DEFAULT_ROUTE_KM = 1000.0
+MINUTES_PER_DAY = 24 * 60
+
+# (first departure minute, last departure minute, weight) per time-of-day slot
+_DEPARTURE_SLOTS = (
+    (5 * 60, 11 * 60 + 55, 2),   # morning
+    (12 * 60, 16 * 60 + 55, 1),  # afternoon
+    (17 * 60, 21 * 60 + 55, 1),  # evening
+    (22 * 60, 23 * 60 + 55, 1),  # night
+)
+
+
+def _route_seed(origin: str, destination: str) -> int:
+    key = f"{origin}|{destination}".encode("utf-8")
+    return int.from_bytes(hashlib.sha256(key).digest()[:8], "big")
+
+
+class RouteSchedule:
+    """Column-oriented daily timetable for one origin/destination pair."""
+
+    __slots__ = (
+        "origin", "destination", "origin_code", "destination_code", "distance_km",
+        "departure", "duration", "stops", "airline", "fare", "refundable", "meal",
+        "flight_no", "deal", "orders", "_by_flight_no",
+    )
+
+    def __init__(self, origin: str, destination: str, distance_km: float) -> None:
+        self.origin = origin
+        self.destination = destination
+        self.origin_code = airport_code(origin)
+        self.destination_code = airport_code(destination)
+        self.distance_km = distance_km
+        self.departure = array("H")   # minutes after midnight
+        self.duration = array("H")    # minutes, layovers included
+        self.stops = array("B")
+        self.airline = array("B")     # index into AIRLINES
+        self.fare = array("I")        # economy fare; other classes scale it
+        self.refundable = array("B")
+        self.meal = array("B")        # meal offered in economy
+        self.flight_no: list[str] = []
+        self.deal: list[str] = []
+        self.orders: dict[str, array] = {}
+        self._by_flight_no: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.flight_no)
+
+    def arrival(self, i: int) -> int:
+        return (self.departure[i] + self.duration[i]) % MINUTES_PER_DAY
+
+    def index_of(self, flight_no: str) -> int | None:
+        return self._by_flight_no.get(flight_no)
+
+    def _finish(self) -> None:
+        n = len(self)
+        self._by_flight_no = {no: i for i, no in enumerate(self.flight_no)}
+        sort_keys = {
+            "price": lambda i: (self.fare[i], self.departure[i]),
+            "departure": lambda i: (self.departure[i], self.fare[i]),
+            "arrival": lambda i: (self.arrival(i), self.fare[i]),
+            "duration": lambda i: (self.duration[i], self.fare[i]),
+        }
+        self.orders = {name: array("H", sorted(range(n), key=key)) for name, key in sort_keys.items()}
+
+        self.deal = [""] * n
+        if n:
+            best_value = min(range(n), key=lambda i: self.fare[i] * self.duration[i])
+            self.deal[best_value] = "Best Value"
+            self.deal[self.orders["duration"][0]] = "Fastest"
+            self.deal[self.orders["price"][0]] = "Cheapest"
+
+
+def build_route(origin: str, destination: str, coordinates: dict[str, dict[str, Any]]) -> RouteSchedule:
+    distance_km = get_matrix().distance_km(origin, destination)
+    if distance_km is None:
+        a, b = coordinates.get(origin), coordinates.get(destination)
+        distance_km = haversine_km(a["lat"], a["lng"], b["lat"], b["lng"]) if a and b else DEFAULT_ROUTE_KM
+
+    route = RouteSchedule(origin, destination, round(distance_km, 1))
+    rng = random.Random(_route_seed(origin, destination))
+    nonstop = flight_minutes(distance_km)
+    # Economy fare grows with distance, like the old 3000-6000 band on trunk routes
+    base_fare = 2500 + distance_km * 2.2
+
+    count = rng.randint(12, 18)
+    numbers = rng.sample(range(100, 1000), count)
+    slots = rng.choices(_DEPARTURE_SLOTS, weights=[w for _, _, w in _DEPARTURE_SLOTS], k=count)
+    for number, (first, last, _) in zip(numbers, slots):
+        airline = rng.randrange(len(AIRLINES))
+        departure = rng.randrange(first, last + 1, 5)
+        stops = rng.choices((0, 1, 2), weights=(70, 25, 5))[0]
+        duration = nonstop + rng.randint(-3, 3) * 5 + stops * LAYOVER_MINS
+
+        fare = base_fare * rng.uniform(0.85, 1.2)
+        # Cheaper with stops, dearer in the morning and evening peaks
+        if stops:
+            fare *= 0.85
+        if 8 * 60 <= departure < 11 * 60 or 17 * 60 <= departure < 20 * 60:
+            fare *= 1.10
+
+        route.departure.append(departure)
+        route.duration.append(duration)
+        route.stops.append(stops)
+        route.airline.append(airline)
+        route.fare.append(int(fare))
+        route.refundable.append(rng.random() < 0.5)
+        route.meal.append(rng.random() < 0.5)
+        route.flight_no.append(f"{AIRLINES[airline]['code']}{number}")
+
+    route._finish()
+    return route
@@ -0,0 +1,195 @@
+"""Flight search over precomputed route schedules.
+
+``FlightSearch`` holds one ``RouteSchedule`` per city pair, built up front for
+every known city and lazily for anything else. A query walks the route's
+precomputed sort order, applies the filters on the column arrays, and slices
+one page; the rendered page is cached under the full search parameters.
+"""
+from __future__ import annotations
+
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import permutations
+from typing import Any, Iterable
+
+from flights.airlines import AIRLINES, BAGGAGE_ALLOWANCE, CLASS_FARE_MULTIPLIER
+from flights.schedule import RouteSchedule, build_route
+
+REF_SEPARATOR = "|"
+SORT_KEYS = ("price", "departure", "arrival", "duration")
+
+# Named departure windows in minutes after midnight; night wraps past midnight
+DEPARTURE_WINDOWS: dict[str, tuple[int, int]] = {
+    "morning": (5 * 60, 12 * 60),
+    "afternoon": (12 * 60, 17 * 60),
+    "evening": (17 * 60, 22 * 60),
+    "night": (22 * 60, 5 * 60),
+}
+
+
+def _in_window(minute: int, window: tuple[int, int]) -> bool:
+    start, end = window
+    if start <= end:
+        return start <= minute < end
+    return minute >= start or minute < end
+
+
+def _hhmm(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+@dataclass(frozen=True)
+class FlightQuery:
+    origin: str
+    destination: str
+    date: str
+    travel_class: str = "economy"
+    max_stops: int | None = None
+    departure_window: str | None = None
+    airlines: frozenset[str] = frozenset()
+    refundable: bool | None = None
+    sort: str = "price"
+    offset: int = 0
+    limit: int | None = None
+
+
+@dataclass(frozen=True)
+class FlightPage:
+    flights: tuple[dict[str, Any], ...]
+    total: int
+    offset: int = 0
+    limit: int | None = None
+
+    @property
+    def has_more(self) -> bool:
+        return self.offset + len(self.flights) < self.total
+
+
+class FlightSearch:
+    def __init__(self, coordinates: dict[str, dict[str, Any]], cache_size: int = 2048) -> None:
+        self.coordinates = coordinates
+        self.cache_size = cache_size
+        self._routes: dict[tuple[str, str], RouteSchedule] = {}
+        # Routes involving cities without coordinates come from free-text input
+        self._adhoc_routes: OrderedDict[tuple[str, str], RouteSchedule] = OrderedDict()
+        self._results: OrderedDict[FlightQuery, FlightPage] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def precompute(self, cities: Iterable[str] | None = None) -> int:
+        """Build schedules for every ordered pair of the given (or all known) cities."""
+        for origin, destination in permutations(list(cities or self.coordinates), 2):
+            self.route(origin, destination)
+        return len(self._routes)
+
+    def route(self, origin: str, destination: str) -> RouteSchedule:
+        key = (origin, destination)
+        route = self._routes.get(key)
+        if route is not None:
+            return route
+        if origin in self.coordinates and destination in self.coordinates:
+            return self._routes.setdefault(key, build_route(origin, destination, self.coordinates))
+
+        with self._lock:
+            route = self._adhoc_routes.get(key)
+            if route is not None:
+                self._adhoc_routes.move_to_end(key)
+                return route
+        route = build_route(origin, destination, self.coordinates)
+        with self._lock:
+            self._adhoc_routes[key] = route
+            while len(self._adhoc_routes) > self.cache_size:
+                self._adhoc_routes.popitem(last=False)
+        return route
+
+    def search(self, query: FlightQuery) -> FlightPage:
+        """One page of results. Pages are cached and shared, so treat them as read-only."""
+        if query.sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {query.sort}")
+        with self._lock:
+            page = self._results.get(query)
+            if page is not None:
+                self._results.move_to_end(query)
+                return page
+
+        page = self._run(query)
+        with self._lock:
+            self._results[query] = page
+            while len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+        return page
+
+    def _run(self, query: FlightQuery) -> FlightPage:
+        route = self.route(query.origin, query.destination)
+        window = DEPARTURE_WINDOWS.get(query.departure_window or "")
+        airlines = {i for i, airline in enumerate(AIRLINES) if airline["name"] in query.airlines}
+
+        matches = []
+        for i in route.orders[query.sort]:
+            if query.max_stops is not None and route.stops[i] > query.max_stops:
+                continue
+            if window and not _in_window(route.departure[i], window):
+                continue
+            if airlines and route.airline[i] not in airlines:
+                continue
+            if query.refundable is not None and bool(route.refundable[i]) != query.refundable:
+                continue
+            matches.append(i)
+
+        stop = None if query.limit is None else query.offset + query.limit
+        flights = tuple(self._flight(route, i, query.date, query.travel_class)
+                        for i in matches[query.offset:stop])
+        return FlightPage(flights, len(matches), query.offset, query.limit)
+
+    def _flight(self, route: RouteSchedule, i: int, date: str, travel_class: str) -> dict[str, Any]:
+        airline = AIRLINES[route.airline[i]]
+        flight_no = route.flight_no[i]
+        price = route.fare[i] * CLASS_FARE_MULTIPLIER.get(travel_class, 1.0)
+        duration = route.duration[i]
+        origin = self.coordinates.get(route.origin, {})
+        destination = self.coordinates.get(route.destination, {})
+        return {
+            'airline': airline['name'],
+            'departure_time': _hhmm(route.departure[i]),
+            'arrival_time': _hhmm(route.arrival(i)),
+            'origin': route.origin,
+            'destination': route.destination,
+            'origin_code': route.origin_code,
+            'destination_code': route.destination_code,
+            'flight_no': flight_no,
+            'flight_name': f"{airline['name']} {flight_no}",
+            'duration': f'{duration // 60}h {duration % 60:02d}m',
+            'travel_class': travel_class,
+            # Seat availability is the only part that changes day to day
+            'seats_available': 2 + zlib.crc32(f"{flight_no}|{date}|{travel_class}".encode()) % 24,
+            'price': int(price / 100) * 100 + 99,  # Make it look like 4999
+            'status': 'On Time',
+            'baggage_allowance': BAGGAGE_ALLOWANCE.get(travel_class, "15kg"),
+            'meal_included': travel_class != 'economy' or bool(route.meal[i]),
+            'wifi_available': travel_class != 'economy',
+            'stops': route.stops[i],
+            'refundable': bool(route.refundable[i]),
+            'deal': route.deal[i],
+            'lat_origin': origin.get('lat', 20.59),  # Pass coords for map
+            'lng_origin': origin.get('lng', 78.96),
+            'lat_dest': destination.get('lat', 28.61),
+            'lng_dest': destination.get('lng', 77.20),
+            'inventory_ref': REF_SEPARATOR.join((route.origin, route.destination, date, travel_class, flight_no)),
+        }
+
+    def lookup(self, ref: str | None) -> dict[str, Any] | None:
+        """The flight a search handed out as ``inventory_ref``, or None."""
+        if not ref or not isinstance(ref, str):
+            return None
+        parts = ref.split(REF_SEPARATOR)
+        if len(parts) != 5:
+            return None
+        origin, destination, date, travel_class, flight_no = parts
+        route = self.route(origin, destination)
+        i = route.index_of(flight_no)
+        return None if i is None else self._flight(route, i, date, travel_class)
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._results.clear()
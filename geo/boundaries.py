@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+# City boundary boxes - ACCURATE land boundaries to prevent services on water/forest
+# Format: (min_lat, max_lat, min_lng, max_lng) - strict land-only boundaries
+CITY_BOUNDARIES: dict[str, tuple[float, float, float, float]] = {
+    # Mumbai - Avoid Arabian Sea (west), avoid Thane Creek (east)
+    "Mumbai": (18.90, 19.27, 72.82, 72.96),
+
+    # Pune - Avoid hills and forest areas
+    "Pune": (18.42, 18.63, 73.75, 73.95),
+
+    # Nashik - City center, avoid Sahyadri hills
+    "Nashik": (19.95, 20.05, 73.75, 73.85),
+
+    # Delhi - NCR boundaries
+    "Delhi": (28.50, 28.75, 77.05, 77.30),
+
+    # Bangalore - City limits, avoid outskirts
+    "Bangalore": (12.90, 13.10, 77.50, 77.70),
+}
+
+
+def is_on_land(lat: float, lng: float, city_name: str) -> bool:
+    """Validates if coordinates are on habitable land.
+
+    Returns False for water bodies, forests, restricted areas. This is the
+    source definition the land-mask rasters are built from; request handlers
+    should query ``geo.landmask`` instead of calling it directly.
+    """
+    if city_name == "Mumbai":
+        # Mumbai's unique geography - peninsula with Arabian Sea on west
+        # South Mumbai (lat < 18.95): Very narrow, avoid west coast
+        if lat < 18.95:
+            # South Mumbai: Only lng > 72.825 (Nariman Point eastward)
+            return lng > 72.825
+
+        # Central Mumbai (18.95 - 19.05): Wider
+        elif lat < 19.05:
+            return 72.82 <= lng <= 72.89
+
+        # North Mumbai/Suburbs (19.05 - 19.20): Widest part
+        elif lat < 19.20:
+            return 72.82 <= lng <= 72.95
+
+        # Far North (>19.20): Narrower again
+        else:
+            return 72.84 <= lng <= 72.92
+
+    elif city_name == "Pune":
+        # Pune: Avoid Western Ghats hills
+        # Hills mostly to the west and north
+        if lat > 18.58:  # North Pune
+            return lng > 73.80  # Avoid Lonavala direction
+        return True
+
+    elif city_name == "Delhi":
+        # Delhi: Yamuna River on east, avoid it
+        if lng > 77.28:  # East of Yamuna
+            return False
+        return True
+
+    elif city_name == "Bangalore":
+        # Bangalore: Generally landlocked, safe
+        return True
+
+    # Unknown cities: Be conservative
+    return True
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from functools import lru_cache
+
+# Central coordinates for mapping
+CITY_COORDINATES: dict[str, dict[str, float]] = {
+    "Mumbai": {"lat": 19.0760, "lng": 72.8777},
+    "Pune": {"lat": 18.5204, "lng": 73.8567},
+    "Nashik": {"lat": 19.9975, "lng": 73.7898},
+    "Delhi": {"lat": 28.6139, "lng": 77.2090},
+    "Bangalore": {"lat": 12.9716, "lng": 77.5946},
+    "Hyderabad": {"lat": 17.3850, "lng": 78.4867},
+    "Chennai": {"lat": 13.0827, "lng": 80.2707},
+    "Kolkata": {"lat": 22.5726, "lng": 88.3639},
+    "Jaipur": {"lat": 26.9124, "lng": 75.7873},
+    "Goa": {"lat": 15.2993, "lng": 74.1240},
+    "Ahmedabad": {"lat": 23.0225, "lng": 72.5714},
+    "Chandigarh": {"lat": 30.7333, "lng": 76.7794},
+    "Lucknow": {"lat": 26.8467, "lng": 80.9462},
+    "Indore": {"lat": 22.7196, "lng": 75.8577},
+    "Kerala": {"lat": 10.8505, "lng": 76.2711}
+}
+
+# Old names, alternate spellings and nearby spots people type for a known city
+CITY_ALIASES: dict[str, str] = {
+    "bombay": "Mumbai",
+    "navi mumbai": "Mumbai",
+    "new delhi": "Delhi",
+    "ncr": "Delhi",
+    "bengaluru": "Bangalore",
+    "calcutta": "Kolkata",
+    "madras": "Chennai",
+    "poona": "Pune",
+    "panaji": "Goa",
+    "panjim": "Goa",
+    "kochi": "Kerala",
+    "cochin": "Kerala",
+    "trivandrum": "Kerala",
+    "thiruvananthapuram": "Kerala",
+}
+
+_NAMES: dict[str, str] = {name.casefold(): name for name in CITY_COORDINATES} | CITY_ALIASES
+_MAX_NAME_WORDS = max(len(name.split()) for name in _NAMES)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.replace(".", " ").split()).casefold()
+
+
+@lru_cache(maxsize=4096)
+def resolve_city(text: str | None, partial: bool = False) -> str | None:
+    """Canonical ``CITY_COORDINATES`` key for free-text input, or None.
+
+    Handles case, stray whitespace, aliases and "City, State" strings by
+    trying each comma-separated part in order. With ``partial`` a known name
+    anywhere in the text also matches ("Andheri East Mumbai"), longest first.
+    """
+    if not text:
+        return None
+    parts = [_normalize(part) for part in str(text).split(",")]
+    for part in parts:
+        if part in _NAMES:
+            return _NAMES[part]
+    if partial:
+        for part in parts:
+            words = part.split()
+            for size in range(min(_MAX_NAME_WORDS, len(words)), 0, -1):
+                for i in range(len(words) - size + 1):
+                    city = _NAMES.get(" ".join(words[i:i + size]))
+                    if city:
+                        return city
+    return None
@@ -0,0 +1,282 @@
+"""Per-city land/water rasters for placing map markers.
+
+Each city in ``geo.boundaries.CITY_BOUNDARIES`` is rasterised offline into a
+~100m grid stored as a packed bit array (1 = land). At startup the files are
+memory-mapped, so point checks are a single bit lookup and placing a marker
+inside a radius is one weighted draw over the land cells in that disc.
+
+Build the rasters with::
+
+    python -m geo.landmask
+"""
+from __future__ import annotations
+
+import logging
+import math
+import mmap
+import random
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from pathlib import Path
+from typing import Iterable
+
+from geo.boundaries import CITY_BOUNDARIES, is_on_land
+from geo.distance import haversine_km
+
+logger = logging.getLogger(__name__)
+
+CELL_SIZE_KM = 0.1
+KM_PER_DEG_LAT = 111.0
+DATA_DIR = Path(__file__).resolve().parent / "data" / "landmask"
+
+# magic, format version, rows, cols, min_lat, min_lng, cell_lat_deg, cell_lng_deg
+_HEADER = struct.Struct("<4sHHHdddd")
+_MAGIC = b"LMSK"
+_VERSION = 1
+
+
+class LandMask:
+    """Read-only view over a packed land bitmap."""
+
+    def __init__(self, city: str, buf, rows: int, cols: int,
+                 min_lat: float, min_lng: float, cell_lat: float, cell_lng: float) -> None:
+        self.city = city
+        self._buf = buf
+        self.rows = rows
+        self.cols = cols
+        self.min_lat = min_lat
+        self.min_lng = min_lng
+        self.cell_lat = cell_lat
+        self.cell_lng = cell_lng
+        self._stride = (cols + 7) // 8
+        self._row_cols: list[array] | None = None
+
+    # ---------------------- point queries ----------------------
+    def _cell(self, lat: float, lng: float) -> tuple[int, int] | None:
+        r = math.floor((lat - self.min_lat) / self.cell_lat)
+        c = math.floor((lng - self.min_lng) / self.cell_lng)
+        if 0 <= r < self.rows and 0 <= c < self.cols:
+            return r, c
+        return None
+
+    def _bit(self, r: int, c: int) -> bool:
+        byte = self._buf[_HEADER.size + r * self._stride + (c >> 3)]
+        return bool((byte >> (c & 7)) & 1)
+
+    def is_land(self, lat: float, lng: float) -> bool:
+        cell = self._cell(lat, lng)
+        return cell is not None and self._bit(*cell)
+
+    def cell_center(self, r: int, c: int) -> tuple[float, float]:
+        return (self.min_lat + (r + 0.5) * self.cell_lat,
+                self.min_lng + (c + 0.5) * self.cell_lng)
+
+    # ---------------------- sampling ----------------------
+    def _land_columns(self) -> list[array]:
+        """Sorted land column indices per row, decoded once on first use."""
+        if self._row_cols is None:
+            row_cols = []
+            for r in range(self.rows):
+                base = _HEADER.size + r * self._stride
+                cols = array("H")
+                for byte_idx in range(self._stride):
+                    byte = self._buf[base + byte_idx]
+                    while byte:
+                        low = byte & -byte
+                        c = (byte_idx << 3) + low.bit_length() - 1
+                        if c < self.cols:
+                            cols.append(c)
+                        byte ^= low
+                row_cols.append(cols)
+            self._row_cols = row_cols
+        return self._row_cols
+
+    def disc(self, center_lat: float, center_lng: float, radius_km: float) -> "DiscSampler":
+        """Land cells whose centers fall within ``radius_km`` of the center."""
+        row_cols = self._land_columns()
+        km_per_deg_lng = KM_PER_DEG_LAT * math.cos(math.radians(center_lat))
+
+        r_lo = max(0, math.floor((center_lat - radius_km / KM_PER_DEG_LAT - self.min_lat) / self.cell_lat))
+        r_hi = min(self.rows - 1, math.floor((center_lat + radius_km / KM_PER_DEG_LAT - self.min_lat) / self.cell_lat))
+
+        spans: list[tuple[int, int, int]] = []  # (row, start index, count)
+        for r in range(r_lo, r_hi + 1):
+            cols = row_cols[r]
+            if not cols:
+                continue
+            row_lat = self.min_lat + (r + 0.5) * self.cell_lat
+            dy = (row_lat - center_lat) * KM_PER_DEG_LAT
+            if abs(dy) > radius_km:
+                continue
+            half_lng = math.sqrt(radius_km * radius_km - dy * dy) / km_per_deg_lng
+            c0 = math.ceil((center_lng - half_lng - self.min_lng) / self.cell_lng - 0.5)
+            c1 = math.floor((center_lng + half_lng - self.min_lng) / self.cell_lng - 0.5)
+            if c1 < c0:
+                continue
+            lo = bisect_left(cols, c0)
+            hi = bisect_right(cols, c1)
+            if hi > lo:
+                spans.append((r, lo, hi - lo))
+
+        return DiscSampler(self, center_lat, center_lng, spans)
+
+
+class DiscSampler:
+    """Uniform draws over the land cells of one disc; each draw is O(log n)."""
+
+    def __init__(self, mask: LandMask, center_lat: float, center_lng: float,
+                 spans: list[tuple[int, int, int]]) -> None:
+        self.mask = mask
+        self.center_lat = center_lat
+        self.center_lng = center_lng
+        self._spans = spans
+        self._cumulative = list(accumulate(count for _, _, count in spans))
+
+    @property
+    def size(self) -> int:
+        return self._cumulative[-1] if self._cumulative else 0
+
+    def draw(self, rng: random.Random) -> tuple[float, float, float] | None:
+        if not self._cumulative:
+            return None
+        k = rng.randrange(self._cumulative[-1])
+        i = bisect_right(self._cumulative, k)
+        r, lo, _ = self._spans[i]
+        before = self._cumulative[i - 1] if i else 0
+        c = self.mask._land_columns()[r][lo + k - before]
+
+        # Jitter inside the cell so markers don't snap to a visible grid
+        lat = self.mask.min_lat + (r + rng.random()) * self.mask.cell_lat
+        lng = self.mask.min_lng + (c + rng.random()) * self.mask.cell_lng
+        dist = haversine_km(self.center_lat, self.center_lng, lat, lng)
+        return lat, lng, round(dist, 1)
+
+
+class NearbySampler:
+    """Places map markers around a center, on land when the city has a mask."""
+
+    def __init__(self, mask: LandMask | None, center_lat: float, center_lng: float, radius_km: float) -> None:
+        self.mask = mask
+        self.center_lat = center_lat
+        self.center_lng = center_lng
+        self.radius_km = radius_km
+        self._disc = mask.disc(center_lat, center_lng, radius_km) if mask else None
+
+    def draw(self, rng: random.Random = random) -> tuple[float, float, float]:
+        if self._disc is None:
+            return _uniform_disc_point(self.center_lat, self.center_lng, self.radius_km, rng)
+
+        point = self._disc.draw(rng)
+        if point is not None:
+            return point
+
+        # No land inside the radius (center is off the mapped area): place it
+        # on land near the middle of the city boundary instead.
+        mask = self.mask
+        mid_lat = mask.min_lat + mask.rows * mask.cell_lat / 2
+        mid_lng = mask.min_lng + mask.cols * mask.cell_lng / 2
+        fallback = mask.disc(mid_lat, mid_lng, 3.0).draw(rng)
+        if fallback is not None:
+            lat, lng, _ = fallback
+            dist = haversine_km(self.center_lat, self.center_lng, lat, lng)
+            return lat, lng, round(min(dist, self.radius_km), 1)
+
+        # Ultimate fallback: Use center location
+        return self.center_lat, self.center_lng, 0.5
+
+
+def _uniform_disc_point(center_lat: float, center_lng: float, radius_km: float,
+                        rng: random.Random) -> tuple[float, float, float]:
+    angle = rng.uniform(0, 2 * math.pi)
+    # sqrt for uniform circular distribution
+    distance = math.sqrt(rng.random()) * radius_km
+    lat = center_lat + (distance / KM_PER_DEG_LAT) * math.cos(angle)
+    lng = center_lng + (distance / (KM_PER_DEG_LAT * math.cos(math.radians(center_lat)))) * math.sin(angle)
+    return lat, lng, round(haversine_km(center_lat, center_lng, lat, lng), 1)
+
+
+# ---------------------- build / load ----------------------
+def build_mask_bytes(city: str) -> bytes:
+    """Rasterise a city's boundary box and land rules into the on-disk format."""
+    min_lat, max_lat, min_lng, max_lng = CITY_BOUNDARIES[city]
+    mid_lat = (min_lat + max_lat) / 2
+    km_per_deg_lng = KM_PER_DEG_LAT * math.cos(math.radians(mid_lat))
+
+    rows = max(1, math.ceil((max_lat - min_lat) * KM_PER_DEG_LAT / CELL_SIZE_KM))
+    cols = max(1, math.ceil((max_lng - min_lng) * km_per_deg_lng / CELL_SIZE_KM))
+    cell_lat = (max_lat - min_lat) / rows
+    cell_lng = (max_lng - min_lng) / cols
+    stride = (cols + 7) // 8
+
+    bits = bytearray(rows * stride)
+    for r in range(rows):
+        lat = min_lat + (r + 0.5) * cell_lat
+        for c in range(cols):
+            lng = min_lng + (c + 0.5) * cell_lng
+            if is_on_land(lat, lng, city):
+                bits[r * stride + (c >> 3)] |= 1 << (c & 7)
+
+    header = _HEADER.pack(_MAGIC, _VERSION, rows, cols, min_lat, min_lng, cell_lat, cell_lng)
+    return header + bytes(bits)
+
+
+def _mask_path(city: str, data_dir: Path) -> Path:
+    return data_dir / f"{city.lower()}.bin"
+
+
+def _from_buffer(city: str, buf) -> LandMask:
+    magic, version, rows, cols, min_lat, min_lng, cell_lat, cell_lng = _HEADER.unpack_from(buf, 0)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError(f"Unsupported land mask format for {city}")
+    return LandMask(city, buf, rows, cols, min_lat, min_lng, cell_lat, cell_lng)
+
+
+def write_masks(cities: Iterable[str] | None = None, data_dir: Path = DATA_DIR) -> list[Path]:
+    data_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    for city in cities or CITY_BOUNDARIES:
+        path = _mask_path(city, data_dir)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(build_mask_bytes(city))
+        tmp.replace(path)
+        written.append(path)
+    return written
+
+
+_masks: dict[str, LandMask] = {}
+
+
+def load_masks(data_dir: Path = DATA_DIR) -> dict[str, LandMask]:
+    """Memory-map every city raster. Missing files are built in memory."""
+    for city in CITY_BOUNDARIES:
+        if city in _masks:
+            continue
+        path = _mask_path(city, data_dir)
+        try:
+            with open(path, "rb") as f:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            logger.warning(f"Land mask for {city} not found at {path}; building in memory")
+            buf = build_mask_bytes(city)
+        _masks[city] = _from_buffer(city, buf)
+    return _masks
+
+
+def get_mask(city: str) -> LandMask | None:
+    if city not in CITY_BOUNDARIES:
+        return None
+    if city not in _masks:
+        load_masks()
+    return _masks.get(city)
+
+
+def nearby_sampler(city: str, center_lat: float, center_lng: float, radius_km: float) -> NearbySampler:
+    return NearbySampler(get_mask(city), center_lat, center_lng, radius_km)
+
+
+if __name__ == "__main__":
+    for written_path in write_masks(sys.argv[1:] or None):
+        print(f"wrote {written_path} ({written_path.stat().st_size} bytes)")
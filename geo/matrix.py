@@ -0,0 +1,164 @@
+"""Precomputed city-pair distance and travel-time matrix.
+
+Every ordered pair of ``geo.cities.CITY_COORDINATES`` gets its great-circle
+distance, a driving-time estimate and a flight block-time estimate, stored as
+three float32 N×N tables. The file is memory-mapped at startup, so booking
+paths read a distance or ETA with one dict lookup and one array index.
+
+Rebuild after editing the city table with::
+
+    python -m geo.matrix
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import mmap
+import struct
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from geo.cities import CITY_COORDINATES, resolve_city
+from geo.distance import haversine_km
+
+logger = logging.getLogger(__name__)
+
+DATA_PATH = Path(__file__).resolve().parent / "data" / "city_matrix.bin"
+
+# Roads wind; straight-line distance undercounts the drive
+DRIVE_DETOUR_FACTOR = 1.3
+DRIVE_KMH = 55
+CRUISE_KMH = 780
+TAXI_AND_CLIMB_MINS = 35
+
+# magic, format version, city count, names block length, coordinates digest
+_HEADER = struct.Struct("<4sHHI8s")
+_MAGIC = b"CMTX"
+_VERSION = 1
+_TABLES = ("distance_km", "drive_minutes", "flight_minutes")
+
+
+def drive_minutes(distance_km: float) -> int:
+    return int(round(distance_km * DRIVE_DETOUR_FACTOR / DRIVE_KMH * 60))
+
+
+def flight_minutes(distance_km: float) -> int:
+    """Scheduled gate-to-gate time for a non-stop flight, rounded to 5 minutes."""
+    minutes = TAXI_AND_CLIMB_MINS + distance_km / CRUISE_KMH * 60
+    return max(45, int(round(minutes / 5) * 5))
+
+
+def _digest(coordinates: dict[str, dict[str, Any]]) -> bytes:
+    return hashlib.sha256(json.dumps(coordinates, sort_keys=True).encode("utf-8")).digest()[:8]
+
+
+@dataclass(frozen=True)
+class Trip:
+    distance_km: float
+    drive_minutes: int
+    flight_minutes: int
+
+
+class CityMatrix:
+    """Read-only view over the three N×N tables."""
+
+    def __init__(self, cities: list[str], buf, offset: int) -> None:
+        self.cities = cities
+        self._index = {city: i for i, city in enumerate(cities)}
+        n = len(cities)
+        view = memoryview(buf)
+        self._tables = [
+            view[offset + t * 4 * n * n: offset + (t + 1) * 4 * n * n].cast("f")
+            for t in range(len(_TABLES))
+        ]
+        self._n = n
+
+    def _cell(self, origin: str, destination: str) -> int | None:
+        i = self._index.get(origin)
+        j = self._index.get(destination)
+        if i is None or j is None:
+            return None
+        return i * self._n + j
+
+    def distance_km(self, origin: str, destination: str) -> float | None:
+        cell = self._cell(origin, destination)
+        return None if cell is None else round(self._tables[0][cell], 1)
+
+    def trip(self, origin: str, destination: str) -> Trip | None:
+        """Distance and ETAs between two known cities (canonical names)."""
+        cell = self._cell(origin, destination)
+        if cell is None:
+            return None
+        distance, drive, flight = (table[cell] for table in self._tables)
+        return Trip(round(distance, 1), int(drive), int(flight))
+
+    def resolve_trip(self, origin: str | None, destination: str | None) -> Trip | None:
+        """Like ``trip`` but for free-text city names."""
+        a, b = resolve_city(origin, partial=True), resolve_city(destination, partial=True)
+        return self.trip(a, b) if a and b else None
+
+
+# ---------------------- build / load ----------------------
+def build_matrix_bytes(coordinates: dict[str, dict[str, Any]] = CITY_COORDINATES) -> bytes:
+    cities = list(coordinates)
+    names = "\n".join(cities).encode("utf-8")
+    names += b"\0" * (-len(names) % 4)  # keep the float tables 4-byte aligned
+
+    tables = [array("f") for _ in _TABLES]
+    for a in cities:
+        for b in cities:
+            distance = haversine_km(coordinates[a]["lat"], coordinates[a]["lng"],
+                                    coordinates[b]["lat"], coordinates[b]["lng"])
+            tables[0].append(distance)
+            tables[1].append(drive_minutes(distance))
+            tables[2].append(flight_minutes(distance) if a != b else 0)
+
+    header = _HEADER.pack(_MAGIC, _VERSION, len(cities), len(names), _digest(coordinates))
+    return header + names + b"".join(table.tobytes() for table in tables)
+
+
+def _from_buffer(buf, coordinates: dict[str, dict[str, Any]]) -> CityMatrix:
+    magic, version, n, names_len, digest = _HEADER.unpack_from(buf, 0)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError("Unsupported city matrix format")
+    if digest != _digest(coordinates):
+        raise ValueError("City matrix is stale for the current city table")
+    names = bytes(buf[_HEADER.size:_HEADER.size + names_len]).rstrip(b"\0").decode("utf-8")
+    cities = names.split("\n") if n else []
+    return CityMatrix(cities, buf, _HEADER.size + names_len)
+
+
+def write_matrix(path: Path = DATA_PATH, coordinates: dict[str, dict[str, Any]] = CITY_COORDINATES) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(build_matrix_bytes(coordinates))
+    tmp.replace(path)
+    return path
+
+
+_matrix: CityMatrix | None = None
+
+
+def load_matrix(path: Path = DATA_PATH) -> CityMatrix:
+    """Memory-map the matrix file; rebuild in memory if it is missing or stale."""
+    global _matrix
+    try:
+        with open(path, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _matrix = _from_buffer(buf, CITY_COORDINATES)
+    except (FileNotFoundError, ValueError) as e:
+        logger.warning(f"City matrix at {path} unusable ({e}); building in memory")
+        _matrix = _from_buffer(build_matrix_bytes(CITY_COORDINATES), CITY_COORDINATES)
+    return _matrix
+
+
+def get_matrix() -> CityMatrix:
+    return _matrix or load_matrix()
+
+
+if __name__ == "__main__":
+    written_path = write_matrix()
+    print(f"wrote {written_path} ({written_path.stat().st_size} bytes)")
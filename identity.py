@@ -0,0 +1,119 @@
+"""Cached user lookups for Flask-Login.
+
+``load_user`` queried ``users`` on a fresh connection for every
+authenticated request and socket event. ``IdentityCache`` keeps a bounded
+LRU of user records, keyed by id, and drops them in three cases:
+
+* after ``ttl`` seconds;
+* when ``version`` moves. The app passes the ``users`` version from
+  ``response_cache``. This process's writes to ``users`` bump it, and so
+  does a DELETE from any process (see ``table_versions``);
+* on ``invalidate``, which write paths such as ``save_contact`` call.
+
+A deleted account is therefore dropped everywhere within the version poll
+interval. Other changes made in another process, such as a new username,
+are seen once ``ttl`` runs out.
+
+Signed session claims go one step further. After a user is loaded, the
+session carries ``{'id', 'at'}``, signed with the app secret like the rest
+of the Flask session. For the next ``claim_ttl`` seconds, requests from that
+session are trusted without any lookup. Logout clears the session, and the
+claim goes with it. ``invalidate`` rejects claims issued before it at once
+in this process. Other processes trust a claim until it expires, so
+``claim_ttl`` is the longest a deleted account can keep a live session
+elsewhere. ``claim_ttl=0`` turns claims off.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Hashable
+
+
+@dataclass(frozen=True)
+class Identity:
+    id: int
+    username: str
+
+
+@dataclass(frozen=True)
+class _Entry:
+    identity: Identity
+    version: Hashable
+    expires: float
+
+
+class IdentityCache:
+    def __init__(self, load: Callable[[int], Identity | None], ttl: float = 300, claim_ttl: float = 60,
+                 maxsize: int = 10000, version: Callable[[], Hashable] | None = None,
+                 clock: Callable[[], float] = time.time) -> None:
+        self.load = load
+        self.ttl = ttl
+        self.claim_ttl = claim_ttl
+        self.maxsize = maxsize
+        self.version = version or (lambda: None)
+        self.clock = clock
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._revoked: dict[int, float] = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.claims = 0
+
+    def get(self, user_id: int) -> Identity | None:
+        """The user's record, or None if there is no such user. Loader errors propagate."""
+        version = self.version()
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry.version == version and entry.expires > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry.identity
+            self.misses += 1
+
+        identity = self.load(user_id)
+        with self._lock:
+            if identity is None:
+                self._entries.pop(user_id, None)
+                return None
+            self._entries[user_id] = _Entry(identity, version, now + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return identity
+
+    def invalidate(self, user_id: int) -> None:
+        """Forget the user's record and reject session claims issued until now."""
+        now = self.clock()
+        with self._lock:
+            self._entries.pop(user_id, None)
+            if self.claim_ttl:
+                # Older revocations cannot matter: claims issued before them have expired
+                self._revoked = {uid: at for uid, at in self._revoked.items() if at > now - self.claim_ttl}
+                self._revoked[user_id] = now
+
+    # ---------------------- session claims ----------------------
+    def issue_claim(self, identity: Identity) -> dict | None:
+        """Claim to store in the session; None when claims are off."""
+        if not self.claim_ttl:
+            return None
+        return {'id': identity.id, 'at': self.clock()}
+
+    def check_claim(self, claim: object, user_id: int) -> bool:
+        """Whether ``claim`` vouches for ``user_id`` without a lookup."""
+        if not self.claim_ttl or not isinstance(claim, dict) or claim.get('id') != user_id:
+            return False
+        issued = claim.get('at')
+        if not isinstance(issued, (int, float)) or self.clock() - issued >= self.claim_ttl:
+            return False
+        with self._lock:
+            if issued <= self._revoked.get(user_id, float('-inf')):
+                return False
+            self.claims += 1
+        return True
+
+    def metrics(self) -> dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'claims': self.claims,
+                    'entries': len(self._entries)}
@@ -0,0 +1,124 @@
+"""Deterministic, cached mock inventory.
+
+Search pages used to regenerate random hotels, technicians and flights on every
+request, so refreshing or "Modify Search" showed a different set and a booking
+could not be tied back to what the user actually saw. Each result set is now
+built by a registered builder from an RNG seeded with ``(service, date, scope)``
+and kept in a size-bounded LRU. Because the seed is stable, an evicted set is
+rebuilt identically, so ``lookup`` works for any ref the site has handed out.
+"""
+from __future__ import annotations
+
+import hashlib
+import inspect
+import random
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+
+# builder(rng, *scope) -> list of item dicts
+Builder = Callable[..., list[dict[str, Any]]]
+# indexer(items) -> any read-only search structure over one result set
+Indexer = Callable[[tuple[dict[str, Any], ...]], Any]
+
+REF_SEPARATOR = "|"
+
+
+def _clean(part: Any) -> str:
+    return str(part).strip().replace(REF_SEPARATOR, " ")
+
+
+def seed_for(service: str, date: str, scope: tuple[str, ...]) -> int:
+    """Stable across processes and restarts (unlike ``hash()``)."""
+    key = REF_SEPARATOR.join((service, date, *scope)).encode("utf-8")
+    return int.from_bytes(hashlib.sha256(key).digest()[:8], "big")
+
+
+class _Entry:
+    __slots__ = ("items", "index")
+
+    def __init__(self, items: tuple[dict[str, Any], ...]) -> None:
+        self.items = items
+        self.index = None
+
+
+class InventoryProvider:
+    """Builds each ``(service, date, scope)`` result set once and caches it."""
+
+    def __init__(self, max_entries: int = 512) -> None:
+        self.max_entries = max_entries
+        self._builders: dict[str, Builder] = {}
+        self._signatures: dict[str, inspect.Signature] = {}
+        self._indexers: dict[str, Indexer] = {}
+        self._cache: OrderedDict[tuple[str, ...], _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def register(self, service: str, builder: Builder, indexer: Indexer | None = None) -> None:
+        self._builders[service] = builder
+        self._signatures[service] = inspect.signature(builder)
+        if indexer is not None:
+            self._indexers[service] = indexer
+
+    def _entry(self, service: str, date: str, scope: tuple[str, ...]) -> _Entry:
+        key = (service, date, *scope)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        # Build outside the lock; a concurrent miss builds the same items.
+        built = self._builders[service](random.Random(seed_for(service, date, scope)), *scope)
+        items = tuple(
+            {**item, "inventory_ref": REF_SEPARATOR.join((service, date, str(i), *scope))}
+            for i, item in enumerate(built)
+        )
+        entry = _Entry(items)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return entry
+
+    def search(self, service: str, date: Any, *scope: Any) -> list[dict[str, Any]]:
+        """Result set for a search. Items are copies, so callers may mutate them."""
+        entry = self._entry(service, _clean(date), tuple(_clean(part) for part in scope))
+        return [dict(item) for item in entry.items]
+
+    def index(self, service: str, date: Any, *scope: Any) -> Any:
+        """The registered indexer's structure over a result set, built once per set."""
+        entry = self._entry(service, _clean(date), tuple(_clean(part) for part in scope))
+        if entry.index is None:
+            entry.index = self._indexers[service](entry.items)
+        return entry.index
+
+    def lookup(self, ref: str | None, service: str | None = None) -> dict[str, Any] | None:
+        """The item a search handed out as ``inventory_ref``, or None."""
+        if not ref or not isinstance(ref, str):
+            return None
+        parts = ref.split(REF_SEPARATOR)
+        if len(parts) < 3 or not parts[2].isdigit():
+            return None
+        ref_service, date, index, *scope = parts
+        if ref_service not in self._builders or (service and ref_service != service):
+            return None
+        try:
+            # Refs come from clients: the scope must fit the builder's arguments
+            self._signatures[ref_service].bind(None, *scope)
+        except TypeError:
+            return None
+        items = self._entry(ref_service, date, tuple(scope)).items
+        index = int(index)
+        return dict(items[index]) if index < len(items) else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
@@ -2,7 +2,7 @@ import json
 from datetime import datetime
 from typing import Any, Iterable
 
-from db import get_db_connection
+from db import get_db_connection, schema
 
 
 INTEREST_CATALOG = [
@@ -43,13 +43,20 @@ def _normalize_slug_list(values: Any) -> list[str]:
     return []
 
 
+_preference_schema_ready = False
+
+
 def ensure_preference_schema() -> None:
     """Best-effort schema creation for normalized preference tables.
 
     This project doesn't use migrations. We create missing tables/columns at runtime
     (idempotent). If the DB user lacks DDL permissions, the app will continue running
-    with legacy string behavior.
+    with legacy string behavior. After one success per process later calls return
+    immediately, and the schema registry is refreshed to see the new columns.
     """
+    global _preference_schema_ready
+    if _preference_schema_ready:
+        return
     conn = get_db_connection()
     cur = conn.cursor()
     try:
@@ -176,6 +183,8 @@ def ensure_preference_schema() -> None:
     finally:
         cur.close()
         conn.close()
+    _preference_schema_ready = True
+    schema.refresh()
 
 
 def get_profile_updated_at(user_id: int | str) -> datetime | None:
@@ -0,0 +1,159 @@
+"""A user's notification feed: personal rows plus shared broadcasts.
+
+An announcement to every user used to insert one ``notifications`` row
+per user, each in its own connection and commit. It is now stored once in
+``broadcast_notifications`` and merged into each feed at read time.
+Broadcasts sent before a user registered are left out, and a user can
+dismiss one without touching anyone else's feed. Read state for
+broadcasts is a per-user watermark (the ``broadcasts`` stream in
+``read_marks``), like the personal feed's.
+
+Feed items carry ``id`` values such as ``12`` for personal notifications
+and ``"b12"`` for broadcasts, so both can be deleted through one handler.
+Pages are ordered by ``(created_at, id)`` and continue from an opaque
+cursor (see ``notifications.paging``), and timestamps are returned raw for
+the client to format.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Iterable
+
+from psycopg2.extras import execute_values
+
+from db import get_db_connection
+from notifications.paging import (
+    BROADCAST_PREFIX, PAGE_SIZE, decode_cursor, page_limit, parse_feed_id, split_page
+)
+from read_marks import BROADCASTS, NOTIFICATIONS, mark_read, unread_count
+
+logger = logging.getLogger(__name__)
+
+
+def ensure_broadcasts_schema() -> None:
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS broadcast_notifications (
+                id SERIAL PRIMARY KEY,
+                title VARCHAR(200) NOT NULL,
+                message TEXT NOT NULL,
+                icon VARCHAR(50),
+                type VARCHAR(20),
+                created_at TIMESTAMP NOT NULL DEFAULT NOW()
+            )
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS broadcast_dismissals (
+                user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                broadcast_id INTEGER NOT NULL REFERENCES broadcast_notifications(id) ON DELETE CASCADE,
+                PRIMARY KEY (user_id, broadcast_id)
+            )
+        """)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Error creating broadcast tables: {e}")
+    finally:
+        cur.close()
+        conn.close()
+
+
+def create_broadcast(cur, title: str, message: str, icon: str, type: str) -> tuple[int, object]:
+    cur.execute("""
+        INSERT INTO broadcast_notifications (title, message, icon, type)
+        VALUES (%s, %s, %s, %s)
+        RETURNING id, created_at
+    """, (title, message, icon, type))
+    return cur.fetchone()
+
+
+def insert_notifications(cur, user_ids: Iterable[int], title: str, message: str, icon: str, type: str) -> int:
+    """One personal notification for each of ``user_ids``, in a single batched insert."""
+    rows = [(user_id, title, message, icon, type) for user_id in dict.fromkeys(user_ids)]
+    if rows:
+        execute_values(cur, """
+            INSERT INTO notifications (user_id, title, message, icon, type) VALUES %s
+        """, rows)
+    return len(rows)
+
+
+def fetch_feed(cur, user_id, limit: int = PAGE_SIZE, before: tuple[datetime, str] | None = None) -> list[tuple]:
+    """``(feed_id, title, message, icon, type, created_at, is_read)``, newest first, older than ``before``."""
+    params = {'user_id': user_id, 'limit': limit, 'prefix': BROADCAST_PREFIX,
+              'personal': NOTIFICATIONS, 'broadcasts': BROADCASTS}
+    personal_page = broadcast_page = ''
+    if before:
+        params['before_at'], params['before_id'] = before
+        personal_page = 'AND (n.created_at, n.id::text) < (%(before_at)s, %(before_id)s)'
+        broadcast_page = 'AND (b.created_at, %(prefix)s || b.id) < (%(before_at)s, %(before_id)s)'
+    cur.execute(f"""
+        SELECT feed_id, title, message, icon, type, created_at, is_read FROM (
+            (SELECT n.id::text AS feed_id, n.title, n.message, n.icon, n.type, n.created_at,
+                    n.id <= COALESCE(rn.last_read_id, 0) AS is_read
+             FROM notifications n
+             LEFT JOIN read_marks rn ON rn.user_id = n.user_id AND rn.stream = %(personal)s
+             WHERE n.user_id = %(user_id)s {personal_page}
+             ORDER BY n.created_at DESC, n.id::text DESC
+             LIMIT %(limit)s)
+            UNION ALL
+            (SELECT %(prefix)s || b.id, b.title, b.message, b.icon, b.type, b.created_at,
+                    b.id <= COALESCE(rb.last_read_id, 0)
+             FROM broadcast_notifications b
+             JOIN users u ON u.id = %(user_id)s
+             LEFT JOIN read_marks rb ON rb.user_id = u.id AND rb.stream = %(broadcasts)s
+             WHERE b.created_at >= COALESCE(u.created_at, '-infinity') {broadcast_page}
+             AND NOT EXISTS (
+                 SELECT 1 FROM broadcast_dismissals d WHERE d.user_id = u.id AND d.broadcast_id = b.id
+             )
+             ORDER BY b.created_at DESC, %(prefix)s || b.id DESC
+             LIMIT %(limit)s)
+        ) feed
+        ORDER BY created_at DESC, feed_id DESC
+        LIMIT %(limit)s
+    """, params)
+    return cur.fetchall()
+
+
+def feed_page(cur, user_id, cursor: str | None = None, limit: int = PAGE_SIZE) -> tuple[list[dict], str | None]:
+    """One page of the feed plus the cursor for the next (older) page, or None at the end."""
+    limit = page_limit(limit)
+    rows = fetch_feed(cur, user_id, limit + 1, before=decode_cursor(cursor))
+    return split_page(rows, limit)
+
+
+def feed_unread_count(cur, user_id) -> int:
+    cur.execute("""
+        SELECT COUNT(*)
+        FROM broadcast_notifications b
+        JOIN users u ON u.id = %(user_id)s
+        WHERE b.id > COALESCE(
+            (SELECT last_read_id FROM read_marks WHERE user_id = u.id AND stream = %(stream)s), 0
+        )
+        AND b.created_at >= COALESCE(u.created_at, '-infinity')
+        AND NOT EXISTS (
+            SELECT 1 FROM broadcast_dismissals d WHERE d.user_id = u.id AND d.broadcast_id = b.id
+        )
+    """, {'user_id': user_id, 'stream': BROADCASTS})
+    return unread_count(cur, user_id, NOTIFICATIONS) + cur.fetchone()[0]
+
+
+def mark_feed_read(cur, user_id) -> None:
+    mark_read(cur, user_id, NOTIFICATIONS)
+    cur.execute("SELECT COALESCE(MAX(id), 0) FROM broadcast_notifications")
+    mark_read(cur, user_id, BROADCASTS, cur.fetchone()[0])
+
+
+def delete_feed_item(cur, user_id, feed_id) -> bool:
+    kind, item_id = parse_feed_id(feed_id)
+    if kind == 'broadcast':
+        cur.execute("""
+            INSERT INTO broadcast_dismissals (user_id, broadcast_id)
+            SELECT %s, id FROM broadcast_notifications WHERE id = %s
+            ON CONFLICT DO NOTHING
+        """, (user_id, item_id))
+        return True
+    cur.execute("DELETE FROM notifications WHERE id = %s AND user_id = %s", (item_id, user_id))
+    return cur.rowcount > 0
@@ -0,0 +1,65 @@
+"""Feed item ids and page cursors.
+
+Kept free of database imports so the paging rules can be tested without a
+connection; ``notifications.feed`` runs the queries.
+
+Feed items carry ``id`` values such as ``12`` for personal notifications
+and ``"b12"`` for broadcasts. A cursor is the ``(created_at, id)`` of the
+last item on a page, and the next page starts just after it.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+
+BROADCAST_PREFIX = 'b'
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def parse_feed_id(feed_id) -> tuple[str, int]:
+    """``('broadcast', 12)`` for ``"b12"``, ``('notification', 12)`` for ``12``. Raises ValueError."""
+    text = str(feed_id)
+    if text.startswith(BROADCAST_PREFIX):
+        return 'broadcast', int(text[len(BROADCAST_PREFIX):])
+    return 'notification', int(text)
+
+
+def encode_cursor(created_at: datetime, feed_id: str) -> str:
+    return f"{created_at.isoformat()}_{feed_id}"
+
+
+def decode_cursor(cursor: str | None) -> tuple[datetime, str] | None:
+    """Inverse of ``encode_cursor``. Raises ValueError for a malformed cursor."""
+    if not cursor:
+        return None
+    at, sep, feed_id = cursor.rpartition('_')
+    if not sep:
+        raise ValueError("Invalid cursor")
+    parse_feed_id(feed_id)
+    return datetime.fromisoformat(at), feed_id
+
+
+def feed_item(row: tuple) -> dict:
+    """JSON-ready feed item. ``created_at`` stays a raw ISO timestamp; clients format it."""
+    return {
+        'id': row[0],
+        'title': row[1],
+        'message': row[2],
+        'icon': row[3],
+        'type': row[4],
+        'created_at': row[5].isoformat() if row[5] else None,
+        'is_read': row[6],
+    }
+
+
+def page_limit(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def split_page(rows: list[tuple], limit: int) -> tuple[list[dict], str | None]:
+    """Items for a page fetched with ``limit + 1`` rows, and the next cursor if the extra row came back."""
+    items = [feed_item(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit and rows[limit - 1][5]:
+        next_cursor = encode_cursor(rows[limit - 1][5], rows[limit - 1][0])
+    return items, next_cursor
@@ -0,0 +1,105 @@
+"""Bounded notification tables: delete what nobody will look at again.
+
+``notifications`` only ever grew. ``prune_notifications`` deletes personal
+notifications that are older than the retention window and already read
+(at or below the user's ``notifications`` watermark). It also deletes
+broadcasts older than the window, whose dismissals cascade with them.
+Unread personal notifications are kept however old they are. Deletes run in
+batches of ``batch_size`` rows, each in its own transaction. Locks stay short
+and autovacuum can reuse the freed space while the job is still running.
+"""
+from __future__ import annotations
+
+import logging
+
+from background import PeriodicWorker
+from db import get_db_connection
+from read_marks import NOTIFICATIONS
+
+logger = logging.getLogger(__name__)
+
+RETENTION_DAYS = 90
+BATCH_SIZE = 5000
+
+
+def ensure_retention_indexes() -> None:
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_notifications_created_at ON notifications (created_at)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_broadcast_notifications_created_at ON broadcast_notifications (created_at)")
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Error creating notification retention indexes: {e}")
+    finally:
+        cur.close()
+        conn.close()
+
+
+_DELETE_READ = """
+    DELETE FROM notifications WHERE id IN (
+        SELECT n.id FROM notifications n
+        JOIN read_marks r ON r.user_id = n.user_id AND r.stream = %(stream)s
+        WHERE n.created_at < NOW() - make_interval(days => %(days)s)
+        AND n.id <= r.last_read_id
+        LIMIT %(batch)s
+    )
+"""
+
+_DELETE_BROADCASTS = """
+    DELETE FROM broadcast_notifications WHERE id IN (
+        SELECT id FROM broadcast_notifications
+        WHERE created_at < NOW() - make_interval(days => %(days)s)
+        LIMIT %(batch)s
+    )
+"""
+
+
+def _delete_in_batches(sql: str, params: dict) -> int:
+    deleted = 0
+    while True:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute(sql, params)
+            count = cur.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+        deleted += count
+        if count < params['batch']:
+            return deleted
+
+
+def prune_notifications(days: int = RETENTION_DAYS, batch_size: int = BATCH_SIZE) -> dict[str, int]:
+    params = {'days': days, 'batch': batch_size, 'stream': NOTIFICATIONS}
+    return {
+        'notifications': _delete_in_batches(_DELETE_READ, params),
+        'broadcasts': _delete_in_batches(_DELETE_BROADCASTS, params),
+    }
+
+
+class NotificationRetention(PeriodicWorker):
+    """Prunes the notification tables once per ``interval``."""
+
+    name = "notification-retention"
+    run_first = True
+
+    def __init__(self, days: int = RETENTION_DAYS, interval: float = 24 * 3600,
+                 batch_size: int = BATCH_SIZE) -> None:
+        super().__init__(interval)
+        self.days = days
+        self.batch_size = batch_size
+
+    def run_once(self) -> None:
+        try:
+            result = prune_notifications(self.days, self.batch_size)
+            if any(result.values()):
+                logger.info(f"Pruned notifications older than {self.days} days: {result}")
+        except Exception as e:
+            logger.error(f"Notification retention failed: {e}")
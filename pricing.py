@@ -4,6 +4,10 @@ from dataclasses import dataclass
 from datetime import date, datetime
 
 GST_RATE = 0.18
+# Discount the hotel results page shows on every stay
+HOTEL_DISCOUNT = 0.10
+# Technician call-out multipliers by urgency
+URGENCY_SURGE = {'urgent': 1.5, 'emergency': 2.0}
 
 
 @dataclass(frozen=True)
@@ -20,10 +24,19 @@ def compute_gst(subtotal: float) -> PriceBreakdown:
     return PriceBreakdown(subtotal=subtotal, tax=tax, total=total)
 
 
-def hotel_total(price_per_night: float, nights: int, rooms: int = 1) -> PriceBreakdown:
+def nights_between(checkin: str | None, checkout: str | None) -> int:
+    """Nights from ISO ``checkin`` to ``checkout``; 1 when either is missing or invalid."""
+    try:
+        nights = (date.fromisoformat(str(checkout)[:10]) - date.fromisoformat(str(checkin)[:10])).days
+    except ValueError:
+        return 1
+    return max(1, nights)
+
+
+def hotel_total(price_per_night: float, nights: int, rooms: int = 1, discount: float = 0.0) -> PriceBreakdown:
     nights = max(1, int(nights or 1))
     rooms = max(1, int(rooms or 1))
-    subtotal = float(price_per_night or 0) * nights * rooms
+    subtotal = float(price_per_night or 0) * nights * rooms * (1 - discount)
     return compute_gst(subtotal)
 
 
@@ -39,6 +52,11 @@ def courier_total(price_per_kg: float, weight_kg: float) -> PriceBreakdown:
     return compute_gst(subtotal)
 
 
+def surge_price(price: float, urgency: str | None) -> int:
+    """Technician fee after the urgency multiplier, as listed on the results page."""
+    return int(float(price or 0) * URGENCY_SURGE.get(str(urgency or '').lower(), 1.0))
+
+
 def technician_total(base_fee: float, hours: float = 1.0) -> PriceBreakdown:
     hours = max(1.0, float(hours or 1.0))
     subtotal = float(base_fee or 0) * hours
@@ -0,0 +1,115 @@
+"""Read state as per-user high-water marks instead of per-row flags.
+
+Marking a conversation or a notification feed as read used to set
+``is_read`` on every unread row, on every history fetch. Each of those
+updates writes a new row version. Ids only grow, so "read" is instead kept
+as the highest id a reader has seen, one row per ``(user_id, stream)``.
+Marking read is then a single-row upsert. Unread counts are index range
+scans for ids above the mark.
+
+Streams:
+
+``support:user``
+    Support messages from admins, as read by the user.
+``support:admin``
+    Support messages from the user, as read by the admins.
+``notifications``
+    The user's notification feed.
+``broadcasts``
+    Announcements to all users (``notifications.feed``). There is no
+    per-user table, so callers always pass the id to mark up to.
+"""
+from __future__ import annotations
+
+import logging
+
+from db import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+SUPPORT_USER = 'support:user'
+SUPPORT_ADMIN = 'support:admin'
+NOTIFICATIONS = 'notifications'
+BROADCASTS = 'broadcasts'
+
+# stream -> (table, which rows count as unread for that reader)
+_SOURCES = {
+    SUPPORT_USER: ('support_messages', "sender_type = 'admin'"),
+    SUPPORT_ADMIN: ('support_messages', "sender_type = 'user'"),
+    NOTIFICATIONS: ('notifications', 'TRUE'),
+}
+
+
+def ensure_read_marks_schema() -> None:
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT to_regclass('read_marks') IS NULL")
+        first_run = cur.fetchone()[0]
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS read_marks (
+                user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                stream VARCHAR(20) NOT NULL,
+                last_read_id BIGINT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                PRIMARY KEY (user_id, stream)
+            )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_notifications_user_id ON notifications (user_id, id)")
+        if first_run:
+            # Carry the old flags over: everything below the first unread row counts as read
+            for stream, (table, condition) in _SOURCES.items():
+                cur.execute(f"""
+                    INSERT INTO read_marks (user_id, stream, last_read_id)
+                    SELECT t.user_id, %s,
+                           COALESCE(MIN(t.id) FILTER (WHERE NOT t.is_read) - 1, MAX(t.id))
+                    FROM {table} t
+                    JOIN users u ON u.id = t.user_id
+                    WHERE {condition}
+                    GROUP BY t.user_id
+                    ON CONFLICT (user_id, stream) DO NOTHING
+                """, (stream,))
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Error creating read_marks: {e}")
+    finally:
+        cur.close()
+        conn.close()
+
+
+def mark_read(cur, user_id, stream: str, up_to_id: int | None = None) -> int:
+    """Advance ``user_id``'s mark on ``stream`` to ``up_to_id``, or to the latest row. Never moves it back."""
+    if up_to_id is None:
+        table, _ = _SOURCES[stream]
+        cur.execute(f"""
+            INSERT INTO read_marks (user_id, stream, last_read_id, updated_at)
+            SELECT %(user_id)s, %(stream)s, COALESCE(MAX(id), 0), NOW()
+            FROM {table} WHERE user_id = %(user_id)s
+            ON CONFLICT (user_id, stream) DO UPDATE SET
+                last_read_id = GREATEST(read_marks.last_read_id, EXCLUDED.last_read_id),
+                updated_at = EXCLUDED.updated_at
+            RETURNING last_read_id
+        """, {'user_id': user_id, 'stream': stream})
+    else:
+        cur.execute("""
+            INSERT INTO read_marks (user_id, stream, last_read_id, updated_at)
+            VALUES (%(user_id)s, %(stream)s, %(up_to)s, NOW())
+            ON CONFLICT (user_id, stream) DO UPDATE SET
+                last_read_id = GREATEST(read_marks.last_read_id, EXCLUDED.last_read_id),
+                updated_at = EXCLUDED.updated_at
+            RETURNING last_read_id
+        """, {'user_id': user_id, 'stream': stream, 'up_to': up_to_id})
+    return cur.fetchone()[0]
+
+
+def unread_count(cur, user_id, stream: str) -> int:
+    table, condition = _SOURCES[stream]
+    cur.execute(f"""
+        SELECT COUNT(*) FROM {table}
+        WHERE user_id = %(user_id)s AND {condition}
+        AND id > COALESCE(
+            (SELECT last_read_id FROM read_marks WHERE user_id = %(user_id)s AND stream = %(stream)s), 0
+        )
+    """, {'user_id': user_id, 'stream': stream})
+    return cur.fetchone()[0]
@@ -0,0 +1,138 @@
+"""Per-user unread counters kept in memory and pushed to clients.
+
+Every dashboard render and every badge poll used to count unread
+notifications and support messages in the database. ``UnreadCounters``
+loads a user's counts once, then the write paths keep them current.
+Saving a notification or an admin reply increments a count, and marking
+read zeroes one. A periodic ``reconcile`` reloads the cached users, which
+corrects any drift from writes that bypass these hooks. Each change is
+passed to ``on_change(user_id, counts)`` so the app can push it over the
+socket, and clients no longer need to poll.
+
+Counts are only held for users who were asked about recently. A write for
+a user who is not cached is dropped: their next read loads the right value
+from the database.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable
+
+from background import PeriodicWorker
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATIONS = 'notifications'
+SUPPORT = 'support'
+KINDS = (NOTIFICATIONS, SUPPORT)
+
+
+class UnreadCounters:
+    def __init__(self, load: Callable[[Hashable], dict[str, int]],
+                 on_change: Callable[[Hashable, dict[str, int]], None] | None = None,
+                 maxsize: int = 10000, clock: Callable[[], float] = time.time) -> None:
+        self.load = load
+        self.on_change = on_change
+        self.maxsize = maxsize
+        self.clock = clock
+        self._counts: OrderedDict[Hashable, dict[str, int]] = OrderedDict()
+        self._loaded_at: dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: Hashable) -> dict[str, int]:
+        with self._lock:
+            counts = self._counts.get(user_id)
+            if counts is not None:
+                self._counts.move_to_end(user_id)
+                return dict(counts)
+        return self._store(user_id, self.load(user_id), notify=False)
+
+    def _store(self, user_id: Hashable, counts: dict[str, int], notify: bool) -> dict[str, int]:
+        counts = {kind: int(counts.get(kind, 0)) for kind in KINDS}
+        with self._lock:
+            changed = self._counts.get(user_id) != counts
+            self._counts[user_id] = counts
+            self._counts.move_to_end(user_id)
+            self._loaded_at[user_id] = self.clock()
+            while len(self._counts) > self.maxsize:
+                evicted, _ = self._counts.popitem(last=False)
+                self._loaded_at.pop(evicted, None)
+        if notify and changed:
+            self._notify(user_id, counts)
+        return dict(counts)
+
+    def _update(self, user_id: Hashable, kind: str, fn: Callable[[int], int]) -> None:
+        with self._lock:
+            counts = self._counts.get(user_id)
+            if counts is None:
+                return
+            new = max(0, fn(counts[kind]))
+            if new == counts[kind]:
+                return
+            counts[kind] = new
+            snapshot = dict(counts)
+        self._notify(user_id, snapshot)
+
+    def incr(self, user_id: Hashable, kind: str, delta: int = 1) -> None:
+        self._update(user_id, kind, lambda n: n + delta)
+
+    def incr_many(self, user_ids: Iterable[Hashable], kind: str, delta: int = 1) -> None:
+        for user_id in user_ids:
+            self.incr(user_id, kind, delta)
+
+    def incr_all(self, kind: str, delta: int = 1) -> None:
+        """Bump every cached user, without notifying (for broadcasts pushed with one emit)."""
+        with self._lock:
+            for counts in self._counts.values():
+                counts[kind] = max(0, counts[kind] + delta)
+
+    def reset(self, user_id: Hashable, kind: str) -> None:
+        self._update(user_id, kind, lambda n: 0)
+
+    def refresh(self, user_id: Hashable) -> dict[str, int]:
+        """Reload from the database and push the result if it changed."""
+        return self._store(user_id, self.load(user_id), notify=True)
+
+    def invalidate(self, user_id: Hashable) -> None:
+        with self._lock:
+            self._counts.pop(user_id, None)
+            self._loaded_at.pop(user_id, None)
+
+    def reconcile(self, max_age: float = 0.0) -> int:
+        """Reload cached users loaded more than ``max_age`` seconds ago. Returns how many were corrected."""
+        cutoff = self.clock() - max_age
+        with self._lock:
+            stale = [(uid, dict(self._counts[uid])) for uid, at in self._loaded_at.items() if at <= cutoff]
+        corrected = 0
+        for user_id, before in stale:
+            try:
+                if self.refresh(user_id) != before:
+                    corrected += 1
+            except Exception as e:
+                logger.error(f"Could not reconcile unread counts for {user_id}: {e}")
+        return corrected
+
+    def _notify(self, user_id: Hashable, counts: dict[str, int]) -> None:
+        if self.on_change:
+            try:
+                self.on_change(user_id, counts)
+            except Exception as e:
+                logger.error(f"Unread counter callback failed for {user_id}: {e}")
+
+
+class CounterReconciler(PeriodicWorker):
+    """Reconciles the counters with the database once per ``interval``."""
+
+    name = "unread-reconciler"
+
+    def __init__(self, counters: UnreadCounters, interval: float = 300.0) -> None:
+        super().__init__(interval)
+        self.counters = counters
+
+    def run_once(self) -> None:
+        corrected = self.counters.reconcile(max_age=self.interval)
+        if corrected:
+            logger.info(f"Corrected unread counts for {corrected} users")
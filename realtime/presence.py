@@ -0,0 +1,177 @@
+"""Who is connected right now, fed by the Socket.IO connection lifecycle.
+
+Support status used to be guessed from recent messages, and the admin
+"active users" list came from a scan of the last 24 hours of ``requests``
+on every live tick. ``PresenceRegistry`` instead tracks open sockets: a
+user or admin is online while at least one of their sockets is connected
+and has been seen within ``ttl`` seconds (a heartbeat, or any event). Reads
+are dictionary lookups.
+
+Every transition between offline and online is reported through
+``on_change(kind, ident, online)`` once per identity, not once per tab. With
+several workers, each worker publishes its local connections
+(``local_snapshot``) and merges the others' with ``merge_remote``; see
+``realtime.presence_sync``.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Hashable, Iterable
+
+from background import PeriodicWorker
+
+logger = logging.getLogger(__name__)
+
+USER = 'user'
+ADMIN = 'admin'
+
+# Without a heartbeat for this long a socket is treated as gone
+DEFAULT_TTL = 90.0
+
+Key = tuple[str, Hashable]
+
+
+@dataclass
+class _Presence:
+    sids: dict[str, float] = field(default_factory=dict)  # sid -> last seen
+    remote_seen: float | None = None  # last seen on another worker
+
+    def last_seen(self) -> float:
+        return max([*self.sids.values(), self.remote_seen or 0.0])
+
+
+class PresenceRegistry:
+    def __init__(self, on_change: Callable[[str, Hashable, bool], None] | None = None,
+                 ttl: float = DEFAULT_TTL, clock: Callable[[], float] = time.time) -> None:
+        self.on_change = on_change
+        self.ttl = ttl
+        self.clock = clock
+        self._by_key: dict[Key, _Presence] = {}
+        self._by_sid: dict[str, Key] = {}
+        self._lock = threading.Lock()
+
+    # ---------------------- lifecycle ----------------------
+    def connect(self, sid: str, kind: str, ident: Hashable) -> None:
+        now = self.clock()
+        with self._lock:
+            old = self._by_sid.get(sid)
+            if old == (kind, ident):
+                self._by_key[old].sids[sid] = now
+                return
+            changes = self._drop_sid(sid) if old else []
+            key = (kind, ident)
+            entry = self._by_key.get(key)
+            if entry is None:
+                entry = self._by_key[key] = _Presence()
+                changes.append((kind, ident, True))
+            entry.sids[sid] = now
+            self._by_sid[sid] = key
+        self._notify(changes)
+
+    def disconnect(self, sid: str) -> None:
+        with self._lock:
+            changes = self._drop_sid(sid)
+        self._notify(changes)
+
+    def heartbeat(self, sid: str) -> bool:
+        """Refresh ``sid``; False if it is not registered (the client should identify again)."""
+        with self._lock:
+            key = self._by_sid.get(sid)
+            if key is None:
+                return False
+            self._by_key[key].sids[sid] = self.clock()
+            return True
+
+    def expire(self) -> None:
+        """Forget sockets and remote entries not seen within ``ttl``."""
+        cutoff = self.clock() - self.ttl
+        changes = []
+        with self._lock:
+            for sid, key in list(self._by_sid.items()):
+                if self._by_key[key].sids[sid] < cutoff:
+                    changes += self._drop_sid(sid)
+            for key, entry in list(self._by_key.items()):
+                if not entry.sids and (entry.remote_seen or 0) < cutoff:
+                    del self._by_key[key]
+                    changes.append((*key, False))
+        self._notify(changes)
+
+    def _drop_sid(self, sid: str) -> list[tuple[str, Hashable, bool]]:
+        key = self._by_sid.pop(sid, None)
+        if key is None:
+            return []
+        entry = self._by_key[key]
+        entry.sids.pop(sid, None)
+        if entry.sids or entry.remote_seen:
+            return []
+        del self._by_key[key]
+        return [(*key, False)]
+
+    # ---------------------- other workers ----------------------
+    def local_snapshot(self) -> dict[Key, float]:
+        """Identities with a socket on this worker, and when each was last seen."""
+        with self._lock:
+            return {key: max(entry.sids.values()) for key, entry in self._by_key.items() if entry.sids}
+
+    def merge_remote(self, seen: dict[Key, float]) -> None:
+        """Replace what other workers report with ``seen`` (identity -> last seen)."""
+        changes = []
+        with self._lock:
+            for key, entry in list(self._by_key.items()):
+                if key not in seen and entry.remote_seen is not None:
+                    entry.remote_seen = None
+                    if not entry.sids:
+                        del self._by_key[key]
+                        changes.append((*key, False))
+            for key, last_seen in seen.items():
+                entry = self._by_key.get(key)
+                if entry is None:
+                    entry = self._by_key[key] = _Presence()
+                    changes.append((*key, True))
+                entry.remote_seen = last_seen
+        self._notify(changes)
+
+    # ---------------------- reads ----------------------
+    def is_online(self, kind: str, ident: Hashable) -> bool:
+        return (kind, ident) in self._by_key
+
+    def online(self, kind: str) -> list[Hashable]:
+        with self._lock:
+            return [ident for k, ident in self._by_key if k == kind]
+
+    def count(self, kind: str) -> int:
+        with self._lock:
+            return sum(1 for k, _ in self._by_key if k == kind)
+
+    def last_seen(self, kind: str, ident: Hashable) -> float | None:
+        entry = self._by_key.get((kind, ident))
+        return entry.last_seen() if entry else None
+
+    def _notify(self, changes: Iterable[tuple[str, Hashable, bool]]) -> None:
+        if not self.on_change:
+            return
+        for kind, ident, online in changes:
+            try:
+                self.on_change(kind, ident, online)
+            except Exception as e:
+                logger.error(f"Presence callback failed for {kind} {ident}: {e}")
+
+
+class PresenceSweeper(PeriodicWorker):
+    """Expires silent sockets and runs an optional sync step once per ``interval``."""
+
+    name = "presence-sweeper"
+
+    def __init__(self, registry: PresenceRegistry, interval: float = 30.0,
+                 sync: Callable[[], None] | None = None) -> None:
+        super().__init__(interval)
+        self.registry = registry
+        self.sync = sync
+
+    def run_once(self) -> None:
+        if self.sync:
+            self.sync()
+        self.registry.expire()
@@ -0,0 +1,79 @@
+"""Share presence between workers through an unlogged Postgres table.
+
+Each worker replaces its own rows with its local connections on every
+sweep, and merges the rows other workers wrote within the TTL. A user
+connected on any worker therefore shows as online everywhere after one
+sweep interval. Reads stay in memory. A worker that dies stops refreshing
+its rows, and they fall out of the TTL window.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timezone
+
+from psycopg2.extras import execute_values
+
+from db import get_db_connection
+from realtime.presence import USER, PresenceRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class DatabasePresenceSync:
+    def __init__(self, registry: PresenceRegistry, worker_id: str | None = None) -> None:
+        self.registry = registry
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+    def ensure_schema(self) -> None:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        try:
+            # Unlogged: presence is rebuilt within one sweep after a crash anyway
+            cur.execute("""
+                CREATE UNLOGGED TABLE IF NOT EXISTS presence_sessions (
+                    worker_id TEXT NOT NULL,
+                    kind VARCHAR(10) NOT NULL,
+                    ident TEXT NOT NULL,
+                    last_seen TIMESTAMPTZ NOT NULL,
+                    PRIMARY KEY (worker_id, kind, ident)
+                )
+            """)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error creating presence_sessions: {e}")
+        finally:
+            cur.close()
+            conn.close()
+
+    def __call__(self) -> None:
+        local = self.registry.local_snapshot()
+        conn = get_db_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("DELETE FROM presence_sessions WHERE worker_id = %s", (self.worker_id,))
+            if local:
+                execute_values(cur, """
+                    INSERT INTO presence_sessions (worker_id, kind, ident, last_seen) VALUES %s
+                """, [(self.worker_id, kind, str(ident), datetime.fromtimestamp(seen, timezone.utc))
+                      for (kind, ident), seen in local.items()])
+            cur.execute("""
+                SELECT kind, ident, EXTRACT(EPOCH FROM MAX(last_seen))
+                FROM presence_sessions
+                WHERE worker_id <> %s AND last_seen > NOW() - make_interval(secs => %s)
+                GROUP BY kind, ident
+            """, (self.worker_id, self.registry.ttl))
+            remote = {}
+            for kind, ident, seen in cur.fetchall():
+                remote[(kind, int(ident) if kind == USER else ident)] = float(seen)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+        self.registry.merge_remote(remote)
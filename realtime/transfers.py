@@ -0,0 +1,177 @@
+"""Resumable chunked uploads over Socket.IO.
+
+Sending an admin attachment used to take an HTTP multipart upload and
+then a separate socket message. On a flaky connection a large file
+restarted from zero every time. With this protocol the client announces the
+file (``begin``), then sends fixed-size binary chunks. Each chunk is
+acknowledged with the next offset the server expects. After a reconnect the
+client calls ``begin`` again with its ``upload_id`` and continues from the
+returned offset.
+
+Chunks are written straight into a temp file of the target store and fed
+into a running SHA-256. No upload is ever held in memory or base64-encoded.
+The finished digest checks an optional client checksum and is handed to the
+store for deduplication, so the file is never read back. Backpressure comes
+from the protocol. A chunk is accepted only at the expected offset and only
+after the previous one was written. Each owner may have
+``max_per_owner`` uploads open, so one client has at most that many chunks
+in flight.
+
+Uploads live in memory in the web process. An upload idle for ``idle_ttl``
+is dropped with its temp file, as is every upload when the process
+restarts. A client that resumes an unknown ``upload_id`` gets a fresh upload
+from offset 0.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Hashable
+
+from storage.store import ArtifactStore, check_name
+from storage.uploads import UploadTooLarge
+
+CHUNK_SIZE = 256 * 1024
+MAX_UPLOADS_PER_OWNER = 3
+IDLE_TTL = 3600.0
+
+
+class TransferError(ValueError):
+    """A rejected request; ``offset`` is where the client should continue, or None to start over."""
+
+    def __init__(self, message: str, offset: int | None = None) -> None:
+        super().__init__(message)
+        self.offset = offset
+
+
+@dataclass
+class Upload:
+    id: str
+    owner: Hashable
+    name: str
+    size: int
+    path: Path
+    sha256: str | None = None
+    meta: dict[str, Any] = field(default_factory=dict)
+    offset: int = 0
+    touched: float = 0.0
+    _hash: Any = field(default_factory=hashlib.sha256, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def complete(self) -> bool:
+        return self.offset == self.size
+
+
+class ChunkedUploads:
+    def __init__(self, store: ArtifactStore, chunk_size: int = CHUNK_SIZE,
+                 max_per_owner: int = MAX_UPLOADS_PER_OWNER, idle_ttl: float = IDLE_TTL,
+                 clock: Callable[[], float] = time.time) -> None:
+        self.store = store
+        self.chunk_size = chunk_size
+        self.max_per_owner = max_per_owner
+        self.idle_ttl = idle_ttl
+        self.clock = clock
+        self._uploads: dict[str, Upload] = {}
+        self._lock = threading.Lock()
+
+    def begin(self, owner: Hashable, name: str, size: int, limit: int, *, sha256: str | None = None,
+              meta: dict[str, Any] | None = None, upload_id: str | None = None) -> Upload:
+        """Resume ``upload_id`` if this owner still has it, otherwise open a new upload of ``name``."""
+        self.expire()
+        with self._lock:
+            upload = self._uploads.get(upload_id) if upload_id else None
+            if upload is not None and upload.owner == owner:
+                upload.touched = self.clock()
+                return upload
+
+            check_name(name)
+            if size <= 0:
+                raise TransferError("Empty file")
+            if size > limit:
+                raise UploadTooLarge(limit)
+            if sum(1 for u in self._uploads.values() if u.owner == owner) >= self.max_per_owner:
+                raise TransferError("Too many uploads in progress")
+            upload = Upload(id=uuid.uuid4().hex, owner=owner, name=name, size=size,
+                            path=self.store.tmp_path(name), sha256=sha256, meta=dict(meta or {}),
+                            touched=self.clock())
+            upload.path.touch()
+            self._uploads[upload.id] = upload
+            return upload
+
+    def _get(self, upload_id: str | None, owner: Hashable) -> Upload:
+        upload = self._uploads.get(upload_id) if upload_id else None
+        if upload is None or upload.owner != owner:
+            raise TransferError("Unknown upload")
+        return upload
+
+    def write(self, upload_id: str | None, owner: Hashable, offset: int, data: bytes) -> Upload:
+        """Append ``data`` at ``offset``, which must be the upload's current offset."""
+        upload = self._get(upload_id, owner)
+        if not upload._lock.acquire(blocking=False):
+            raise TransferError("Previous chunk still being written", upload.offset)
+        try:
+            if not isinstance(data, (bytes, bytearray, memoryview)):
+                raise TransferError("Chunk must be binary", upload.offset)
+            if offset != upload.offset:
+                raise TransferError("Unexpected offset", upload.offset)
+            if not data or len(data) > self.chunk_size or offset + len(data) > upload.size:
+                raise TransferError("Bad chunk size", upload.offset)
+            try:
+                with open(upload.path, "r+b") as f:
+                    f.seek(offset)
+                    f.write(data)
+                    # Drop anything past the offset left by a write that was cut short
+                    f.truncate()
+            except OSError as e:
+                raise TransferError(f"Could not write chunk: {e.strerror or e}", upload.offset) from e
+            upload._hash.update(data)
+            upload.offset += len(data)
+            upload.touched = self.clock()
+            return upload
+        finally:
+            upload._lock.release()
+
+    def finish(self, upload_id: str, owner: Hashable) -> Upload:
+        """Move a complete upload into the store under its name.
+
+        A checksum mismatch or a failed write to the store discards the upload.
+        """
+        with self._lock:
+            upload = self._get(upload_id, owner)
+            if not upload.complete:
+                raise TransferError("Upload incomplete", upload.offset)
+            del self._uploads[upload.id]
+        digest = upload._hash.hexdigest()
+        if upload.sha256 and upload.sha256.lower() != digest:
+            upload.path.unlink(missing_ok=True)
+            raise TransferError("Checksum mismatch")
+        try:
+            self.store.put_file(upload.name, upload.path, digest=digest, touch=True)
+        except OSError as e:
+            upload.path.unlink(missing_ok=True)
+            raise TransferError(f"Could not store the file: {e.strerror or e}") from e
+        return upload
+
+    def cancel(self, upload_id: str | None, owner: Hashable) -> bool:
+        with self._lock:
+            upload = self._uploads.get(upload_id) if upload_id else None
+            if upload is None or upload.owner != owner:
+                return False
+            del self._uploads[upload.id]
+        upload.path.unlink(missing_ok=True)
+        return True
+
+    def expire(self) -> int:
+        cutoff = self.clock() - self.idle_ttl
+        with self._lock:
+            stale = [u for u in self._uploads.values() if u.touched < cutoff]
+            for upload in stale:
+                del self._uploads[upload.id]
+        for upload in stale:
+            upload.path.unlink(missing_ok=True)
+        return len(stale)
@@ -0,0 +1,165 @@
+"""ReportLab rendering of user activity reports.
+
+Takes rows that were already fetched, so single reports and bulk runs share
+one renderer and bulk runs can render in worker processes without a
+database connection.
+"""
+from datetime import datetime
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+
+def render_activity_report(filepath, user, requests, profile, period):
+    """Draw the report for one user to ``filepath``.
+
+    ``user`` is ``(id, username, email, full_name, phone, created_at)``,
+    ``requests`` are ``(booking_id, service_type, details, created_at)`` rows,
+    newest first, and ``profile`` is the lifestyle profile row or None.
+    """
+    _, username, email, full_name, phone, created_at = user
+
+    c = canvas.Canvas(filepath, pagesize=A4)
+    width, height = A4
+
+    # Gold color theme
+    gold = colors.HexColor('#d4af37')
+    dark = colors.HexColor('#1e293b')
+
+    # Header with gold background
+    c.setFillColor(gold)
+    c.rect(0, height - 80, width, 80, fill=True, stroke=False)
+
+    c.setFillColor(colors.white)
+    c.setFont("Helvetica-Bold", 24)
+    c.drawCentredString(width / 2, height - 40, "CONCIERGE LIFESTYLE")
+    c.setFont("Helvetica", 14)
+    c.drawCentredString(width / 2, height - 60, "User Activity Report")
+
+    # Reset color
+    c.setFillColor(colors.black)
+
+    # Report date
+    y_pos = height - 100
+    c.setFont("Helvetica", 10)
+    c.setFillColor(colors.grey)
+    c.drawRightString(width - 50, y_pos, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+
+    y_pos -= 30
+
+    # User Information Section
+    c.setFillColor(gold)
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(50, y_pos, "User Information")
+
+    y_pos -= 5
+    c.setStrokeColor(gold)
+    c.setLineWidth(2)
+    c.line(50, y_pos, width - 50, y_pos)
+
+    y_pos -= 20
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica", 11)
+
+    info_data = [
+        f"Name: {full_name or 'N/A'}",
+        f"Username: {username}",
+        f"Email: {email or 'N/A'}",
+        f"Phone: {phone or 'Not provided'}",
+        f"Member Since: {created_at.strftime('%Y-%m-%d') if created_at else 'N/A'}"
+    ]
+
+    for info in info_data:
+        c.drawString(50, y_pos, info)
+        y_pos -= 18
+
+    y_pos -= 10
+
+    # Lifestyle Profile Section (if exists)
+    if profile:
+        c.setFillColor(gold)
+        c.setFont("Helvetica-Bold", 14)
+        c.drawString(50, y_pos, "Lifestyle Profile")
+
+        y_pos -= 5
+        c.setStrokeColor(gold)
+        c.line(50, y_pos, width - 50, y_pos)
+
+        y_pos -= 20
+        c.setFillColor(colors.black)
+        c.setFont("Helvetica", 11)
+
+        monthly_budget, lifestyle_type, travel_freq, preferred_services = profile
+        profile_data = [
+            f"Budget: {monthly_budget or 'Not set'}",
+            f"Lifestyle: {lifestyle_type or 'Not set'}",
+            f"Travel Frequency: {travel_freq or 'Not set'}",
+            f"Preferred Services: {preferred_services or 'Not set'}"
+        ]
+
+        for info in profile_data:
+            c.drawString(50, y_pos, info)
+            y_pos -= 18
+
+        y_pos -= 10
+
+    # Activity Summary Section
+    c.setFillColor(gold)
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(50, y_pos, f"Activity Summary (Last {period} days)" if period != 'all' else "Activity Summary (All Time)")
+
+    y_pos -= 5
+    c.setStrokeColor(gold)
+    c.line(50, y_pos, width - 50, y_pos)
+
+    y_pos -= 20
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica", 11)
+
+    # Count by service type
+    service_counts = {}
+    for req in requests:
+        service_type = req[1]
+        service_counts[service_type] = service_counts.get(service_type, 0) + 1
+
+    c.drawString(50, y_pos, f"Total Requests: {len(requests)}")
+    y_pos -= 18
+
+    for service, count in service_counts.items():
+        c.drawString(70, y_pos, f"• {service}: {count}")
+        y_pos -= 18
+
+    y_pos -= 15
+
+    # Recent Requests Table (if space allows)
+    if y_pos > 150 and requests:
+        c.setFillColor(gold)
+        c.setFont("Helvetica-Bold", 14)
+        c.drawString(50, y_pos, "Recent Requests")
+
+        y_pos -= 5
+        c.setStrokeColor(gold)
+        c.line(50, y_pos, width - 50, y_pos)
+
+        y_pos -= 20
+        c.setFillColor(colors.black)
+        c.setFont("Helvetica", 9)
+
+        # Show up to 5 recent requests
+        for i, req in enumerate(requests[:5]):
+            if y_pos < 100:
+                break
+            booking_id, service_type, details, req_created = req
+            c.drawString(50, y_pos, f"#{booking_id} - {service_type}")
+            c.drawString(300, y_pos, 'Completed')
+            c.drawString(400, y_pos, req_created.strftime('%Y-%m-%d') if req_created else 'N/A')
+            y_pos -= 15
+
+    # Footer
+    c.setFillColor(colors.grey)
+    c.setFont("Helvetica-Oblique", 9)
+    c.drawCentredString(width / 2, 30, "Concierge Lifestyle - Premium Services")
+    c.drawCentredString(width / 2, 20, "This is an automated report generated by the admin panel")
+
+    c.save()
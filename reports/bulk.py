@@ -0,0 +1,250 @@
+"""Bulk user activity reports.
+
+The single-user report does its own three queries per user and renders on
+the request thread. A bulk run instead loads users in batches with three
+set-based queries per batch (users, their requests in the period, their
+lifestyle profiles). It renders chunks of users in a process pool and
+reports progress through a callback, which the app forwards to the admin
+room over Socket.IO.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+import zipfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable
+
+from psycopg2.extras import execute_values
+
+from db import get_db_connection
+from storage.store import ArtifactStore
+
+logger = logging.getLogger(__name__)
+
+# Users whose rows are prefetched together
+BATCH_SIZE = 500
+# Users rendered per pool task; amortises pickling and task overhead
+CHUNK_SIZE = 25
+
+
+def period_start(period) -> datetime | None:
+    return None if period == 'all' else datetime.now() - timedelta(days=int(period))
+
+
+def all_user_ids() -> list[int]:
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT id FROM users ORDER BY id")
+        return [row[0] for row in cur.fetchall()]
+    finally:
+        cur.close()
+        conn.close()
+
+
+def fetch_activity(cur, user_ids: list[int], period) -> list[tuple]:
+    """``(user, requests, profile)`` for each existing user in ``user_ids``, in three queries."""
+    cur.execute("""
+        SELECT id, username, email, full_name, phone, created_at
+        FROM users WHERE id = ANY(%s)
+        ORDER BY id
+    """, (list(user_ids),))
+    users = cur.fetchall()
+    ids = [u[0] for u in users]
+
+    since = period_start(period)
+    if since is None:
+        cur.execute("""
+            SELECT user_id, booking_id, service_type, details, created_at
+            FROM requests WHERE user_id = ANY(%s)
+            ORDER BY user_id, created_at DESC
+        """, (ids,))
+    else:
+        cur.execute("""
+            SELECT user_id, booking_id, service_type, details, created_at
+            FROM requests WHERE user_id = ANY(%s) AND created_at >= %s
+            ORDER BY user_id, created_at DESC
+        """, (ids, since))
+    requests_by_user = defaultdict(list)
+    for user_id, *row in cur.fetchall():
+        requests_by_user[user_id].append(tuple(row))
+
+    cur.execute("""
+        SELECT user_id, monthly_budget, lifestyle_type, travel_frequency, preferred_services
+        FROM lifestyle_profiles WHERE user_id = ANY(%s)
+    """, (ids,))
+    profiles = {row[0]: tuple(row[1:]) for row in cur.fetchall()}
+
+    return [(user, requests_by_user.get(user[0], []), profiles.get(user[0])) for user in users]
+
+
+def render_chunk(period, items: list[tuple[str, str, tuple]]) -> list[tuple[int, str | None, str | None]]:
+    """Pool task: render ``(path, name, activity)`` items, returning ``(user_id, name, error)``."""
+    from reports.activity import render_activity_report
+
+    results = []
+    for path, name, (user, requests, profile) in items:
+        try:
+            render_activity_report(path, user, requests, profile, period)
+            results.append((user[0], name, None))
+        except Exception as e:
+            results.append((user[0], None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+@dataclass
+class BulkReportJob:
+    id: str
+    user_ids: list[int]
+    period: Any
+    report_type: str
+    make_zip: bool
+    status: str = 'queued'
+    done: int = 0
+    failed: list[int] = field(default_factory=list)
+    files: list[str] = field(default_factory=list)
+    zip_url: str | None = None
+    error: str | None = None
+    started_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+
+    @property
+    def total(self) -> int:
+        return len(self.user_ids)
+
+    def progress(self) -> dict:
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'total': self.total,
+            'done': self.done,
+            'failed': len(self.failed),
+            'zip_url': self.zip_url,
+            'error': self.error,
+            'elapsed': round((self.finished_at or time.time()) - self.started_at, 1),
+        }
+
+
+class BulkReportRunner:
+    """Runs bulk jobs one at a time on a background thread."""
+
+    def __init__(self, store: ArtifactStore,
+                 on_progress: Callable[[BulkReportJob], None] | None = None,
+                 processes: int | None = None) -> None:
+        self.store = store
+        self.on_progress = on_progress
+        self.processes = processes or max(1, (os.cpu_count() or 2) - 1)
+        self.jobs: dict[str, BulkReportJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, user_ids: list[int], period, report_type: str = 'full', make_zip: bool = False) -> BulkReportJob:
+        job_id = uuid.uuid4().hex[:12]
+        job = BulkReportJob(job_id, list(dict.fromkeys(user_ids)), period, report_type, make_zip)
+        self.jobs[job_id] = job
+        # Keep the status of recent jobs only
+        for stale in list(self.jobs)[:-50]:
+            if self.jobs[stale].finished_at:
+                del self.jobs[stale]
+        threading.Thread(target=self._run, args=(job,), name=f"bulk-report-{job_id}", daemon=True).start()
+        return job
+
+    def get(self, job_id: str) -> BulkReportJob | None:
+        return self.jobs.get(job_id)
+
+    def _emit(self, job: BulkReportJob) -> None:
+        if self.on_progress:
+            try:
+                self.on_progress(job)
+            except Exception as e:
+                logger.error(f"Bulk report progress callback failed: {e}")
+
+    def _run(self, job: BulkReportJob) -> None:
+        # One bulk job at a time keeps the pool from oversubscribing the host
+        with self._lock:
+            job.status = 'running'
+            job.started_at = time.time()
+            self._emit(job)
+            try:
+                self._render(job)
+                if job.make_zip and job.files:
+                    job.zip_url = self._zip(job)
+                job.status = 'completed'
+            except Exception as e:
+                logger.error(f"Bulk report {job.id} failed: {e}")
+                job.status = 'failed'
+                job.error = str(e)
+            job.finished_at = time.time()
+            self._emit(job)
+
+    def _render(self, job: BulkReportJob) -> None:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        pool = ProcessPoolExecutor(max_workers=self.processes, mp_context=multiprocessing.get_context('spawn'))
+        try:
+            for start in range(0, job.total, BATCH_SIZE):
+                batch = job.user_ids[start:start + BATCH_SIZE]
+                activity = fetch_activity(cur, batch, job.period)
+                conn.rollback()  # read-only; don't hold a snapshot across renders
+
+                missing = set(batch) - {user[0] for user, _, _ in activity}
+                job.failed.extend(sorted(missing))
+                job.done += len(missing)
+
+                items, tmp_paths = [], {}
+                for entry in activity:
+                    name = f"bulk_{job.id}_user_report_{entry[0][0]}.pdf"
+                    # Render beside the store and publish finished files only
+                    tmp_paths[entry[0][0]] = tmp = self.store.tmp_path(name)
+                    items.append((str(tmp), name, entry))
+                futures = [
+                    pool.submit(render_chunk, job.period, items[i:i + CHUNK_SIZE])
+                    for i in range(0, len(items), CHUNK_SIZE)
+                ]
+                rendered = []
+                for future in as_completed(futures):
+                    for user_id, filename, error in future.result():
+                        job.done += 1
+                        tmp = tmp_paths[user_id]
+                        if filename:
+                            self.store.put_file(filename, tmp)
+                            rendered.append((user_id, filename))
+                        else:
+                            logger.warning(f"Bulk report {job.id}: user {user_id} failed: {error}")
+                            job.failed.append(user_id)
+                            tmp.unlink(missing_ok=True)
+                    self._emit(job)
+
+                self._record(cur, job, rendered)
+                conn.commit()
+                job.files.extend(filename for _, filename in rendered)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            cur.close()
+            conn.close()
+
+    def _record(self, cur, job: BulkReportJob, rendered: list[tuple[int, str]]) -> None:
+        if rendered:
+            execute_values(cur, """
+                INSERT INTO reports (user_id, report_type, file_path, generated_at, sent_via)
+                VALUES %s
+            """, [(user_id, job.report_type, self.store.url_for(name), datetime.now(), 'bulk')
+                  for user_id, name in rendered])
+
+    def _zip(self, job: BulkReportJob) -> str:
+        name = f"bulk_{job.id}.zip"
+        tmp = self.store.tmp_path(name)
+        prefix = f"bulk_{job.id}_"
+        # PDFs are already compressed; storing them keeps the zip step I/O bound
+        with zipfile.ZipFile(tmp, 'w', compression=zipfile.ZIP_STORED) as archive:
+            for report in job.files:
+                archive.write(self.store.path_for(report), arcname=report[len(prefix):])
+        self.store.put_file(name, tmp)
+        return self.store.url_for(name)
@@ -0,0 +1,133 @@
+"""Cached JSON responses, revalidated by table versions.
+
+Dashboard widgets and the admin panel poll endpoints such as
+``/api/user/reports`` and ``/admin/stats``, which rebuilt and re-serialized
+the whole payload each time. ``ResponseCache`` keeps the serialized body of
+each (endpoint, scope, query) key, together with the versions of the
+tables the endpoint reads. An entry is served while none of those versions
+has moved and its TTL has not run out.
+
+A table's version is the sum of two counters:
+
+* a database counter, bumped by a statement trigger on every write (see
+  ``table_versions``) and polled at most every ``version_ttl`` seconds, so
+  writes from other workers and background jobs are seen. Only low-write
+  tables have one; for the others it stays 0;
+* a local counter, bumped by ``invalidate`` on this process's own write
+  paths, so a user sees their own change on the next request.
+
+Writes that another process makes to a table without a trigger show up
+once the entry's TTL runs out.
+
+ETags are a hash of the body. A client holding the current ETag gets a 304
+from a cache hit without the body being built or sent. A recomputed but
+unchanged payload also keeps its ETag, across workers and restarts. Hit
+ratio and the bytes saved by 304s are kept in ``metrics``.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Hashable, Iterable, Mapping
+
+logger = logging.getLogger(__name__)
+
+VersionLoader = Callable[[Iterable[str]], Mapping[str, int]]
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    mimetype: str
+    versions: tuple[int, ...]
+    expires: float
+
+
+class ResponseCache:
+    def __init__(self, load_versions: VersionLoader | None = None, version_ttl: float = 1.0,
+                 maxsize: int = 2048, clock: Callable[[], float] = time.time) -> None:
+        self.load_versions = load_versions
+        self.version_ttl = version_ttl
+        self.maxsize = maxsize
+        self.clock = clock
+        self._entries: OrderedDict[Hashable, CachedResponse] = OrderedDict()
+        self._local: dict[str, int] = {}
+        self._remote: dict[str, int] = {}
+        self._tracked: set[str] = set()
+        self._loaded_at = float('-inf')
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.not_modified = self.bytes_saved = 0
+
+    # ---------------------- versions ----------------------
+    def invalidate(self, *tables: str) -> None:
+        """Explicit hook for write paths: entries that read ``tables`` are stale from now on."""
+        with self._lock:
+            for table in tables:
+                self._local[table] = self._local.get(table, 0) + 1
+
+    def versions(self, tables: Iterable[str]) -> tuple[int, ...]:
+        tables = tuple(tables)
+        now = self.clock()
+        with self._lock:
+            self._tracked.update(tables)
+            stale = self.load_versions and now - self._loaded_at >= self.version_ttl
+            tracked = tuple(self._tracked)
+        if stale:
+            try:
+                remote = dict(self.load_versions(tracked))
+            except Exception as e:
+                # Without database counters, TTLs and local invalidation still apply
+                logger.error(f"Could not load table versions: {e}")
+                remote = None
+            with self._lock:
+                if remote is not None:
+                    self._remote = remote
+                self._loaded_at = now
+        with self._lock:
+            return tuple(self._remote.get(t, 0) + self._local.get(t, 0) for t in tables)
+
+    # ---------------------- entries ----------------------
+    def lookup(self, key: Hashable, tables: Iterable[str]) -> CachedResponse | None:
+        current = self.versions(tables)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.versions != current or entry.expires <= self.clock():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def store(self, key: Hashable, versions: tuple[int, ...], body: bytes, ttl: float,
+              mimetype: str = 'application/json') -> CachedResponse:
+        """Cache ``body``, computed under ``versions`` (taken before computing it)."""
+        entry = CachedResponse(body=body, etag=hashlib.sha256(body).hexdigest()[:32], mimetype=mimetype,
+                               versions=versions, expires=self.clock() + ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def record_not_modified(self, entry: CachedResponse) -> None:
+        with self._lock:
+            self.not_modified += 1
+            self.bytes_saved += len(entry.body)
+
+    def metrics(self) -> dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'not_modified': self.not_modified,
+                'bytes_saved': self.bytes_saved,
+                'entries': len(self._entries),
+            }
@@ -0,0 +1,63 @@
+"""Which optional columns the connected database actually has.
+
+The schema is not managed by migrations. Some installs lack columns such as
+``users.profile_picture`` or ``lifestyle_profiles.latitude``, so queries
+pick their columns from what exists. The dashboard used to ask
+``information_schema.columns`` on every page load, and that catalog query
+is slow under concurrency. ``SchemaCapabilities`` reads the columns of the
+tables in ``TABLES`` once, on first use. After the ``ensure_*`` schema
+functions run, ``initialize_app`` calls ``refresh``, and the answers are
+then plain set lookups.
+
+The loader is injected (see ``db.load_columns``), so this module has no
+database dependency.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Callable, Iterable, Mapping
+
+TABLES = ('users', 'requests', 'lifestyle_profiles', 'support_messages')
+
+Loader = Callable[[Iterable[str]], Mapping[str, Iterable[str]]]
+
+
+class SchemaCapabilities:
+    def __init__(self, load: Loader, tables: Iterable[str] = TABLES) -> None:
+        self.load = load
+        self.tables = tuple(tables)
+        self._columns: dict[str, frozenset[str]] | None = None
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        """Re-read the columns, e.g. after a schema change."""
+        found = self.load(self.tables)
+        columns = {table: frozenset(found.get(table, ())) for table in self.tables}
+        with self._lock:
+            self._columns = columns
+
+    def columns(self, table: str) -> frozenset[str]:
+        if self._columns is None:
+            self.refresh()
+        return self._columns.get(table, frozenset())
+
+    def has_column(self, table: str, column: str) -> bool:
+        return column in self.columns(table)
+
+    def present(self, table: str, candidates: Iterable[str]) -> list[str]:
+        """The ``candidates`` that exist in ``table``, in the order given."""
+        existing = self.columns(table)
+        return [column for column in candidates if column in existing]
+
+    # ---------------------- feature flags ----------------------
+    @property
+    def has_profile_picture_column(self) -> bool:
+        return self.has_column('users', 'profile_picture')
+
+    @property
+    def has_profile_coordinates(self) -> bool:
+        return {'latitude', 'longitude'} <= self.columns('lifestyle_profiles')
+
+    @property
+    def has_support_attachment_url(self) -> bool:
+        return self.has_column('support_messages', 'attachment_url')
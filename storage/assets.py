@@ -0,0 +1,218 @@
+"""Build and serve fingerprinted, precompressed CSS and JS.
+
+Flask served ``static/css`` as written, about 300 KB of comments and
+indentation, uncompressed and without cache busting. Browsers had to
+revalidate every stylesheet on every visit. ``build_assets`` writes each
+``.css`` and ``.js`` file under ``static/`` into ``static/dist/``:
+
+* minified (comments and insignificant whitespace only, so nothing changes meaning);
+* renamed with a hash of its content, e.g. ``css/dashboard.3f2a9c1e4b7d.css``;
+* next to ``.gz`` and, when the ``brotli`` package is installed, ``.br``
+  siblings, compressed once at maximum level.
+
+It also writes ``manifest.json``, which maps each source name to its
+fingerprinted name. At request time ``AssetManifest`` resolves
+``url_for('static', ...)`` through the manifest and picks the best encoding
+the client accepts. Serving is then a plain file send: nothing is compressed
+per request. A fingerprinted name changes whenever the content changes, so
+responses can be cached as ``immutable`` for a year.
+
+Run the build after changing the stylesheets, or as part of a deploy::
+
+    python -m storage.assets [--src static] [--out static/dist]
+
+Without a manifest, the plain files are served as before.
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import posixpath
+import re
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # .br siblings are skipped; gzip covers every browser
+    brotli = None
+
+ASSET_EXTENSIONS = ('.css', '.js')
+MANIFEST_NAME = 'manifest.json'
+DIST_DIR = 'dist'
+# Preferred first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+_HASH_LENGTH = 12
+
+# ---------------------- minification ----------------------
+_CSS_TOKENS = re.compile(r'''(/\*.*?\*/|"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')''', re.S)
+_CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+
+
+def _minify_css_code(code: str) -> str:
+    code = re.sub(r'\s+', ' ', code)
+    # Never around ':' on the left (a :hover differs from a:hover) or '(' ('and (' in media queries)
+    code = re.sub(r'\s*([{};,>])\s*', r'\1', code)
+    return re.sub(r':\s+', ':', code)
+
+
+def minify_css(text: str) -> str:
+    """Drop comments and insignificant whitespace; strings are kept verbatim."""
+    out = []
+    for i, piece in enumerate(_CSS_TOKENS.split(text)):
+        if i % 2 == 0:
+            out.append(_minify_css_code(piece))
+        elif not piece.startswith('/*'):
+            out.append(piece)
+    return ''.join(out).replace(';}', '}').strip()
+
+
+def minify_js(text: str) -> str:
+    """Strip indentation, blank lines and whole-line ``//`` comments.
+
+    Line breaks are kept, so automatic semicolon insertion is unaffected, and
+    nothing inside a line is touched.
+    """
+    lines = (line.strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//'))
+
+
+def rebase_css_urls(text: str, name: str, url_prefix: str) -> str:
+    """Make relative ``url()`` references absolute: the built file lives in another directory."""
+    base = posixpath.dirname(name)
+
+    def rebase(match):
+        quote, target = match.groups()
+        if re.match(r'([a-z][a-z0-9+.-]*:|/|#)', target, re.I):
+            return match.group(0)
+        resolved = posixpath.normpath(posixpath.join(base, target))
+        return f'url({quote}{url_prefix.rstrip("/")}/{resolved}{quote})'
+
+    return _CSS_URL.sub(rebase, text)
+
+
+# ---------------------- build ----------------------
+def fingerprint(name: str, data: bytes) -> str:
+    """``css/a.css`` -> ``css/a.<content hash>.css``."""
+    stem, ext = posixpath.splitext(name)
+    return f'{stem}.{hashlib.sha256(data).hexdigest()[:_HASH_LENGTH]}{ext}'
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=11)
+    # mtime=0 keeps the output identical across builds
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def build_assets(src: Path, out: Path, url_prefix: str = '/static') -> dict[str, str]:
+    """Build every asset under ``src`` into ``out``; returns (and writes) the manifest.
+
+    Files from earlier builds are left in place, so pages cached before a
+    deploy can still load the stylesheets they reference.
+    """
+    src, out = Path(src), Path(out)
+    manifest = {}
+    for path in sorted(src.rglob('*')):
+        if path.suffix not in ASSET_EXTENSIONS or out in path.parents or not path.is_file():
+            continue
+        name = path.relative_to(src).as_posix()
+        text = path.read_text(encoding='utf-8')
+        if path.suffix == '.css':
+            text = minify_css(rebase_css_urls(text, name, url_prefix))
+        else:
+            text = minify_js(text)
+        data = text.encode('utf-8')
+
+        hashed = fingerprint(name, data)
+        target = out / hashed
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        for encoding, suffix in ENCODINGS:
+            if encoding == 'br' and brotli is None:
+                continue
+            packed = compress(data, encoding)
+            if len(packed) < len(data):
+                target.with_name(target.name + suffix).write_bytes(packed)
+        manifest[name] = hashed
+
+    out.mkdir(parents=True, exist_ok=True)
+    (out / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding='utf-8')
+    return manifest
+
+
+# ---------------------- serving ----------------------
+def accepted_encodings(header: str | None) -> set[str]:
+    """Codings an ``Accept-Encoding`` header allows (q > 0)."""
+    accepted = set()
+    for item in (header or '').split(','):
+        coding, _, params = item.strip().partition(';')
+        q = 1.0
+        match = re.search(r'q\s*=\s*([0-9.]+)', params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        if coding and q > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class AssetManifest:
+    """The built assets in ``root`` (``static/dist``), loaded from its manifest."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self.reload()
+
+    def reload(self) -> None:
+        try:
+            self.files = json.loads((self.root / MANIFEST_NAME).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            self.files = {}
+        self._built = set(self.files.values())
+
+    def lookup(self, name: str) -> str | None:
+        """Fingerprinted name for static file ``name``; None if it was not built."""
+        return self.files.get(name)
+
+    def negotiate(self, hashed: str, accept_encoding: str | None) -> tuple[Path, str | None] | None:
+        """(file to send, Content-Encoding) for a built asset; None if ``hashed`` is unknown."""
+        if hashed not in self._built:
+            return None
+        path = self.root / hashed
+        accepted = accepted_encodings(accept_encoding)
+        for encoding, suffix in ENCODINGS:
+            if encoding in accepted:
+                packed = path.with_name(path.name + suffix)
+                if packed.is_file():
+                    return packed, encoding
+        return path, None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--src', type=Path, default=Path('static'))
+    parser.add_argument('--out', type=Path, default=Path('static') / DIST_DIR)
+    parser.add_argument('--url-prefix', default='/static')
+    args = parser.parse_args()
+
+    manifest = build_assets(args.src, args.out, args.url_prefix)
+    for name, hashed in manifest.items():
+        built = args.out / hashed
+        sizes = [f'{(args.src / name).stat().st_size:,} -> {built.stat().st_size:,}']
+        for encoding, suffix in ENCODINGS:
+            packed = built.with_name(built.name + suffix)
+            if packed.is_file():
+                sizes.append(f'{encoding} {packed.stat().st_size:,}')
+        print(f'{name:32} {hashed:44} {", ".join(sizes)}')
+    if brotli is None:
+        print('brotli is not installed: built gzip only')
+
+
+if __name__ == '__main__':
+    main()
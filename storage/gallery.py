@@ -0,0 +1,131 @@
+"""Offline build of responsive gallery derivatives.
+
+    python -m storage.gallery [--root static] [--dir images] [--full]
+
+For every JPEG/PNG under ``static/images``, this writes the widths planned by
+``responsive.plan_widths`` in each format the installed Pillow can encode
+(AVIF needs Pillow 11.3+ or the pillow-avif-plugin). The copies are written
+beside the original, and ``images/responsive.json`` records them for
+``ImageManifest``.
+
+The build is incremental. A source whose size, mtime, width list and format
+list match its manifest entry, and whose files all exist, is skipped.
+``--full`` rebuilds everything. Derivatives of deleted sources are removed.
+Each file is written to a temporary name and renamed into place, and the
+manifest is written after the images. A server reading it mid-build only
+sees complete files.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from pathlib import Path
+
+from PIL import Image, ImageOps, features
+
+from storage.responsive import (
+    FORMATS, IMAGE_EXTENSIONS, MANIFEST_NAME, WIDTHS, derivative_name, is_derivative, plan_widths,
+)
+
+QUALITY = {'avif': 50, 'webp': 75, 'jpeg': 78}
+
+
+def supported_formats() -> list[str]:
+    return [fmt for fmt in FORMATS if fmt == 'jpeg' or features.check(fmt)]
+
+
+def _save(im: Image.Image, dest: Path, fmt: str) -> None:
+    tmp = dest.with_name(f'.{dest.name}.tmp')
+    options = {'quality': QUALITY[fmt]}
+    if fmt == 'jpeg':
+        options.update(optimize=True, progressive=True)
+    elif fmt == 'webp':
+        options.update(method=6)
+    im.save(tmp, fmt.upper(), **options)
+    os.replace(tmp, dest)
+
+
+def render_derivatives(src: Path, root: Path, name: str, formats: list[str]) -> dict:
+    """Write every derivative of ``name``; returns its manifest entry."""
+    with Image.open(src) as im:
+        im = ImageOps.exif_transpose(im)
+        if im.mode not in ('RGB', 'L'):
+            rgba = im.convert('RGBA')
+            im = Image.new('RGB', rgba.size, (255, 255, 255))
+            im.paste(rgba, mask=rgba.getchannel('A'))
+        width, height = im.size
+        widths = plan_widths(width)
+        for w in widths:
+            resized = im if w == width else im.resize((w, max(1, round(height * w / width))), Image.LANCZOS)
+            for fmt in formats:
+                _save(resized, root / derivative_name(name, w, fmt), fmt)
+    st = src.stat()
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'width': width, 'height': height,
+            'widths': widths, 'formats': formats, 'planned': list(WIDTHS)}
+
+
+def _up_to_date(entry: dict | None, src: Path, root: Path, name: str, formats: list[str]) -> bool:
+    if not entry:
+        return False
+    st = src.stat()
+    if (entry['size'], entry['mtime_ns'], entry['formats'], entry.get('planned')) != \
+            (st.st_size, st.st_mtime_ns, formats, list(WIDTHS)):
+        return False
+    return all((root / derivative_name(name, w, fmt)).is_file() for w in entry['widths'] for fmt in formats)
+
+
+def _remove(root: Path, name: str, entry: dict) -> None:
+    for w in entry['widths']:
+        for fmt in entry['formats']:
+            (root / derivative_name(name, w, fmt)).unlink(missing_ok=True)
+
+
+def build_gallery(root: Path, directory: str = 'images', incremental: bool = True) -> dict[str, int]:
+    """Build the derivatives under ``root/directory``; returns counts of built, skipped and removed sources."""
+    root = Path(root)
+    manifest_path = root / directory / MANIFEST_NAME
+    try:
+        previous = json.loads(manifest_path.read_text(encoding='utf-8')) if incremental else {}
+    except (OSError, ValueError):
+        previous = {}
+    formats = supported_formats()
+
+    manifest, built, skipped = {}, 0, 0
+    for src in sorted((root / directory).rglob('*')):
+        if src.suffix.lower() not in IMAGE_EXTENSIONS or is_derivative(src.name) or not src.is_file():
+            continue
+        name = src.relative_to(root).as_posix()
+        entry = previous.get(name)
+        if _up_to_date(entry, src, root, name, formats):
+            manifest[name] = entry
+            skipped += 1
+            continue
+        if entry:
+            _remove(root, name, entry)  # width list may have changed
+        manifest[name] = render_derivatives(src, root, name, formats)
+        built += 1
+
+    removed = [name for name in previous if name not in manifest]
+    for name in removed:
+        _remove(root, name, previous[name])
+
+    tmp = manifest_path.with_name(f'.{MANIFEST_NAME}.tmp')
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding='utf-8')
+    os.replace(tmp, manifest_path)
+    return {'built': built, 'skipped': skipped, 'removed': len(removed)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--root', type=Path, default=Path('static'))
+    parser.add_argument('--dir', default='images')
+    parser.add_argument('--full', action='store_true', help='rebuild every image, not only changed ones')
+    args = parser.parse_args()
+
+    print(f"formats: {', '.join(supported_formats())}")
+    print(build_gallery(args.root, args.dir, incremental=not args.full))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Responsive ``<picture>`` markup for gallery images.
+
+The hotel galleries (``static/images/<city>/*.jpg``) are full-resolution
+photos of several megabytes each. Every results card loaded them into a
+220px-high slot. ``storage.gallery`` renders each one offline at the widths
+in ``WIDTHS`` as AVIF, WebP and JPEG. It writes the copies beside the
+original, e.g. ``mumbai1.w640.webp``, and records them in
+``images/responsive.json``. This module reads that manifest and writes the
+``srcset``/``sizes`` markup, so the browser downloads the smallest file
+that fills the slot, in the best format it supports.
+
+Images that were not built are emitted as a plain ``<img>``. Unsplash URLs
+get a ``srcset`` of resized URLs from Unsplash's own image CDN instead.
+"""
+from __future__ import annotations
+
+import json
+import os
+from html import escape
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+MANIFEST_NAME = 'responsive.json'
+# Card thumbnails on phones up to full-width heroes on 2x screens
+WIDTHS = (320, 480, 640, 960, 1280)
+# Best first; JPEG is the <img> fallback every browser can show
+FORMATS = ('avif', 'webp', 'jpeg')
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+_SUFFIXES = {'avif': '.avif', 'webp': '.webp', 'jpeg': '.jpg'}
+
+
+def derivative_name(name: str, width: int, fmt: str) -> str:
+    """``images/a/b.jpg`` at 640px WebP -> ``images/a/b.w640.webp``."""
+    stem = os.path.splitext(name)[0]
+    return f'{stem}.w{width}{_SUFFIXES[fmt]}'
+
+
+def is_derivative(name: str) -> bool:
+    stem = os.path.splitext(os.path.basename(name))[0]
+    _, _, tail = stem.rpartition('.')
+    return tail[:1] == 'w' and tail[1:].isdigit()
+
+
+def plan_widths(original_width: int, widths: tuple[int, ...] = WIDTHS) -> list[int]:
+    """Target widths for an image; never upscaled, and never empty."""
+    return [w for w in widths if w < original_width] or [original_width]
+
+
+def unsplash_url(url: str, width: int) -> str:
+    """``url`` resized to ``width`` by Unsplash, which also picks AVIF/WebP from the Accept header."""
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    query.update({'w': str(width), 'auto': 'format'})
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _img(src: str, alt: str, attrs: dict[str, str | int | None]) -> str:
+    extra = ''.join(f' {key}="{escape(str(value))}"' for key, value in attrs.items() if value is not None)
+    return f'<img src="{escape(src)}" alt="{escape(alt)}"{extra}>'
+
+
+class ImageManifest:
+    """The derivatives built under ``static_root``, loaded from ``images/responsive.json``."""
+
+    def __init__(self, static_root: Path, url_prefix: str = '/static') -> None:
+        self.path = Path(static_root) / 'images' / MANIFEST_NAME
+        self.url_prefix = url_prefix.rstrip('/')
+        self.reload()
+
+    def reload(self) -> None:
+        try:
+            self.images = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            self.images = {}
+
+    def url(self, name: str) -> str:
+        return f'{self.url_prefix}/{name}'
+
+    def srcset(self, name: str, fmt: str) -> str | None:
+        entry = self.images.get(name)
+        if not entry or fmt not in entry['formats']:
+            return None
+        return ', '.join(f'{self.url(derivative_name(name, w, fmt))} {w}w' for w in entry['widths'])
+
+    def picture(self, name: str, sizes: str, alt: str = '', width_hint: int = 640, **attrs) -> str:
+        """``<picture>`` markup for static image ``name`` (or an absolute URL).
+
+        ``sizes`` is the rendered width per breakpoint, as in the ``sizes``
+        attribute. The ``<img>`` fallback uses the narrowest built width of
+        at least ``width_hint``. Extra keyword arguments become ``<img>``
+        attributes (``class_`` for ``class``); ``loading`` defaults to lazy.
+        """
+        attrs = {key.rstrip('_'): value for key, value in attrs.items()}
+        attrs.setdefault('loading', 'lazy')
+        attrs.setdefault('decoding', 'async')
+
+        if name.startswith(('http://', 'https://')):
+            if urlsplit(name).hostname != 'images.unsplash.com':
+                return _img(name, alt, attrs)
+            srcset = ', '.join(f'{unsplash_url(name, w)} {w}w' for w in WIDTHS)
+            return _img(unsplash_url(name, width_hint), alt, {'srcset': srcset, 'sizes': sizes, **attrs})
+
+        entry = self.images.get(name)
+        if not entry:
+            return _img(self.url(name), alt, attrs)
+
+        widths = entry['widths']
+        fallback = next((w for w in widths if w >= width_hint), widths[-1])
+        sources = ''.join(
+            f'<source type="{MIME_TYPES[fmt]}" srcset="{escape(self.srcset(name, fmt))}" sizes="{escape(sizes)}">'
+            for fmt in FORMATS[:-1] if fmt in entry['formats']
+        )
+        img_attrs = {'srcset': self.srcset(name, 'jpeg'), 'sizes': sizes,
+                     'width': entry['width'], 'height': entry['height'], **attrs}
+        return f'<picture>{sources}{_img(self.url(derivative_name(name, fallback, "jpeg")), alt, img_attrs)}</picture>'
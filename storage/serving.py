@@ -0,0 +1,87 @@
+"""Helpers for serving stored files without copying them through Python.
+
+Tickets and reports are served with strong ETags, so a client that already
+holds a file revalidates it with ``If-None-Match`` and gets a 304 with no
+body. Range requests are left to Werkzeug, or to the reverse proxy when one
+is configured. Hashing a PDF on every request would cost as much as sending
+it, so the digest is cached per file version (inode, size and mtime). A
+rewritten file gets a new key, and the stale entry ages out of the LRU.
+
+With ``FILE_OFFLOAD=x-accel`` the app answers with an ``X-Accel-Redirect``
+to an nginx ``internal`` location, and nginx streams the file (including
+ranges) with ``sendfile``. ``x-sendfile`` does the same for Apache and
+lighttpd through Flask's ``USE_X_SENDFILE``. Without a proxy, Werkzeug hands
+the open file to the server's ``wsgi.file_wrapper``, which gunicorn turns
+into ``sendfile`` as well.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Mapping
+
+OFFLOAD_MODES = ("", "x-accel", "x-sendfile")
+
+_HASH_CHUNK = 1024 * 1024
+
+
+class ETagCache:
+    """Strong ETags for files, hashed once per file version."""
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        self.maxsize = maxsize
+        self.hashed_bytes = 0
+        self._entries: OrderedDict[tuple, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: Path) -> str:
+        st = os.stat(path)
+        key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+        with self._lock:
+            tag = self._entries.get(key)
+            if tag is not None:
+                self._entries.move_to_end(key)
+                return tag
+
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+                h.update(chunk)
+        tag = h.hexdigest()[:32]
+
+        with self._lock:
+            self.hashed_bytes += st.st_size
+            self._entries[key] = tag
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return tag
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """Whether an ``If-None-Match`` header matches ``etag`` (weak comparison, per RFC 9110)."""
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate.strip('"') == etag:
+            return True
+    return False
+
+
+def accel_location(path: Path, locations: Mapping[Path, str]) -> str | None:
+    """Internal proxy URI for ``path``, given ``{directory: internal prefix}``; None if unmapped."""
+    path = Path(path).resolve()
+    for directory, prefix in locations.items():
+        try:
+            relative = path.relative_to(Path(directory).resolve())
+        except ValueError:
+            continue
+        return f"{prefix.rstrip('/')}/{relative.as_posix()}"
+    return None
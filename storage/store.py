@@ -0,0 +1,307 @@
+"""Sharded, content-deduplicated storage for generated and uploaded files.
+
+Each artifact type (tickets, reports, support uploads) gets an
+``ArtifactStore`` with this layout::
+
+    <root>/names/ab/cd/<name>        what URLs point at
+    <root>/objects/ab/cd/<sha256>    unique contents (deduplicating stores)
+    <root>/tmp/                      in-progress writes
+
+Files are spread over two levels of 256 subdirectories, keyed by a hash of
+the name. Directory listings and backups then stay cheap as the count grows.
+Names that differ only by a trailing ``_<16 hex>`` version suffix share a
+shard, so all versions of one ticket sit in one directory. In a
+deduplicating store a name is a hard link to its content object, and the
+link count tells the sweeper when an object is unreferenced. On a
+filesystem without hard links the store does not deduplicate, since link
+counts would not track references.
+
+Public names are unchanged. ``/static/tickets/<name>`` is resolved through
+the store, and files still in the old flat directory are found there until
+``migrate_legacy`` moves them.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Iterator
+
+from background import PeriodicWorker
+
+logger = logging.getLogger(__name__)
+
+_VERSION_SUFFIX = re.compile(r"_[0-9a-f]{16}(?=\.[^.]+$)")
+_COPY_CHUNK = 1024 * 1024
+# In-progress writes older than this are leftovers from a crash
+_STALE_TMP_SECS = 24 * 3600
+
+
+def _fan_out(key: str) -> tuple[str, str]:
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return digest[:2], digest[2:4]
+
+
+def shard_dir(root: Path, name: str) -> Path:
+    """Directory under ``root/names`` that holds ``name``."""
+    a, b = _fan_out(_VERSION_SUFFIX.sub("", name))
+    return Path(root) / "names" / a / b
+
+
+def _supports_hardlinks(directory: Path) -> bool:
+    probe = directory / f".{uuid.uuid4().hex}.probe"
+    probe.touch()
+    try:
+        os.link(probe, probe.with_suffix(".link"))
+        os.unlink(probe.with_suffix(".link"))
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.unlink()
+
+
+def tmp_file(root: Path, name: str) -> Path:
+    """Fresh path under ``root/tmp`` for an in-progress write of ``name``."""
+    return Path(root) / "tmp" / f"{uuid.uuid4().hex}_{check_name(name)}"
+
+
+def check_name(name: str) -> str:
+    if not name or "/" in name or "\\" in name or name.startswith(".") or name != os.path.basename(name):
+        raise ValueError(f"Invalid artifact name: {name!r}")
+    return name
+
+
+class ArtifactStore:
+    def __init__(self, root: Path, url_prefix: str, *, legacy_dir: Path | None = None,
+                 retention_days: int | None = None,
+                 referenced: Callable[[list[str]], set[str]] | None = None, dedupe: bool = False) -> None:
+        self.root = Path(root)
+        self.url_prefix = url_prefix.rstrip("/")
+        self.legacy_dir = Path(legacy_dir) if legacy_dir else None
+        self.retention_days = retention_days
+        self.referenced = referenced
+        self.dedupe = dedupe
+        for sub in ("names", "objects", "tmp"):
+            (self.root / sub).mkdir(parents=True, exist_ok=True)
+        if dedupe and not _supports_hardlinks(self.root / "tmp"):
+            logger.warning(f"No hard links under {self.root}: storing without deduplication")
+            self.dedupe = False
+
+    # ---------------------- naming ----------------------
+    def url_for(self, name: str) -> str:
+        return f"{self.url_prefix}/{name}"
+
+    def name_from_url(self, url: str | None) -> str | None:
+        """The artifact name behind a stored URL or path, or None if it is not ours."""
+        if not url:
+            return None
+        name = os.path.basename(url.split("?", 1)[0].rstrip("/"))
+        try:
+            return check_name(name)
+        except ValueError:
+            return None
+
+    def dir_for(self, name: str, create: bool = False) -> Path:
+        directory = shard_dir(self.root, check_name(name))
+        if create:
+            directory.mkdir(parents=True, exist_ok=True)
+        return directory
+
+    def path_for(self, name: str, create: bool = False) -> Path:
+        """Where ``name`` lives (or will live) in the sharded layout."""
+        return self.dir_for(name, create) / name
+
+    def resolve(self, name: str) -> Path | None:
+        """Existing file for ``name``, in the sharded layout or the old flat directory."""
+        try:
+            path = self.path_for(name)
+        except ValueError:
+            return None
+        if path.is_file():
+            return path
+        if self.legacy_dir:
+            legacy = self.legacy_dir / name
+            if legacy.is_file():
+                return legacy
+        return None
+
+    # ---------------------- writing ----------------------
+    def tmp_path(self, name: str) -> Path:
+        return tmp_file(self.root, name)
+
+    def _object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest[2:4] / digest
+
+    def put_file(self, name: str, src: Path, digest: str | None = None, touch: bool = False) -> Path:
+        """Move a finished file (ideally from ``tmp_path``) into place under ``name``.
+
+        Pass the file's SHA-256 as ``digest`` if it is already known, to skip rereading it,
+        and ``touch`` for new uploads (see ``save_stream``).
+        """
+        target = self.path_for(name, create=True)
+        if not self.dedupe:
+            os.replace(src, target)
+            return target
+
+        if digest is None:
+            h = hashlib.sha256()
+            with open(src, "rb") as f:
+                for chunk in iter(lambda: f.read(_COPY_CHUNK), b""):
+                    h.update(chunk)
+            digest = h.hexdigest()
+        return self._link(Path(src), digest, target, touch=touch)
+
+    def save_stream(self, name: str, stream: BinaryIO) -> Path:
+        """Store an upload, hashing it while it is written."""
+        tmp = self.tmp_path(name)
+        h = hashlib.sha256()
+        try:
+            with open(tmp, "wb") as out:
+                for chunk in iter(lambda: stream.read(_COPY_CHUNK), b""):
+                    h.update(chunk)
+                    out.write(chunk)
+            target = self.path_for(name, create=True)
+            if not self.dedupe:
+                os.replace(tmp, target)
+                return target
+            return self._link(tmp, h.hexdigest(), target, touch=True)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+
+    def _link(self, src: Path, digest: str, target: Path, touch: bool) -> Path:
+        obj = self._object_path(digest)
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        # Link under a temporary name first so the rename replaces atomically
+        staging = target.with_name(f".{uuid.uuid4().hex}.link")
+        try:
+            os.link(obj, staging)
+        except FileNotFoundError:
+            # New content, or the sweeper just dropped an orphaned object. Link
+            # before moving into objects/, so the object never has a link count
+            # of 1 for the sweeper to see.
+            os.link(src, staging)
+            os.replace(src, obj)
+        else:
+            src.unlink()
+            if touch:
+                # Names share the object's inode, so retention counts from the newest upload
+                os.utime(obj)
+        os.replace(staging, target)
+        return target
+
+    def delete(self, name: str) -> bool:
+        path = self.resolve(name)
+        if not path:
+            return False
+        try:
+            path.unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    # ---------------------- maintenance ----------------------
+    def _walk(self, sub: str) -> Iterator[Path]:
+        for dirpath, _, filenames in os.walk(self.root / sub):
+            for filename in filenames:
+                yield Path(dirpath) / filename
+
+    def migrate_legacy(self) -> int:
+        """Move files from the old flat directory into the sharded layout."""
+        if not self.legacy_dir or not self.legacy_dir.is_dir():
+            return 0
+        moved = 0
+        for entry in os.scandir(self.legacy_dir):
+            if not entry.is_file() or entry.name.startswith("."):
+                continue
+            try:
+                target = self.path_for(entry.name, create=True)
+                if target.exists():
+                    # Already rewritten under the new layout; the flat copy is stale
+                    os.unlink(entry.path)
+                    continue
+                self.put_file(entry.name, Path(entry.path))
+                moved += 1
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not migrate {entry.path}: {e}")
+        return moved
+
+    def sweep(self, now: float | None = None) -> dict[str, int]:
+        """Apply the retention policy and drop unreferenced objects and stale temp files.
+
+        Names older than ``retention_days`` expire unless ``referenced`` reports
+        them as still in use; it gets the candidate names and returns the ones
+        to keep. If it fails, nothing expires this round.
+        """
+        now = now or time.time()
+        expired = orphans = stale = 0
+
+        if self.retention_days is not None:
+            cutoff = now - self.retention_days * 86400
+            candidates = {}
+            for path in self._walk("names"):
+                try:
+                    if path.stat().st_mtime < cutoff:
+                        candidates[path.name] = path
+                except FileNotFoundError:
+                    pass
+            keep: set[str] = set()
+            if candidates and self.referenced:
+                try:
+                    keep = self.referenced(list(candidates))
+                except Exception as e:
+                    logger.error(f"Reference check for {self.root} failed, skipping expiry: {e}")
+                    candidates = {}
+            for name, path in candidates.items():
+                if name in keep:
+                    continue
+                try:
+                    path.unlink()
+                    expired += 1
+                except FileNotFoundError:
+                    pass
+
+        if self.dedupe:
+            for path in self._walk("objects"):
+                try:
+                    if path.stat().st_nlink <= 1:
+                        path.unlink()
+                        orphans += 1
+                except FileNotFoundError:
+                    pass
+
+        for path in self._walk("tmp"):
+            try:
+                if path.stat().st_mtime < now - _STALE_TMP_SECS:
+                    path.unlink()
+                    stale += 1
+            except FileNotFoundError:
+                pass
+
+        return {"expired": expired, "orphans": orphans, "stale_tmp": stale}
+
+
+class StorageSweeper(PeriodicWorker):
+    """Migrates legacy files and applies retention once per ``interval``."""
+
+    name = "storage-sweeper"
+    run_first = True
+
+    def __init__(self, stores: Iterable[ArtifactStore], interval: float = 6 * 3600) -> None:
+        super().__init__(interval)
+        self.stores = list(stores)
+
+    def run_once(self) -> None:
+        for store in self.stores:
+            try:
+                moved = store.migrate_legacy()
+                result = store.sweep()
+                if moved or any(result.values()):
+                    logger.info(f"Storage sweep {store.root}: migrated {moved}, {result}")
+            except Exception as e:
+                logger.error(f"Storage sweep of {store.root} failed: {e}")
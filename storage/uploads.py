@@ -0,0 +1,93 @@
+"""Size limits for incoming uploads and names for their resized variants.
+
+Uploads were saved with ``file.save`` and had no size cap. They are now
+copied into an ``ArtifactStore`` through ``LimitedStream``. The copy stops
+with ``UploadTooLarge`` as soon as the limit for that kind of file is
+passed, and the store removes the partial temp file. The store hashes the
+bytes as they are copied, so a repeated upload reuses the stored content.
+
+Images also get smaller copies for display (see ``storage.variants``). A
+variant's name is the original name plus ``.<variant>.jpg``, stored next to
+the original in the same store. A URL for a variant that has not been
+rendered yet falls back to the original (``source_name``).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import BinaryIO
+
+IMAGE_EXTENSIONS = frozenset({'png', 'jpg', 'jpeg', 'gif'})
+
+AVATAR = 'avatar'
+IMAGE = 'image'
+DOCUMENT = 'document'
+
+_MB = 1024 * 1024
+SIZE_LIMITS = {
+    AVATAR: 5 * _MB,
+    IMAGE: 10 * _MB,
+    DOCUMENT: 20 * _MB,
+}
+
+
+class UploadTooLarge(ValueError):
+    def __init__(self, limit: int) -> None:
+        super().__init__(f"File is larger than the {limit // _MB} MB limit")
+        self.limit = limit
+
+
+def extension(filename: str | None) -> str:
+    return filename.rsplit('.', 1)[1].lower() if filename and '.' in filename else ''
+
+
+def is_image(filename: str | None) -> bool:
+    return extension(filename) in IMAGE_EXTENSIONS
+
+
+def upload_kind(filename: str | None) -> str:
+    return IMAGE if is_image(filename) else DOCUMENT
+
+
+class LimitedStream:
+    """Read-through wrapper that raises ``UploadTooLarge`` past ``limit`` bytes."""
+
+    def __init__(self, stream: BinaryIO, limit: int) -> None:
+        self.stream = stream
+        self.limit = limit
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.stream.read(size)
+        self.bytes_read += len(chunk)
+        if self.bytes_read > self.limit:
+            raise UploadTooLarge(self.limit)
+        return chunk
+
+
+@dataclass(frozen=True)
+class VariantSpec:
+    name: str
+    max_side: int
+    quality: int = 80
+
+
+# Avatars in the dashboard header, admin chat lists and profile card
+THUMB = VariantSpec('thumb', 256)
+# Inline image previews in support chat
+PREVIEW = VariantSpec('preview', 1024)
+VARIANTS = {spec.name: spec for spec in (THUMB, PREVIEW)}
+
+_VARIANT_EXT = '.jpg'
+
+
+def variant_name(name: str, variant: str) -> str:
+    return f"{name}.{variant}{_VARIANT_EXT}"
+
+
+def source_name(name: str) -> str | None:
+    """The original behind a variant name, or None if ``name`` is not a variant."""
+    if not name.endswith(_VARIANT_EXT):
+        return None
+    stem = name[:-len(_VARIANT_EXT)]
+    original, _, variant = stem.rpartition('.')
+    return original if original and variant in VARIANTS else None
@@ -0,0 +1,86 @@
+"""Background rendering of resized image variants.
+
+Chat pages and avatar lists used to load full-size originals, often
+several megabytes each. After an image upload is stored, the request queues
+it here. A worker thread writes a downscaled, recompressed JPEG for each
+requested ``VariantSpec``, and stores it in the same ``ArtifactStore`` under
+``variant_name``. Rendering is idempotent. A variant that already exists is
+skipped, and identical originals render to identical bytes, which the
+deduplicating store keeps once.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+from pathlib import Path
+from typing import Iterable
+
+from PIL import Image, ImageOps
+
+from background import PeriodicWorker
+from storage.store import ArtifactStore
+from storage.uploads import VariantSpec, variant_name
+
+logger = logging.getLogger(__name__)
+
+
+def render_variant(src: Path, dest: Path, spec: VariantSpec) -> None:
+    with Image.open(src) as im:
+        im.seek(0)  # first frame of animated GIFs
+        im = ImageOps.exif_transpose(im)
+        im.thumbnail((spec.max_side, spec.max_side), Image.LANCZOS)
+        if im.mode not in ('RGB', 'L'):
+            # JPEG has no alpha: flatten transparent images onto white
+            rgba = im.convert('RGBA')
+            im = Image.new('RGB', rgba.size, (255, 255, 255))
+            im.paste(rgba, mask=rgba.getchannel('A'))
+        im.save(dest, 'JPEG', quality=spec.quality, optimize=True, progressive=True)
+
+
+class VariantWorker(PeriodicWorker):
+    name = "variant-worker"
+    run_first = True
+
+    def __init__(self, maxsize: int = 1000) -> None:
+        # No pause between rounds: run_once blocks on the queue
+        super().__init__(interval=0)
+        self._queue: queue.Queue = queue.Queue(maxsize)
+
+    def submit(self, store: ArtifactStore, name: str, specs: Iterable[VariantSpec]) -> bool:
+        """Queue ``name`` for rendering; False if the queue is full (its URLs keep serving the original)."""
+        try:
+            self._queue.put_nowait((store, name, tuple(specs)))
+            return True
+        except queue.Full:
+            logger.warning(f"Variant queue full, skipping {name}")
+            return False
+
+    def render(self, store: ArtifactStore, name: str, specs: Iterable[VariantSpec]) -> int:
+        """Render the missing variants of ``name`` now. Returns how many were written."""
+        src = store.resolve(name)
+        if not src:
+            return 0
+        written = 0
+        for spec in specs:
+            target = variant_name(name, spec.name)
+            if store.resolve(target):
+                continue
+            tmp = store.tmp_path(target)
+            try:
+                render_variant(src, tmp, spec)
+                store.put_file(target, tmp)
+                written += 1
+            finally:
+                if tmp.exists():
+                    tmp.unlink()
+        return written
+
+    def run_once(self) -> None:
+        try:
+            store, name, specs = self._queue.get(timeout=1.0)
+        except queue.Empty:
+            return
+        try:
+            self.render(store, name, specs)
+        except Exception as e:
+            logger.error(f"Could not render variants of {name}: {e}")
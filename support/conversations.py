@@ -0,0 +1,192 @@
+"""One summary row per support conversation, for the admin inbox.
+
+The inbox used to find each user's latest message with per-user
+subqueries over all of ``support_messages``. ``support_conversations``
+keeps the latest message, who sent it and the admin's unread counter (the
+user's side is counted from ``read_marks``). The row is
+updated in the same transaction as every insert into ``support_messages``,
+so listing the inbox is an index scan on ``(last_at, user_id)``, paged with
+a keyset cursor.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Callable
+
+from db import get_db_connection
+from read_marks import SUPPORT_ADMIN, SUPPORT_USER, mark_read as advance_read_mark
+
+logger = logging.getLogger(__name__)
+
+INBOX_PAGE_SIZE = 50
+MAX_INBOX_PAGE_SIZE = 200
+PREVIEW_CHARS = 120
+
+
+def ensure_support_indexes() -> None:
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_support_messages_user_id
+            ON support_messages (user_id, id)
+        """)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Error creating support message indexes: {e}")
+    finally:
+        cur.close()
+        conn.close()
+
+
+def ensure_conversations_schema() -> None:
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS support_conversations (
+                user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+                last_message_id INTEGER NOT NULL,
+                last_message_preview TEXT,
+                last_sender VARCHAR(10) NOT NULL,
+                last_at TIMESTAMP NOT NULL,
+                last_user_at TIMESTAMP,
+                unread_for_admin INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        # The user's unread count comes from read_marks (SUPPORT_USER)
+        cur.execute("ALTER TABLE support_conversations DROP COLUMN IF EXISTS unread_for_user")
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_support_conversations_inbox
+            ON support_conversations (last_at, user_id)
+        """)
+        # First run: summarise the existing history once
+        cur.execute("SELECT EXISTS (SELECT 1 FROM support_conversations)")
+        if not cur.fetchone()[0]:
+            cur.execute(f"""
+                INSERT INTO support_conversations (
+                    user_id, last_message_id, last_message_preview, last_sender, last_at,
+                    last_user_at, unread_for_admin
+                )
+                SELECT DISTINCT ON (m.user_id)
+                    m.user_id, m.id, LEFT(m.message, {PREVIEW_CHARS}), m.sender_type, m.created_at,
+                    s.last_user_at, COALESCE(s.unread_for_admin, 0)
+                FROM support_messages m
+                JOIN users u ON u.id = m.user_id
+                JOIN (
+                    SELECT user_id,
+                           MAX(created_at) FILTER (WHERE sender_type = 'user') AS last_user_at,
+                           COUNT(*) FILTER (WHERE sender_type = 'user' AND NOT is_read) AS unread_for_admin
+                    FROM support_messages
+                    GROUP BY user_id
+                ) s ON s.user_id = m.user_id
+                ORDER BY m.user_id, m.id DESC
+                ON CONFLICT (user_id) DO NOTHING
+            """)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Error creating support_conversations: {e}")
+    finally:
+        cur.close()
+        conn.close()
+
+
+def record_message(cur, user_id, message_id: int, sender_type: str, message: str | None,
+                   created_at: datetime) -> None:
+    """Fold a just-inserted message into its conversation row. Call in the insert's transaction."""
+    from_user = sender_type == 'user'
+    cur.execute("""
+        INSERT INTO support_conversations AS c (
+            user_id, last_message_id, last_message_preview, last_sender, last_at,
+            last_user_at, unread_for_admin
+        )
+        VALUES (%(user_id)s, %(id)s, %(preview)s, %(sender)s, %(at)s,
+                %(user_at)s, %(to_admin)s)
+        ON CONFLICT (user_id) DO UPDATE SET
+            last_message_id = GREATEST(c.last_message_id, EXCLUDED.last_message_id),
+            last_message_preview = CASE WHEN EXCLUDED.last_message_id > c.last_message_id
+                                        THEN EXCLUDED.last_message_preview ELSE c.last_message_preview END,
+            last_sender = CASE WHEN EXCLUDED.last_message_id > c.last_message_id
+                               THEN EXCLUDED.last_sender ELSE c.last_sender END,
+            last_at = GREATEST(c.last_at, EXCLUDED.last_at),
+            last_user_at = GREATEST(c.last_user_at, EXCLUDED.last_user_at),
+            unread_for_admin = c.unread_for_admin + EXCLUDED.unread_for_admin
+    """, {
+        'user_id': user_id,
+        'id': message_id,
+        'preview': (message or '')[:PREVIEW_CHARS],
+        'sender': sender_type,
+        'at': created_at,
+        'user_at': created_at if from_user else None,
+        'to_admin': 1 if from_user else 0,
+    })
+
+
+def mark_read(cur, user_id, reader: str) -> None:
+    """Mark the conversation read up to its latest message for ``reader`` ('user' or 'admin').
+
+    Moves the reader's watermark to that message under the conversation's
+    row lock, and for the admin also zeroes the inbox counter.
+    """
+    if reader == 'admin':
+        cur.execute("""
+            UPDATE support_conversations SET unread_for_admin = 0
+            WHERE user_id = %s
+            RETURNING last_message_id
+        """, (user_id,))
+    else:
+        cur.execute("SELECT last_message_id FROM support_conversations WHERE user_id = %s FOR UPDATE",
+                    (user_id,))
+    row = cur.fetchone()
+    if row:
+        advance_read_mark(cur, user_id, SUPPORT_ADMIN if reader == 'admin' else SUPPORT_USER, row[0])
+
+
+def encode_cursor(last_at: datetime, user_id: int) -> str:
+    return f"{last_at.isoformat()}_{user_id}"
+
+
+def decode_cursor(cursor: str | None) -> tuple[datetime, int] | None:
+    """Inverse of ``encode_cursor``. Raises ValueError for a malformed cursor."""
+    if not cursor:
+        return None
+    at, sep, user_id = cursor.rpartition('_')
+    if not sep:
+        raise ValueError("Invalid cursor")
+    return datetime.fromisoformat(at), int(user_id)
+
+
+def list_conversations(cur, *, cursor: str | None = None, limit: int = INBOX_PAGE_SIZE,
+                       is_online: Callable[[int], bool] | None = None) -> tuple[list[dict], str | None]:
+    """One page of the inbox, most recent first, plus the cursor for the next page."""
+    after = decode_cursor(cursor)
+    limit = max(1, min(limit, MAX_INBOX_PAGE_SIZE))
+    cur.execute(f"""
+        SELECT c.user_id, COALESCE(u.full_name, u.email), u.email, u.profile_picture,
+               c.unread_for_admin, c.last_message_preview, c.last_at, c.last_sender
+        FROM support_conversations c
+        JOIN users u ON u.id = c.user_id
+        {"WHERE (c.last_at, c.user_id) < (%(at)s, %(user_id)s)" if after else ""}
+        ORDER BY c.last_at DESC, c.user_id DESC
+        LIMIT %(limit)s
+    """, {'at': after[0] if after else None, 'user_id': after[1] if after else None, 'limit': limit + 1})
+    rows = cur.fetchall()
+
+    conversations = []
+    for row in rows[:limit]:
+        conversations.append({
+            'id': row[0],
+            'name': row[1] or (row[2] or '').split('@')[0],
+            'email': row[2],
+            'profile_picture': row[3] or '',
+            'unread_count': row[4],
+            'last_message': row[5] or '',
+            'last_message_at': row[6],
+            'last_sender': row[7],
+            'status': 'online' if is_online and is_online(row[0]) else 'offline',
+        })
+    next_cursor = encode_cursor(rows[limit - 1][6], rows[limit - 1][0]) if len(rows) > limit else None
+    return conversations, next_cursor
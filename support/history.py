@@ -0,0 +1,105 @@
+"""Cursor pagination over support chat messages.
+
+Message ids increase with insertion order, so a page is a range scan on
+``(user_id, id)``. The newest page is the last ``limit`` ids, read backwards
+from the end of the index. ``before_id`` pages back through older messages,
+and ``after_id`` returns only messages a client has not seen yet, for
+example after a Socket.IO reconnect. Pages are always returned oldest-first,
+which is the order the chat windows draw them in.
+
+Queries run on a cursor the caller passes in, so this module has no
+database imports. The index it relies on is created by
+``support.conversations.ensure_support_indexes``.
+"""
+from __future__ import annotations
+
+from typing import Any, Mapping
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Only what the chat windows draw; both attachment columns are in use. A
+# message is read once the other side's watermark has passed it.
+_SELECT = """
+    SELECT m.id, m.sender_type, m.message, m.message_type,
+           COALESCE(m.file_path, m.attachment_url), m.created_at,
+           m.id <= COALESCE(CASE m.sender_type WHEN 'admin' THEN ru.last_read_id ELSE ra.last_read_id END, 0)
+    FROM support_messages m
+    LEFT JOIN read_marks ru ON ru.user_id = m.user_id AND ru.stream = 'support:user'
+    LEFT JOIN read_marks ra ON ra.user_id = m.user_id AND ra.stream = 'support:admin'
+"""
+
+
+def _positive_int(args: Mapping[str, Any], key: str) -> int | None:
+    value = args.get(key)
+    if value in (None, ''):
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be an integer")
+    if number < 0:
+        raise ValueError(f"{key} must not be negative")
+    return number
+
+
+def parse_page_args(args: Mapping[str, Any], default_limit: int = PAGE_SIZE) -> dict:
+    """``before_id``/``after_id``/``limit`` from query args. Raises ValueError if they are invalid."""
+    before_id = _positive_int(args, 'before_id')
+    after_id = _positive_int(args, 'after_id')
+    if before_id is not None and after_id is not None:
+        raise ValueError("Use either before_id or after_id, not both")
+    limit = _positive_int(args, 'limit') or default_limit
+    return {'before_id': before_id, 'after_id': after_id, 'limit': min(limit, MAX_PAGE_SIZE)}
+
+
+def fetch_page(cur, user_id, *, before_id: int | None = None, after_id: int | None = None,
+               limit: int = PAGE_SIZE) -> tuple[list[tuple], bool]:
+    """Rows for one page, oldest first, and whether more exist in the paging direction."""
+    if after_id is not None:
+        cur.execute(_SELECT + """
+            WHERE m.user_id = %s AND m.id > %s
+            ORDER BY m.id ASC
+            LIMIT %s
+        """, (user_id, after_id, limit + 1))
+        rows = cur.fetchall()
+        return rows[:limit], len(rows) > limit
+
+    if before_id is not None:
+        cur.execute(_SELECT + """
+            WHERE m.user_id = %s AND m.id < %s
+            ORDER BY m.id DESC
+            LIMIT %s
+        """, (user_id, before_id, limit + 1))
+    else:
+        cur.execute(_SELECT + """
+            WHERE m.user_id = %s
+            ORDER BY m.id DESC
+            LIMIT %s
+        """, (user_id, limit + 1))
+    rows = cur.fetchall()
+    return rows[:limit][::-1], len(rows) > limit
+
+
+def message_dict(row: tuple) -> dict:
+    return {
+        'id': row[0],
+        'sender_type': row[1],
+        'message': row[2],
+        'message_type': row[3],
+        'file_path': row[4],
+        'timestamp': row[5].isoformat() if row[5] else '',
+        'is_read': row[6],
+    }
+
+
+def page_payload(messages: list[dict], has_more: bool, *, after_id: int | None = None) -> dict:
+    """Response fields for a page; pass ``after_id`` for pages fetched with it."""
+    return {
+        'messages': messages,
+        'has_more': has_more,
+        # Older history is reachable from here unless this was a catch-up page
+        'before_id': messages[0]['id'] if messages and after_id is None else None,
+        # Where a reconnecting client resumes from
+        'after_id': messages[-1]['id'] if messages else after_id,
+    }
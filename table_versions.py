@@ -0,0 +1,77 @@
+"""Per-table change counters maintained by the database.
+
+A statement-level trigger on each tracked table bumps its row in
+``table_versions`` on every INSERT, UPDATE, DELETE or TRUNCATE, whichever
+process or job made the write. ``response_cache`` compares these counters
+to decide whether a cached response is still current. The trigger fires
+once per statement, not per row, so a bulk write costs one extra update.
+Concurrent writers to one table wait on its counter row until they commit.
+Only low-write tables are tracked for that reason. Hot tables such as
+``requests`` rely on TTLs and explicit ``invalidate`` calls instead.
+``users`` is written on every sign-up and profile save, so its trigger
+fires only on DELETE and TRUNCATE. That is enough for other processes to
+drop cached identities of deleted accounts.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Iterable
+
+from db import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+
+def ensure_table_versions(tables: Iterable[str], drop: Iterable[str] = (),
+                          deletes: Iterable[str] = ()) -> None:
+    """Install the version trigger on ``tables`` and remove it from ``drop``.
+
+    Tables in ``deletes`` get a trigger that fires on DELETE and TRUNCATE only.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS table_versions (
+                table_name TEXT PRIMARY KEY,
+                version BIGINT NOT NULL DEFAULT 0
+            )
+        """)
+        cur.execute("""
+            CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                INSERT INTO table_versions (table_name, version) VALUES (TG_TABLE_NAME, 1)
+                ON CONFLICT (table_name) DO UPDATE SET version = table_versions.version + 1;
+                RETURN NULL;
+            END
+            $$
+        """)
+        for table in drop:
+            cur.execute(f"DROP TRIGGER IF EXISTS {table}_bump_version ON {table}")
+        events = [(table, "INSERT OR UPDATE OR DELETE OR TRUNCATE") for table in tables]
+        events += [(table, "DELETE OR TRUNCATE") for table in deletes]
+        for table, on in events:
+            cur.execute(f"DROP TRIGGER IF EXISTS {table}_bump_version ON {table}")
+            cur.execute(f"""
+                CREATE TRIGGER {table}_bump_version
+                AFTER {on} ON {table}
+                FOR EACH STATEMENT EXECUTE PROCEDURE bump_table_version()
+            """)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Error creating table version triggers: {e}")
+    finally:
+        cur.close()
+        conn.close()
+
+
+def load_table_versions(tables: Iterable[str]) -> dict[str, int]:
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT table_name, version FROM table_versions WHERE table_name = ANY(%s)", (list(tables),))
+        return dict(cur.fetchall())
+    finally:
+        cur.close()
+        conn.close()
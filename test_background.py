@@ -0,0 +1,45 @@
+"""
+Tests for the shared periodic worker loop.
+"""
+
+import threading
+
+from background import PeriodicWorker
+
+
+class Flaky(PeriodicWorker):
+    name = "flaky"
+    run_first = True
+
+    def __init__(self):
+        super().__init__(interval=0.01)
+        self.rounds = 0
+        self.third = threading.Event()
+
+    def run_once(self):
+        self.rounds += 1
+        if self.rounds == 3:
+            self.third.set()
+        if self.rounds == 1:
+            raise RuntimeError("first round fails")
+
+
+def test_rounds_continue_after_errors_until_stopped():
+    worker = Flaky()
+    worker.start()
+    assert worker.third.wait(2)
+    worker.stop()
+    worker._thread.join(2)
+    assert not worker._thread.is_alive()
+
+
+def test_first_round_waits_for_the_interval_unless_run_first():
+    class Idle(PeriodicWorker):
+        def run_once(self):
+            raise AssertionError("ran before the first interval")
+
+    worker = Idle(interval=60)
+    worker.start()
+    worker.stop()
+    worker._thread.join(2)
+    assert not worker._thread.is_alive()
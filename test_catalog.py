@@ -0,0 +1,85 @@
+"""
+Tests for the indexed in-memory catalog.
+"""
+
+import random
+
+import pytest
+
+from catalog.index import Catalog
+from catalog.records import car_listing, hotel_listing, technician_listing
+
+CITIES = ["Mumbai", "Pune", "Goa"]
+CLASSES = ["Standard", "SUV", "Luxury"]
+
+
+def _hotels(n, seed=11):
+    rng = random.Random(seed)
+    return [{"name": f"Hotel {i}", "price": rng.randint(2500, 15000), "rating": round(rng.uniform(3.8, 5.0), 1),
+             "city": rng.choice(CITIES)} for i in range(n)]
+
+
+def _catalog(hotels):
+    return Catalog(hotel_listing(h, h["city"]) for h in hotels)
+
+
+def test_price_range_matches_linear_filter():
+    hotels = _hotels(20000)
+    catalog = _catalog(hotels)
+    page = catalog.query("hotel", city="Pune", min_price=4000, max_price=6000)
+    expected = sorted((h for h in hotels if h["city"] == "Pune" and 4000 <= h["price"] <= 6000),
+                      key=lambda h: h["price"])
+    assert page.total == len(expected)
+    assert [l.price for l in page.items] == [h["price"] for h in expected]
+
+
+def test_catalog_order_and_pagination():
+    hotels = _hotels(50)
+    catalog = _catalog(hotels)
+    within = [h for h in hotels if h["price"] <= 6000]
+    first = catalog.query("hotel", max_price=6000, sort="catalog", limit=5)
+    second = catalog.query("hotel", max_price=6000, sort="catalog", offset=5, limit=5)
+    assert first.dicts() + second.dicts() == within[:10]
+    assert first.total == len(within)
+    assert first.has_more
+
+
+def test_sort_by_rating_and_where():
+    catalog = _catalog(_hotels(500))
+    page = catalog.query("hotel", city="goa", where=lambda l: l.rating >= 4.5, sort="-rating", limit=20)
+    ratings = [l.rating for l in page.items]
+    assert ratings == sorted(ratings, reverse=True)
+    assert all(r >= 4.5 for r in ratings)
+
+
+def test_class_and_service_type_indexes():
+    catalog = Catalog(
+        [car_listing({"model": "Etios", "price": 936, "cab_class": "Standard"}),
+         car_listing({"model": "Fortuner", "price": 1500, "cab_class": "SUV"}),
+         technician_listing({"id": "T001", "service_type": "ac_repair", "price": 800, "location": "Mumbai"}),
+         technician_listing({"id": "T002", "service_type": "plumbing", "price": 600, "location": "Mumbai"})]
+    )
+    assert [l.id for l in catalog.query("car", listing_class="SUV").items] == ["Fortuner"]
+    assert catalog.query("car").total == 2
+    assert [l.id for l in catalog.query("technician", city="Mumbai", service_type="plumbing").items] == ["T002"]
+    assert catalog.query("technician", city="Pune").total == 0
+    assert catalog.get("car", "Etios").price == 936
+
+
+def test_unknown_sort_rejected():
+    with pytest.raises(ValueError):
+        Catalog().query("hotel", sort="distance")
+
+
+def test_incremental_adds_match_a_bulk_build():
+    hotels = _hotels(300, seed=5)
+    bulk = _catalog(hotels)
+    grown = _catalog(hotels[:100])
+    grown.extend(hotel_listing(h, h["city"]) for h in hotels[100:250])
+    for h in hotels[250:]:
+        grown.add(hotel_listing(h, h["city"]))
+    for sort in ("price", "catalog"):
+        for bounds in ({}, {"min_price": 5000, "max_price": 9000}):
+            assert grown.query("hotel", sort=sort, **bounds).dicts() == bulk.query("hotel", sort=sort, **bounds).dicts()
+    page = grown.query("hotel", city="Goa", sort="catalog", offset=3, limit=4)
+    assert page.dicts() == [hotel_listing(h, h["city"]).to_dict() for h in hotels if h["city"] == "Goa"][3:7]
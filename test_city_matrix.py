@@ -0,0 +1,55 @@
+"""
+Tests for the city resolver and the precomputed city-pair matrix.
+"""
+
+import pytest
+
+from geo import matrix
+from geo.cities import CITY_COORDINATES, resolve_city
+from geo.distance import haversine_km
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Mumbai", "Mumbai"),
+    ("  mumbai ", "Mumbai"),
+    ("Bombay", "Mumbai"),
+    ("New Delhi", "Delhi"),
+    ("Pune, Maharashtra", "Pune"),
+    ("Bengaluru, Karnataka, India", "Bangalore"),
+    ("Mumbai Airport", None),
+    ("Atlantis", None),
+    ("", None),
+])
+def test_resolve_city(text, expected):
+    assert resolve_city(text) == expected
+
+
+def test_resolve_city_partial():
+    assert resolve_city("Andheri East Mumbai", partial=True) == "Mumbai"
+    assert resolve_city("Connaught Place, New Delhi 110001", partial=True) == "Delhi"
+    assert resolve_city("Mumbai Airport", partial=True) == "Mumbai"
+    assert resolve_city("Atlantis", partial=True) is None
+
+
+def test_matrix_matches_haversine():
+    m = matrix.get_matrix()
+    a, b = CITY_COORDINATES["Mumbai"], CITY_COORDINATES["Kolkata"]
+    trip = m.trip("Mumbai", "Kolkata")
+    assert trip.distance_km == pytest.approx(haversine_km(a["lat"], a["lng"], b["lat"], b["lng"]), abs=0.1)
+    assert trip.drive_minutes == matrix.drive_minutes(trip.distance_km)
+    assert trip.flight_minutes == matrix.flight_minutes(trip.distance_km)
+    assert m.trip("Mumbai", "Atlantis") is None
+    assert m.resolve_trip("Bombay", "Calcutta") == trip
+
+
+def test_committed_matrix_is_current():
+    assert matrix.DATA_PATH.read_bytes() == matrix.build_matrix_bytes()
+
+
+def test_stale_matrix_rebuilt(tmp_path):
+    path = tmp_path / "city_matrix.bin"
+    matrix.write_matrix(path, {"Mumbai": CITY_COORDINATES["Mumbai"]})
+    try:
+        assert matrix.load_matrix(path).trip("Mumbai", "Delhi") is not None
+    finally:
+        matrix.load_matrix()
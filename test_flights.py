@@ -0,0 +1,74 @@
+"""
+Tests for the precomputed flight schedules and search engine.
+"""
+
+import pytest
+
+from flights.search import FlightQuery, FlightSearch
+from geo.cities import CITY_COORDINATES
+from geo.matrix import flight_minutes
+
+
+def _minutes(duration):
+    hours, mins = duration.split()
+    return int(hours[:-1]) * 60 + int(mins[:-1])
+
+
+def _engine():
+    return FlightSearch(CITY_COORDINATES)
+
+
+def test_schedule_is_stable_across_engines():
+    query = FlightQuery("Mumbai", "Delhi", "2026-11-02")
+    assert _engine().search(query).flights == _engine().search(query).flights
+
+
+def test_duration_follows_distance():
+    engine = _engine()
+    short = engine.route("Mumbai", "Pune")
+    long = engine.route("Delhi", "Bangalore")
+    assert flight_minutes(short.distance_km) < flight_minutes(long.distance_km)
+    nonstop = [_minutes(f["duration"]) for f in engine.search(FlightQuery("Delhi", "Bangalore", "2026-11-02", max_stops=0)).flights]
+    assert nonstop and all(abs(m - flight_minutes(long.distance_km)) <= 15 for m in nonstop)
+
+
+def test_filters_and_sort():
+    engine = _engine()
+    page = engine.search(FlightQuery("Mumbai", "Delhi", "2026-11-02", max_stops=0,
+                                     departure_window="morning", refundable=True, sort="departure"))
+    times = [f["departure_time"] for f in page.flights]
+    assert times == sorted(times)
+    assert all(f["stops"] == 0 and f["refundable"] and "05:00" <= f["departure_time"] < "12:00" for f in page.flights)
+
+
+def test_pagination_covers_all_results():
+    engine = _engine()
+    everything = engine.search(FlightQuery("Goa", "Kolkata", "2026-11-02"))
+    pages = [engine.search(FlightQuery("Goa", "Kolkata", "2026-11-02", offset=o, limit=5)) for o in range(0, everything.total, 5)]
+    assert [f for p in pages for f in p.flights] == list(everything.flights)
+    assert pages[0].has_more and not pages[-1].has_more
+    prices = [f["price"] for f in everything.flights]
+    assert prices == sorted(prices)
+
+
+def test_class_scales_price_and_results_are_cached():
+    engine = _engine()
+    economy = engine.search(FlightQuery("Pune", "Chennai", "2026-11-02"))
+    business = engine.search(FlightQuery("Pune", "Chennai", "2026-11-02", travel_class="business"))
+    assert all(b["price"] > e["price"] for e, b in zip(economy.flights, business.flights))
+    assert engine.search(FlightQuery("Pune", "Chennai", "2026-11-02")) is economy
+
+
+def test_lookup_by_ref():
+    engine = _engine()
+    flight = engine.search(FlightQuery("Jaipur", "Goa", "2026-11-02", travel_class="first")).flights[2]
+    assert engine.lookup(flight["inventory_ref"]) == flight
+    assert engine.lookup("Jaipur|Goa|2026-11-02|first|XX000") is None
+    assert engine.lookup("nonsense") is None
+
+
+def test_unknown_city_and_bad_sort():
+    engine = _engine()
+    assert engine.search(FlightQuery("Patna", "Delhi", "2026-11-02")).flights[0]["origin_code"] == "PAT"
+    with pytest.raises(ValueError):
+        engine.search(FlightQuery("Mumbai", "Delhi", "2026-11-02", sort="rating"))
@@ -0,0 +1,60 @@
+"""
+Tests for the Flask-Login identity cache and session claims.
+"""
+
+from identity import Identity, IdentityCache
+
+
+def make_cache(**kwargs):
+    users = {1: Identity(1, 'asha')}
+    calls = []
+
+    def load(user_id):
+        calls.append(user_id)
+        return users.get(user_id)
+
+    return IdentityCache(load, **kwargs), users, calls
+
+
+def test_records_cached_until_ttl_version_or_invalidation(clock):
+    version = [0]
+    cache, users, calls = make_cache(ttl=300, version=lambda: version[0], clock=clock)
+    assert cache.get(1) == cache.get(1) == Identity(1, 'asha')
+    assert calls == [1]
+
+    clock.now += 300
+    cache.get(1)
+    version[0] += 1
+    cache.get(1)
+    cache.invalidate(1)
+    cache.get(1)
+    assert calls == [1] * 4
+
+    del users[1]
+    version[0] += 1
+    assert cache.get(1) is None
+    assert cache.metrics()['entries'] == 0
+
+
+def test_claims_expire_and_are_revoked_by_invalidate(clock):
+    cache, _, calls = make_cache(claim_ttl=60, clock=clock)
+    claim = cache.issue_claim(cache.get(1))
+    assert cache.check_claim(claim, 1)
+    assert not cache.check_claim(claim, 2)
+    assert not cache.check_claim({'id': 1, 'at': 'soon'}, 1)
+
+    clock.now += 10
+    cache.invalidate(1)
+    assert not cache.check_claim(claim, 1)
+    clock.now += 1
+    fresh = cache.issue_claim(cache.get(1))
+    assert cache.check_claim(fresh, 1)
+    clock.now += 60
+    assert not cache.check_claim(fresh, 1)
+    assert len(calls) == 2
+
+
+def test_claims_can_be_turned_off():
+    cache, _, _ = make_cache(claim_ttl=0)
+    assert cache.issue_claim(Identity(1, 'asha')) is None
+    assert not cache.check_claim({'id': 1, 'at': 1000.0}, 1)
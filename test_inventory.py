@@ -0,0 +1,68 @@
+"""
+Tests for the seeded, cached mock inventory provider.
+"""
+
+from inventory.provider import InventoryProvider
+
+
+def _build(rng, city):
+    return [{"name": f"{city} Hotel {rng.randint(1, 10**6)}", "price": rng.randint(2500, 15000)}
+            for _ in range(rng.randint(8, 12))]
+
+
+def _provider(max_entries=512):
+    provider = InventoryProvider(max_entries=max_entries)
+    provider.register("hotels", _build)
+    return provider
+
+
+def test_same_search_returns_same_items():
+    first = _provider().search("hotels", "2026-11-02", "Goa")
+    second = _provider().search("hotels", "2026-11-02", "Goa")
+    assert first == second
+    assert _provider().search("hotels", "2026-11-03", "Goa") != first
+
+
+def test_results_are_cached_and_copies():
+    provider = _provider()
+    items = provider.search("hotels", "2026-11-02", "Goa")
+    items[0]["price"] = 1
+    assert provider.search("hotels", "2026-11-02", "Goa")[0]["price"] != 1
+    assert (provider.hits, provider.misses) == (1, 1)
+
+
+def test_lru_eviction_is_bounded():
+    provider = _provider(max_entries=2)
+    for city in ("Goa", "Pune", "Surat"):
+        provider.search("hotels", "2026-11-02", city)
+    assert len(provider) == 2
+    provider.search("hotels", "2026-11-02", "Goa")
+    assert provider.misses == 4
+
+
+def test_lookup_survives_eviction():
+    provider = _provider(max_entries=1)
+    item = provider.search("hotels", "2026-11-02", "Goa")[3]
+    provider.search("hotels", "2026-11-02", "Pune")
+    assert provider.lookup(item["inventory_ref"]) == item
+
+
+def test_lookup_rejects_bad_refs():
+    provider = _provider()
+    ref = provider.search("hotels", "2026-11-02", "Goa")[0]["inventory_ref"]
+    assert provider.lookup(ref, "flights") is None
+    assert provider.lookup("hotels|2026-11-02|99|Goa") is None
+    assert provider.lookup("cars|2026-11-02|0|Goa") is None
+    assert provider.lookup("garbage") is None
+    assert provider.lookup("hotels|2026-11-02|0") is None
+    assert provider.lookup("hotels|2026-11-02|0|Goa|extra") is None
+    assert provider.lookup(None) is None
+
+
+def test_index_built_once_per_result_set():
+    provider = InventoryProvider()
+    builds = []
+    provider.register("hotels", _build, lambda items: builds.append(items) or len(items))
+    size = provider.index("hotels", "2026-11-02", "Goa")
+    assert provider.index("hotels", "2026-11-02", "Goa") == size
+    assert len(builds) == 1
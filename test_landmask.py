@@ -0,0 +1,60 @@
+"""
+Tests for the precomputed city land masks used to place nearby services.
+"""
+
+import random
+
+from geo import landmask
+from geo.boundaries import CITY_BOUNDARIES, is_on_land
+
+
+def test_mask_matches_boundary_rules():
+    """Every cell of the raster agrees with the rule it was built from"""
+    mask = landmask.get_mask("Mumbai")
+    rng = random.Random(7)
+    min_lat, max_lat, min_lng, max_lng = CITY_BOUNDARIES["Mumbai"]
+    for _ in range(5000):
+        lat = rng.uniform(min_lat, max_lat)
+        lng = rng.uniform(min_lng, max_lng)
+        cell = mask._cell(lat, lng)
+        if cell is None:
+            continue
+        assert mask.is_land(lat, lng) == is_on_land(*mask.cell_center(*cell), "Mumbai")
+
+
+def test_outside_boundary_is_not_land():
+    mask = landmask.get_mask("Mumbai")
+    assert not mask.is_land(18.80, 72.87)
+    assert not mask.is_land(19.07, 72.70)  # Arabian Sea
+
+
+def test_draws_land_within_radius():
+    rng = random.Random(1)
+    sampler = landmask.nearby_sampler("Mumbai", 19.0760, 72.8777, 10)
+    mask = landmask.get_mask("Mumbai")
+    for _ in range(500):
+        lat, lng, dist = sampler.draw(rng)
+        assert mask.is_land(lat, lng)
+        assert dist <= 10.2
+
+
+def test_unknown_city_samples_disc():
+    rng = random.Random(3)
+    sampler = landmask.nearby_sampler("Goa", 15.2993, 74.1240, 5)
+    for _ in range(100):
+        _, _, dist = sampler.draw(rng)
+        assert dist <= 5.1
+
+
+def test_center_far_from_mask_falls_back_to_city_land():
+    rng = random.Random(5)
+    lat, lng, _ = landmask.nearby_sampler("Delhi", 19.0, 72.0, 5).draw(rng)
+    assert landmask.get_mask("Delhi").is_land(lat, lng)
+
+
+def test_serialized_mask_roundtrip(tmp_path):
+    landmask.write_masks(["Nashik"], data_dir=tmp_path)
+    raw = (tmp_path / "nashik.bin").read_bytes()
+    assert raw == landmask.build_mask_bytes("Nashik")
+    mask = landmask._from_buffer("Nashik", raw)
+    assert mask.is_land(20.0, 73.80)
@@ -0,0 +1,52 @@
+"""
+Tests for notification feed ids and page cursors.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from notifications.paging import decode_cursor, encode_cursor, page_limit, parse_feed_id, split_page
+
+
+def _rows(count):
+    start = datetime(2026, 5, 1, 12, 0)
+    return [(f"b{i}" if i % 2 else str(i), f"t{i}", "m", "info", "info", start - timedelta(minutes=i), False)
+            for i in range(count)]
+
+
+def test_feed_ids_round_trip():
+    assert parse_feed_id("b12") == ('broadcast', 12)
+    assert parse_feed_id("12") == ('notification', 12)
+    assert parse_feed_id(12) == ('notification', 12)
+    for bad in ("b", "bx", "", "12b", None):
+        with pytest.raises(ValueError):
+            parse_feed_id(bad)
+
+
+def test_cursor_round_trip_and_malformed_cursors():
+    at = datetime(2026, 5, 1, 12, 0, 30, 123456)
+    assert decode_cursor(encode_cursor(at, "b7")) == (at, "b7")
+    assert decode_cursor(encode_cursor(at, "7")) == (at, "7")
+    assert decode_cursor(None) is None and decode_cursor("") is None
+    for bad in ("no-separator", "2026-05-01T12:00:00_bx", "yesterday_7", "_7"):
+        with pytest.raises(ValueError):
+            decode_cursor(bad)
+
+
+def test_next_cursor_only_when_the_extra_row_came_back():
+    rows = _rows(4)
+    items, cursor = split_page(rows, 3)
+    assert [item['id'] for item in items] == ["0", "b1", "2"]
+    assert decode_cursor(cursor) == (rows[2][5], "2")
+    assert items[1]['created_at'] == rows[1][5].isoformat()
+
+    items, cursor = split_page(rows[:3], 3)
+    assert len(items) == 3 and cursor is None
+    assert split_page([], 3) == ([], None)
+
+
+def test_page_limit_is_clamped():
+    assert page_limit(0) == 1
+    assert page_limit(20) == 20
+    assert page_limit(10_000) == 100
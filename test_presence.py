@@ -0,0 +1,50 @@
+"""
+Tests for the socket presence registry.
+"""
+
+from realtime.presence import ADMIN, USER, PresenceRegistry
+
+
+def _registry(clock):
+    changes = []
+    registry = PresenceRegistry(on_change=lambda *c: changes.append(c), ttl=60, clock=clock)
+    return registry, changes
+
+
+def test_one_transition_per_identity_across_tabs(clock):
+    registry, changes = _registry(clock)
+    registry.connect("a", USER, 7)
+    registry.connect("b", USER, 7)
+    registry.connect("c", ADMIN, "support")
+    assert registry.online(USER) == [7] and registry.count(ADMIN) == 1
+    registry.disconnect("a")
+    assert registry.is_online(USER, 7)
+    registry.disconnect("b")
+    registry.disconnect("b")
+    assert not registry.is_online(USER, 7)
+    assert changes == [(USER, 7, True), (ADMIN, "support", True), (USER, 7, False)]
+
+
+def test_silent_sockets_expire_and_heartbeats_keep_them(clock):
+    registry, changes = _registry(clock)
+    registry.connect("a", USER, 1)
+    registry.connect("b", USER, 2)
+    clock.now += 45
+    assert registry.heartbeat("a")
+    clock.now += 30
+    registry.expire()
+    assert registry.online(USER) == [1]
+    assert changes[-1] == (USER, 2, False)
+    assert not registry.heartbeat("b")
+
+
+def test_remote_workers_are_merged(clock):
+    registry, changes = _registry(clock)
+    registry.connect("a", USER, 1)
+    registry.merge_remote({(USER, 1): clock.now, (USER, 9): clock.now})
+    assert sorted(registry.online(USER)) == [1, 9]
+    assert registry.local_snapshot() == {(USER, 1): clock.now}
+    registry.merge_remote({})
+    assert registry.online(USER) == [1]
+    registry.disconnect("a")
+    assert changes == [(USER, 1, True), (USER, 9, True), (USER, 9, False), (USER, 1, False)]
@@ -0,0 +1,26 @@
+"""
+Tests for server-side booking totals.
+"""
+
+from pricing import HOTEL_DISCOUNT, hotel_total, nights_between, surge_price, technician_total
+
+
+def test_nights_between_dates():
+    assert nights_between("2026-03-01", "2026-03-04") == 3
+    assert nights_between("2026-03-04", "2026-03-01") == 1
+    assert nights_between(None, "2026-03-04") == 1
+    assert nights_between("soon", "later") == 1
+
+
+def test_hotel_total_matches_the_results_page():
+    # 2 rooms x 3 nights at 5000, less 10%, plus 18% GST
+    breakdown = hotel_total(5000, 3, 2, discount=HOTEL_DISCOUNT)
+    assert breakdown.subtotal == 27000
+    assert breakdown.total == 31860
+
+
+def test_technician_fee_follows_urgency():
+    assert surge_price(800, "normal") == 800
+    assert surge_price(800, "Urgent") == 1200
+    assert surge_price(801, "emergency") == 1602
+    assert technician_total(surge_price(800, "urgent")).total == 1416
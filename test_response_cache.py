@@ -0,0 +1,64 @@
+"""
+Tests for the table-versioned JSON response cache.
+"""
+
+from response_cache import ResponseCache
+
+
+def test_entry_served_until_a_table_it_reads_changes(clock):
+    cache = ResponseCache(clock=clock)
+    key = ('api_user_reports', '7', b'')
+    assert cache.lookup(key, ['reports']) is None
+
+    entry = cache.store(key, cache.versions(['reports']), b'{"reports": []}', ttl=300)
+    assert cache.lookup(key, ['reports']) == entry
+
+    cache.invalidate('users')
+    assert cache.lookup(key, ['reports']) == entry
+    cache.invalidate('reports')
+    assert cache.lookup(key, ['reports']) is None
+
+
+def test_entry_expires_after_ttl(clock):
+    cache = ResponseCache(clock=clock)
+    cache.store('stats', cache.versions(['users']), b'{}', ttl=30)
+    clock.now += 29
+    assert cache.lookup('stats', ['users']) is not None
+    clock.now += 1
+    assert cache.lookup('stats', ['users']) is None
+
+
+def test_database_versions_polled_once_per_version_ttl(clock):
+    remote = {'requests': 4}
+    calls = []
+
+    def load(tables):
+        calls.append(set(tables))
+        return dict(remote)
+
+    cache = ResponseCache(load, version_ttl=1.0, clock=clock)
+    cache.store('users', cache.versions(['users', 'requests']), b'[]', ttl=30)
+    remote['requests'] = 5
+    assert cache.lookup('users', ['users', 'requests']) is not None
+    assert len(calls) == 1
+
+    clock.now += 1
+    assert cache.lookup('users', ['users', 'requests']) is None
+    assert calls == [{'users', 'requests'}] * 2
+
+
+def test_etag_follows_body_and_metrics_count_savings(clock):
+    cache = ResponseCache(clock=clock)
+    first = cache.store('a', (0,), b'{"x": 1}', ttl=60)
+    assert cache.store('b', (0,), b'{"x": 1}', ttl=60).etag == first.etag
+    assert cache.store('c', (0,), b'{"x": 2}', ttl=60).etag != first.etag
+
+    cache.lookup('a', ['reports'])
+    cache.lookup('missing', ['reports'])
+    cache.record_not_modified(first)
+    metrics = cache.metrics()
+    assert metrics['hits'] == 1 and metrics['misses'] == 1
+    assert metrics['hit_ratio'] == 0.5
+    assert metrics['not_modified'] == 1
+    assert metrics['bytes_saved'] == len(b'{"x": 1}')
+    assert metrics['entries'] == 3
@@ -0,0 +1,27 @@
+"""
+Tests for the cached schema capabilities registry.
+"""
+
+from schema import SchemaCapabilities
+
+
+def test_columns_are_read_once_until_refreshed():
+    tables = {'users': {'id', 'email', 'phone', 'profile_picture'}, 'lifestyle_profiles': {'city'}}
+    calls = []
+
+    def load(names):
+        calls.append(tuple(names))
+        return {table: set(columns) for table, columns in tables.items()}
+
+    schema = SchemaCapabilities(load)
+    assert schema.present('users', ['address', 'profile_picture', 'phone']) == ['profile_picture', 'phone']
+    assert schema.has_profile_picture_column
+    assert not schema.has_profile_coordinates
+    assert schema.columns('support_messages') == frozenset()
+    assert len(calls) == 1
+
+    tables['lifestyle_profiles'] |= {'latitude', 'longitude'}
+    assert not schema.has_profile_coordinates
+    schema.refresh()
+    assert schema.has_profile_coordinates
+    assert len(calls) == 2
@@ -0,0 +1,204 @@
+"""
+Tests for the sharded artifact store.
+"""
+
+import io
+import json
+import os
+import time
+
+import pytest
+
+from storage.assets import AssetManifest, build_assets, minify_css
+from storage.responsive import ImageManifest, derivative_name, is_derivative, plan_widths
+from storage.serving import ETagCache, accel_location, etag_matches
+from storage.store import ArtifactStore, shard_dir
+from storage.uploads import LimitedStream, UploadTooLarge, source_name, variant_name
+from tickets.cache import ticket_dir
+
+
+def test_versions_of_a_name_share_a_shard(tmp_path):
+    a = shard_dir(tmp_path, "ticket_CAR-7_0123456789abcdef.pdf")
+    b = shard_dir(tmp_path, "ticket_CAR-7_fedcba9876543210.pdf")
+    assert a == b == ticket_dir(tmp_path, "CAR-7")
+    assert a.parent.parent == tmp_path / "names"
+
+
+def test_identical_uploads_share_one_object(tmp_path):
+    store = ArtifactStore(tmp_path, "/static/uploads/support_files", dedupe=True)
+    first = store.save_stream("a_photo.jpg", io.BytesIO(b"same bytes"))
+    second = store.save_stream("b_photo.jpg", io.BytesIO(b"same bytes"))
+    assert first.read_bytes() == second.read_bytes() == b"same bytes"
+    assert os.path.samefile(first, second)
+    assert len(list(store._walk("objects"))) == 1
+    assert list(store._walk("tmp")) == []
+    assert store.url_for("a_photo.jpg") == "/static/uploads/support_files/a_photo.jpg"
+
+
+def test_oversized_upload_is_rejected_without_leftovers(tmp_path):
+    store = ArtifactStore(tmp_path, "/static/uploads/support_files", dedupe=True)
+    with pytest.raises(UploadTooLarge):
+        store.save_stream("big.pdf", LimitedStream(io.BytesIO(b"x" * 2048), limit=1024))
+    assert store.resolve("big.pdf") is None
+    assert list(store._walk("tmp")) == [] and list(store._walk("objects")) == []
+    store.save_stream("ok.pdf", LimitedStream(io.BytesIO(b"x" * 1024), limit=1024))
+    assert store.resolve("ok.pdf").stat().st_size == 1024
+
+
+def test_variant_names_map_back_to_their_original():
+    name = variant_name("user_3_1767535923.png", "thumb")
+    assert name == "user_3_1767535923.png.thumb.jpg"
+    assert source_name(name) == "user_3_1767535923.png"
+    assert source_name("photo.jpg") is None
+    assert source_name("photo.large.jpg") is None
+
+
+def test_legacy_files_resolve_then_migrate(tmp_path):
+    legacy = tmp_path / "flat"
+    legacy.mkdir()
+    (legacy / "report_1.pdf").write_bytes(b"old")
+    store = ArtifactStore(tmp_path / "store", "/static/reports", legacy_dir=legacy)
+    assert store.resolve("report_1.pdf") == legacy / "report_1.pdf"
+    assert store.migrate_legacy() == 1
+    assert store.resolve("report_1.pdf") == store.path_for("report_1.pdf")
+    assert list(legacy.iterdir()) == []
+    assert store.name_from_url("/static/reports/report_1.pdf") == "report_1.pdf"
+
+
+def test_sweep_expires_names_and_drops_orphaned_objects(tmp_path):
+    store = ArtifactStore(tmp_path, "/x", retention_days=30, dedupe=True)
+    old = store.save_stream("old.txt", io.BytesIO(b"old"))
+    store.save_stream("new.txt", io.BytesIO(b"new"))
+    past = time.time() - 31 * 86400
+    os.utime(old, (past, past))
+    assert store.sweep() == {"expired": 1, "orphans": 1, "stale_tmp": 0}
+    assert store.resolve("old.txt") is None
+    assert store.resolve("new.txt").read_bytes() == b"new"
+    assert len(list(store._walk("objects"))) == 1
+
+
+def test_sweep_keeps_expired_names_still_referenced(tmp_path):
+    store = ArtifactStore(tmp_path, "/x", retention_days=30, referenced=lambda names: {"kept.pdf"})
+    past = time.time() - 31 * 86400
+    for name in ("kept.pdf", "gone.pdf"):
+        os.utime(store.save_stream(name, io.BytesIO(b"pdf")), (past, past))
+    assert store.sweep()["expired"] == 1
+    assert store.resolve("kept.pdf") and store.resolve("gone.pdf") is None
+
+    def broken(names):
+        raise RuntimeError("database down")
+
+    store.referenced = broken
+    assert store.sweep()["expired"] == 0
+    assert store.resolve("kept.pdf")
+
+
+def test_upload_relinks_an_object_swept_mid_write(tmp_path):
+    store = ArtifactStore(tmp_path, "/x", dedupe=True)
+    first = store.save_stream("a.txt", io.BytesIO(b"same"))
+    first.unlink()
+    assert store.sweep()["orphans"] == 1
+    second = store.save_stream("b.txt", io.BytesIO(b"same"))
+    assert second.read_bytes() == b"same" and second.stat().st_nlink == 2
+    assert store.sweep()["orphans"] == 0
+
+
+def test_no_hard_links_disables_dedupe(tmp_path, monkeypatch):
+    def no_link(src, dst):
+        raise OSError("hard links not supported")
+
+    monkeypatch.setattr(os, "link", no_link)
+    store = ArtifactStore(tmp_path, "/x", dedupe=True)
+    assert not store.dedupe
+    store.save_stream("a.txt", io.BytesIO(b"kept"))
+    assert store.sweep() == {"expired": 0, "orphans": 0, "stale_tmp": 0}
+    assert store.resolve("a.txt").read_bytes() == b"kept"
+
+
+@pytest.mark.parametrize("name", ["", "../etc/passwd", "a/b.pdf", ".hidden"])
+def test_rejects_unsafe_names(tmp_path, name):
+    store = ArtifactStore(tmp_path, "/x")
+    with pytest.raises(ValueError):
+        store.path_for(name)
+    assert store.resolve(name) is None
+
+
+def test_etag_is_hashed_once_per_file_version(tmp_path):
+    path = tmp_path / "ticket.pdf"
+    path.write_bytes(b"%PDF one")
+    etags = ETagCache()
+    first = etags.get(path)
+    assert etags.get(path) == first and etags.hashed_bytes == 8
+    path.write_bytes(b"%PDF two!")
+    os.utime(path, ns=(time.time_ns() + 10**9,) * 2)
+    assert etags.get(path) != first and etags.hashed_bytes == 17
+
+
+def test_if_none_match_parsing():
+    assert etag_matches('"abc"', "abc")
+    assert etag_matches('W/"abc"', "abc")
+    assert etag_matches('"x", "abc"', "abc")
+    assert etag_matches("*", "abc")
+    assert not etag_matches('"abcd"', "abc")
+    assert not etag_matches(None, "abc")
+
+
+def test_accel_location_maps_only_known_directories(tmp_path):
+    locations = {tmp_path / "storage": "/_protected/storage/"}
+    assert (accel_location(tmp_path / "storage" / "names" / "ab" / "cd" / "t.pdf", locations)
+            == "/_protected/storage/names/ab/cd/t.pdf")
+    assert accel_location(tmp_path / "elsewhere.pdf", locations) is None
+
+
+def test_css_minifier_keeps_strings_and_selector_meaning():
+    css = '/* header */\na :hover , b > c {\n  content: "a  /* b */ ;";\n  margin : 0 auto ;\n}\n@media (max-width: 600px) and (hover) { x { y: z; } }\n'
+    assert minify_css(css) == (
+        'a :hover,b>c{content:"a  /* b */ ;";margin :0 auto}'
+        '@media (max-width:600px) and (hover){x{y:z}}'
+    )
+
+
+def test_built_assets_are_fingerprinted_and_negotiated(tmp_path):
+    src, out = tmp_path / "static", tmp_path / "static" / "dist"
+    (src / "css").mkdir(parents=True)
+    (src / "css" / "site.css").write_text("body {\n  background: url(../images/bg.png);\n}\n" * 50)
+    manifest = build_assets(src, out)
+    hashed = manifest["css/site.css"]
+    assert hashed.startswith("css/site.") and hashed.endswith(".css")
+    assert "url(/static/images/bg.png)" in (out / hashed).read_text()
+    assert build_assets(src, out) == manifest
+
+    assets = AssetManifest(out)
+    assert assets.lookup("css/site.css") == hashed
+    assert assets.lookup("css/other.css") is None
+    path, encoding = assets.negotiate(hashed, "gzip, deflate;q=0.5")
+    assert encoding == "gzip" and path.name.endswith(".css.gz")
+    assert assets.negotiate(hashed, "gzip;q=0") == (out / hashed, None)
+    assert assets.negotiate("css/site.000000000000.css", "gzip") is None
+
+
+def test_responsive_picture_uses_built_widths_and_formats(tmp_path):
+    (tmp_path / "images").mkdir()
+    (tmp_path / "images" / "responsive.json").write_text(json.dumps({
+        "images/mumbai/m1.jpg": {"width": 4000, "height": 3000, "widths": [320, 640, 960],
+                                 "formats": ["webp", "jpeg"]},
+    }))
+    images = ImageManifest(tmp_path)
+    html = images.picture("images/mumbai/m1.jpg", "100vw", alt='Taj "Palace"', class_="hotel-image")
+    assert html.startswith('<picture><source type="image/webp" srcset="/static/images/mumbai/m1.w320.webp 320w, ')
+    assert "avif" not in html
+    assert 'src="/static/images/mumbai/m1.w640.jpg"' in html
+    assert 'alt="Taj &quot;Palace&quot;"' in html and 'class="hotel-image"' in html
+    assert 'width="4000" height="3000"' in html and 'loading="lazy"' in html
+
+    assert images.picture("images/other.jpg", "100vw").startswith('<img src="/static/images/other.jpg"')
+    unsplash = images.picture("https://images.unsplash.com/photo-1?fit=crop&w=800&q=80", "50vw")
+    assert "w=320&amp;q=80&amp;auto=format 320w" in unsplash
+    assert 'src="https://images.unsplash.com/photo-1?fit=crop&amp;w=640&amp;' in unsplash
+
+
+def test_derivative_names_and_width_plan():
+    assert derivative_name("images/a/b.jpg", 640, "jpeg") == "images/a/b.w640.jpg"
+    assert is_derivative("b.w640.webp") and not is_derivative("b.jpg") and not is_derivative("web.jpg")
+    assert plan_widths(700) == [320, 480, 640]
+    assert plan_widths(200) == [200]
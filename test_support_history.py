@@ -0,0 +1,62 @@
+"""
+Tests for support chat history paging.
+"""
+
+import pytest
+
+from support.history import MAX_PAGE_SIZE, PAGE_SIZE, fetch_page, page_payload, parse_page_args
+
+
+class RecordingCursor:
+    """Returns canned rows and keeps the last query's parameters."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.params = None
+
+    def execute(self, sql, params):
+        self.sql, self.params = sql, params
+
+    def fetchall(self):
+        return self.rows[:self.params[-1]]
+
+
+def test_parse_page_args():
+    assert parse_page_args({}) == {'before_id': None, 'after_id': None, 'limit': PAGE_SIZE}
+    assert parse_page_args({'before_id': '40', 'limit': '10'}) == {'before_id': 40, 'after_id': None, 'limit': 10}
+    assert parse_page_args({'after_id': '0', 'before_id': ''})['after_id'] == 0
+    assert parse_page_args({'limit': '0'}, default_limit=5)['limit'] == 5
+    assert parse_page_args({'limit': str(MAX_PAGE_SIZE + 1)})['limit'] == MAX_PAGE_SIZE
+
+
+@pytest.mark.parametrize("args", [
+    {'before_id': 'abc'},
+    {'after_id': '1.5'},
+    {'before_id': '-1'},
+    {'limit': '-5'},
+    {'before_id': '10', 'after_id': '5'},
+])
+def test_parse_page_args_rejects_bad_input(args):
+    with pytest.raises(ValueError):
+        parse_page_args(args)
+
+
+def test_pages_come_back_oldest_first_with_has_more():
+    newest_first = [(i,) for i in range(10, 0, -1)]
+    cur = RecordingCursor(newest_first)
+    rows, has_more = fetch_page(cur, 7, before_id=11, limit=3)
+    assert rows == [(8,), (9,), (10,)] and has_more
+    assert cur.params == (7, 11, 4)
+
+    rows, has_more = fetch_page(RecordingCursor(newest_first[:3]), 7, limit=3)
+    assert rows == [(8,), (9,), (10,)] and not has_more
+
+    rows, has_more = fetch_page(RecordingCursor([(4,), (5,)]), 7, after_id=3, limit=3)
+    assert rows == [(4,), (5,)] and not has_more
+
+
+def test_page_payload_cursors():
+    messages = [{'id': 4}, {'id': 5}]
+    assert page_payload(messages, True) == {'messages': messages, 'has_more': True, 'before_id': 4, 'after_id': 5}
+    assert page_payload(messages, False, after_id=3)['before_id'] is None
+    assert page_payload([], False, after_id=3)['after_id'] == 3
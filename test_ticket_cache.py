@@ -0,0 +1,79 @@
+"""
+Tests for the content-addressed ticket cache.
+"""
+
+import os
+import time
+
+import pytest
+
+from storage.store import tmp_file
+from tickets.cache import cached_ticket, latest_ticket, prune_versions, remove_tickets, ticket_key
+
+
+def _builder(calls):
+    def build(path):
+        calls.append(path)
+        path.write_bytes(b"%PDF-1.4 ticket")
+    return build
+
+
+def _render(root, booking_id, details, build):
+    return cached_ticket(root / "names", booking_id, "Car Booking", details, 1, build,
+                         lambda name: tmp_file(root, name))
+
+
+@pytest.fixture
+def root(tmp_path):
+    (tmp_path / "names").mkdir()
+    (tmp_path / "tmp").mkdir()
+    return tmp_path
+
+
+def test_key_ignores_ticket_bookkeeping_and_key_order():
+    details = {"hotel_name": "Sea Breeze", "rooms": 1}
+    same = {"rooms": 1, "hotel_name": "Sea Breeze", "ticket_pdf_url": "/static/tickets/x.pdf",
+            "ticket_status": "ready"}
+    assert ticket_key("HOTEL-1", "Hotel Booking", details, 1) == ticket_key("HOTEL-1", "Hotel Booking", same, 1)
+    assert ticket_key("HOTEL-1", "Hotel Booking", details, 1) != ticket_key("HOTEL-1", "Hotel Booking", details, 2)
+    assert ticket_key("HOTEL-1", "Hotel Booking", details, 1) != ticket_key("HOTEL-1", "Hotel Booking", {**details, "rooms": 2}, 1)
+
+
+def test_unchanged_booking_is_not_rendered_again(root):
+    calls = []
+    first = _render(root, "CAR-7", {"pickup": "Pune"}, _builder(calls))
+    os.utime(root / "names" / first, (1, 1))
+    again = _render(root, "CAR-7", {"pickup": "Pune", "ticket_status": "ready"}, _builder(calls))
+    assert first == again and len(calls) == 1
+    assert (root / "names" / first).read_bytes().startswith(b"%PDF")
+    assert (root / "names" / first).stat().st_mtime > 1
+    assert calls[0].parent == root / "tmp" and list((root / "tmp").iterdir()) == []
+
+
+def test_prune_keeps_the_current_version_and_newer_ones(root):
+    names = root / "names"
+    (names / "ticket_CAR-7.pdf").write_bytes(b"legacy")
+    (names / "ticket_CAR-77.pdf").write_bytes(b"other booking")
+    old = _render(root, "CAR-7", {"pickup": "Pune"}, _builder([]))
+    new = _render(root, "CAR-7", {"pickup": "Mumbai"}, _builder([]))
+    assert old != new and (names / old).exists()
+    os.utime(names / "ticket_CAR-7.pdf", (1, 1))
+    os.utime(names / old, (1, 1))
+    newer = _render(root, "CAR-7", {"pickup": "Goa"}, _builder([]))
+    os.utime(names / newer, (time.time() + 60,) * 2)
+
+    assert prune_versions(names, "CAR-7", new) == 2
+    assert sorted(p.name for p in names.iterdir()) == sorted([new, newer, "ticket_CAR-77.pdf"])
+    assert latest_ticket(names, "CAR-7") == newer
+    assert remove_tickets(names, "CAR-7") == 2
+    assert latest_ticket(names, "CAR-7") is None
+
+
+def test_failed_render_leaves_nothing_behind(root):
+    def build(path):
+        path.write_bytes(b"%PDF-half")
+        raise RuntimeError("render failed")
+
+    with pytest.raises(RuntimeError):
+        _render(root, "TECH-3", {}, build)
+    assert list((root / "names").iterdir()) == [] and list((root / "tmp").iterdir()) == []
@@ -0,0 +1,89 @@
+"""
+Tests for resumable chunked uploads.
+"""
+
+import hashlib
+
+import pytest
+
+from realtime.transfers import ChunkedUploads, TransferError
+from storage.store import ArtifactStore
+from storage.uploads import UploadTooLarge
+
+
+def _uploads(tmp_path, **kwargs):
+    store = ArtifactStore(tmp_path, "/static/uploads/support_files", dedupe=True)
+    return store, ChunkedUploads(store, chunk_size=4, **kwargs)
+
+
+def test_chunks_resume_from_the_acknowledged_offset(tmp_path):
+    store, uploads = _uploads(tmp_path)
+    data = b"0123456789"
+    upload = uploads.begin("admin", "notes.txt", len(data), limit=100,
+                           sha256=hashlib.sha256(data).hexdigest())
+    uploads.write(upload.id, "admin", 0, data[:4])
+    # A retried chunk and a chunk from the future are both refused with the expected offset
+    for offset in (0, 8):
+        with pytest.raises(TransferError) as e:
+            uploads.write(upload.id, "admin", offset, data[offset:offset + 4])
+        assert e.value.offset == 4
+
+    # Reconnect: begin with the same id continues the same upload
+    resumed = uploads.begin("admin", "ignored.txt", 1, limit=100, upload_id=upload.id)
+    assert resumed is upload and resumed.offset == 4
+    uploads.write(upload.id, "admin", 4, data[4:8])
+    assert uploads.write(upload.id, "admin", 8, data[8:]).complete
+    uploads.finish(upload.id, "admin")
+    assert store.resolve("notes.txt").read_bytes() == data
+    assert list(store._walk("tmp")) == []
+
+
+def test_limits_and_ownership(tmp_path):
+    _, uploads = _uploads(tmp_path, max_per_owner=2)
+    with pytest.raises(UploadTooLarge):
+        uploads.begin("admin", "big.pdf", 101, limit=100)
+    first = uploads.begin("admin", "a.pdf", 8, limit=100)
+    uploads.begin("admin", "b.pdf", 8, limit=100)
+    with pytest.raises(TransferError):
+        uploads.begin("admin", "c.pdf", 8, limit=100)
+    with pytest.raises(TransferError):
+        uploads.write(first.id, "someone-else", 0, b"abcd")
+    with pytest.raises(TransferError):
+        uploads.write(first.id, "admin", 0, b"too long")
+    assert uploads.cancel(first.id, "admin")
+    uploads.begin("admin", "c.pdf", 8, limit=100)
+
+
+def test_checksum_mismatch_and_idle_uploads_are_discarded(tmp_path, clock):
+    store, uploads = _uploads(tmp_path, idle_ttl=60, clock=clock)
+    bad = uploads.begin("admin", "x.txt", 4, limit=100, sha256="0" * 64)
+    uploads.write(bad.id, "admin", 0, b"abcd")
+    with pytest.raises(TransferError):
+        uploads.finish(bad.id, "admin")
+    assert store.resolve("x.txt") is None
+
+    idle = uploads.begin("admin", "y.txt", 8, limit=100)
+    clock.now += 61
+    assert uploads.expire() == 1
+    assert not idle.path.exists()
+    assert uploads.begin("admin", "y.txt", 8, limit=100, upload_id=idle.id).id != idle.id
+
+
+def test_store_errors_come_back_as_transfer_errors(tmp_path):
+    store, uploads = _uploads(tmp_path)
+    upload = uploads.begin("admin", "z.txt", 8, limit=100)
+    uploads.write(upload.id, "admin", 0, b"abcd")
+    upload.path.unlink()
+    upload.path.mkdir()
+    with pytest.raises(TransferError) as e:
+        uploads.write(upload.id, "admin", 4, b"efgh")
+    assert e.value.offset == 4
+
+    upload.path.rmdir()
+    upload.path.write_bytes(b"abcd")
+    uploads.write(upload.id, "admin", 4, b"efgh")
+    store.path_for("z.txt", create=True).mkdir()
+    with pytest.raises(TransferError) as e:
+        uploads.finish(upload.id, "admin")
+    assert e.value.offset is None
+    assert list(store._walk("tmp")) == []
@@ -0,0 +1,58 @@
+"""
+Tests for the in-memory unread counters.
+"""
+
+from realtime.counters import NOTIFICATIONS, SUPPORT, UnreadCounters
+
+
+def _counters(db, maxsize=100):
+    loads, pushed = [], []
+
+    def load(user_id):
+        loads.append(user_id)
+        return dict(db.get(user_id, {}))
+
+    counters = UnreadCounters(load, on_change=lambda uid, c: pushed.append((uid, c)), maxsize=maxsize)
+    return counters, loads, pushed
+
+
+def test_loads_once_then_writes_keep_counts_current():
+    counters, loads, pushed = _counters({1: {NOTIFICATIONS: 2, SUPPORT: 1}})
+    assert counters.get(1) == {NOTIFICATIONS: 2, SUPPORT: 1}
+    counters.incr(1, NOTIFICATIONS)
+    counters.reset(1, SUPPORT)
+    counters.reset(1, SUPPORT)
+    assert counters.get(1) == {NOTIFICATIONS: 3, SUPPORT: 0}
+    assert loads == [1]
+    assert pushed == [(1, {NOTIFICATIONS: 3, SUPPORT: 1}), (1, {NOTIFICATIONS: 3, SUPPORT: 0})]
+
+
+def test_writes_for_uncached_users_are_left_to_the_next_load():
+    counters, loads, pushed = _counters({})
+    counters.incr(5, SUPPORT)
+    counters.incr_all(NOTIFICATIONS)
+    assert pushed == [] and loads == []
+    assert counters.get(5) == {NOTIFICATIONS: 0, SUPPORT: 0}
+
+
+def test_reconcile_corrects_drift_and_pushes_it():
+    db = {1: {NOTIFICATIONS: 1}, 2: {SUPPORT: 4}}
+    counters, _, pushed = _counters(db)
+    counters.get(1)
+    counters.get(2)
+    counters.incr_all(NOTIFICATIONS)
+    db[1] = {NOTIFICATIONS: 2}
+    assert counters.reconcile() == 1
+    assert counters.get(2) == {NOTIFICATIONS: 0, SUPPORT: 4}
+    assert pushed == [(2, {NOTIFICATIONS: 0, SUPPORT: 4})]
+
+
+def test_least_recently_read_users_are_evicted():
+    counters, loads, _ = _counters({}, maxsize=2)
+    counters.get(1)
+    counters.get(2)
+    counters.get(1)
+    counters.get(3)
+    counters.get(1)
+    counters.get(2)
+    assert loads == [1, 2, 3, 2]
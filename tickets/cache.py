@@ -0,0 +1,141 @@
+"""Content-addressed store for rendered ticket PDFs.
+
+A ticket's file name carries a digest of everything that shapes the PDF:
+booking id, service type, the booking details and the template version. If
+an admin re-sends a ticket for a booking that has not changed, the file
+already exists and nothing is rendered. New files are built in the store's
+``tmp/`` directory and renamed into place, so a reader sees either no file or
+a complete one, and the sweeper clears what a crash leaves behind. Once the
+booking's row points at a new version, ``prune_versions`` removes the older
+ones.
+"""
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Callable
+
+from storage.store import shard_dir
+
+logger = logging.getLogger(__name__)
+
+DIGEST_CHARS = 16
+# Bookkeeping the ticket itself writes back into details; it must not change the key
+_VOLATILE_PREFIX = "ticket_"
+
+
+def canonical_details(details: Any) -> str:
+    """Stable JSON for the parts of ``details`` that appear on the ticket."""
+    if isinstance(details, dict):
+        details = {k: v for k, v in details.items() if not str(k).startswith(_VOLATILE_PREFIX)}
+    return json.dumps(details, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def ticket_key(booking_id: str, service_type: str, details: Any, version: int) -> str:
+    payload = "\n".join((str(booking_id), str(service_type), canonical_details(details), str(version)))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:DIGEST_CHARS]
+
+
+def ticket_filename(booking_id: str, key: str) -> str:
+    return f"ticket_{booking_id}_{key}.pdf"
+
+
+def ticket_dir(tickets_root: Path, booking_id: str) -> Path:
+    """Shard of the ticket store that holds every version of a booking's ticket."""
+    return shard_dir(tickets_root, f"ticket_{booking_id}.pdf")
+
+
+def _versions(tickets_dir: Path, booking_id: str) -> list[Path]:
+    """Every stored ticket for a booking, including the old unversioned name."""
+    pattern = f"ticket_{glob.escape(str(booking_id))}_{'[0-9a-f]' * DIGEST_CHARS}.pdf"
+    paths = list(tickets_dir.glob(pattern))
+    legacy = tickets_dir / f"ticket_{booking_id}.pdf"
+    if legacy.exists():
+        paths.append(legacy)
+    return paths
+
+
+def cached_ticket(
+    tickets_dir: Path,
+    booking_id: str,
+    service_type: str,
+    details: Any,
+    version: int,
+    build: Callable[[Path], None],
+    tmp_path: Callable[[str], Path],
+) -> str:
+    """Return the ticket's file name, calling ``build(path)`` only on a cache miss.
+
+    ``tmp_path(name)`` gives the scratch file to build into. A hit refreshes
+    the file's mtime, so it counts as the newest version.
+    """
+    tickets_dir = Path(tickets_dir)
+    filename = ticket_filename(booking_id, ticket_key(booking_id, service_type, details, version))
+    target = tickets_dir / filename
+    try:
+        os.utime(target)
+        return filename
+    except FileNotFoundError:
+        pass
+
+    tmp = tmp_path(filename)
+    try:
+        build(tmp)
+        os.replace(tmp, target)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return filename
+
+
+def prune_versions(tickets_dir: Path, booking_id: str, current: str) -> int:
+    """Remove a booking's ticket versions older than ``current``.
+
+    Call this only after the booking's ``ticket_pdf_url`` points at
+    ``current``. Versions written after it are left alone.
+    """
+    try:
+        cutoff = (Path(tickets_dir) / current).stat().st_mtime
+    except FileNotFoundError:
+        return 0
+    removed = 0
+    for old in _versions(Path(tickets_dir), booking_id):
+        if old.name == current:
+            continue
+        try:
+            if old.stat().st_mtime < cutoff:
+                old.unlink()
+                removed += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove superseded ticket {old.name}: {e}")
+    return removed
+
+
+def latest_ticket(tickets_dir: Path, booking_id: str) -> str | None:
+    """File name of the newest stored ticket for a booking, if any."""
+    newest, newest_mtime = None, -1.0
+    for path in _versions(Path(tickets_dir), booking_id):
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:  # superseded while we looked
+            continue
+        if mtime > newest_mtime:
+            newest, newest_mtime = path.name, mtime
+    return newest
+
+
+def remove_tickets(tickets_dir: Path, booking_id: str) -> int:
+    removed = 0
+    for path in _versions(Path(tickets_dir), booking_id):
+        try:
+            path.unlink()
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
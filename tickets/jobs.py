@@ -0,0 +1,229 @@
+"""Durable queue of PDF ticket jobs.
+
+Confirm endpoints insert a ``ticket_jobs`` row in the same transaction as the
+booking, so a ticket is never lost when the web process dies between the
+INSERT and the render. The worker claims due rows with ``SKIP LOCKED``; a
+claim also acts as a lease, and rows whose lease ran out (a worker crashed
+mid-render) become claimable again.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from db import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+# A render that takes longer than this is killed and retried
+JOB_TIMEOUT_SECS = 60
+# Retries back off 5s, 10s, 20s, ... capped at five minutes
+RETRY_BASE_SECS = 5
+RETRY_MAX_SECS = 300
+
+
+def retry_delay(attempts: int) -> int:
+    """Seconds to wait before retrying a job that has failed ``attempts`` times."""
+    return min(RETRY_MAX_SECS, RETRY_BASE_SECS * 2 ** max(0, attempts - 1))
+
+
+def lease_secs(batch: int, processes: int, timeout: float = JOB_TIMEOUT_SECS) -> float:
+    """Lease for a batch of ``batch`` jobs rendered ``processes`` at a time.
+
+    The last job's deadline is one ``timeout`` per round it waits through.
+    One more ``timeout`` of slack covers recording the result, so no job's
+    lease runs out while it may still be in flight.
+    """
+    rounds = -(-batch // processes)
+    return timeout * (rounds + 1)
+
+
+@dataclass(frozen=True)
+class TicketJob:
+    id: int
+    request_id: int
+    attempts: int
+    user_id: Any
+    booking_id: str
+    service_type: str
+    details: dict
+
+
+def ensure_ticket_jobs_schema() -> None:
+    """Best-effort creation of the ``ticket_jobs`` table (the project has no migrations)."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ticket_jobs (
+              id SERIAL PRIMARY KEY,
+              request_id INTEGER NOT NULL REFERENCES requests(id) ON DELETE CASCADE,
+              status TEXT NOT NULL DEFAULT 'pending',
+              attempts INTEGER NOT NULL DEFAULT 0,
+              last_error TEXT,
+              run_after TIMESTAMP NOT NULL DEFAULT NOW(),
+              locked_until TIMESTAMP,
+              created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+              updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+            )
+            """
+        )
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_ticket_jobs_due
+            ON ticket_jobs (run_after) WHERE status IN ('pending', 'running')
+            """
+        )
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Could not create ticket_jobs table: {e}")
+    finally:
+        cur.close()
+        conn.close()
+
+
+def enqueue_ticket(cur, request_id: int) -> None:
+    """Queue a ticket render on the caller's cursor, inside its transaction."""
+    cur.execute("INSERT INTO ticket_jobs (request_id) VALUES (%s)", (request_id,))
+
+
+def claim_due_jobs(limit: int, lease: float = JOB_TIMEOUT_SECS * 2) -> list[TicketJob]:
+    """Lease up to ``limit`` due jobs for ``lease`` seconds and return them with their booking rows."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            WITH claimed AS (
+              UPDATE ticket_jobs
+              SET status = 'running',
+                  attempts = attempts + 1,
+                  locked_until = NOW() + make_interval(secs => %s),
+                  updated_at = NOW()
+              WHERE id IN (
+                SELECT id FROM ticket_jobs
+                WHERE (status = 'pending' AND run_after <= NOW())
+                   OR (status = 'running' AND locked_until < NOW())
+                ORDER BY run_after
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+              )
+              RETURNING id, request_id, attempts
+            )
+            SELECT c.id, c.request_id, c.attempts, r.user_id, r.booking_id, r.service_type, r.details
+            FROM claimed c JOIN requests r ON r.id = c.request_id
+            ORDER BY c.id
+            """,
+            (lease, limit),
+        )
+        rows = cur.fetchall()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+    jobs = []
+    for job_id, request_id, attempts, user_id, booking_id, service_type, details in rows:
+        if isinstance(details, str):
+            try:
+                details = json.loads(details)
+            except ValueError:
+                details = {"raw": details}
+        jobs.append(TicketJob(job_id, request_id, attempts, user_id, booking_id, service_type, details or {}))
+    return jobs
+
+
+def _finish(job: TicketJob, job_sql: str, job_params: tuple, details_patch: dict) -> None:
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        # Merge rather than overwrite so concurrent edits to other keys survive
+        cur.execute(
+            "UPDATE requests SET details = COALESCE(details, '{}'::jsonb) || %s::jsonb WHERE id = %s",
+            (json.dumps(details_patch), job.request_id),
+        )
+        cur.execute(job_sql, job_params)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+def complete_job(job: TicketJob, ticket_url: str) -> None:
+    _finish(
+        job,
+        "UPDATE ticket_jobs SET status = 'done', last_error = NULL, locked_until = NULL, updated_at = NOW() WHERE id = %s",
+        (job.id,),
+        {
+            "ticket_pdf_url": ticket_url,
+            "ticket_generated_at": datetime.now().isoformat(),
+            "ticket_status": "ready",
+        },
+    )
+
+
+def fail_job(job: TicketJob, error: str) -> bool:
+    """Record a failed attempt. Returns True when the job has given up for good."""
+    if job.attempts >= MAX_ATTEMPTS:
+        _finish(
+            job,
+            "UPDATE ticket_jobs SET status = 'failed', last_error = %s, locked_until = NULL, updated_at = NOW() WHERE id = %s",
+            (error, job.id),
+            {"ticket_status": "failed"},
+        )
+        return True
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            UPDATE ticket_jobs
+            SET status = 'pending', last_error = %s, locked_until = NULL,
+                run_after = NOW() + make_interval(secs => %s), updated_at = NOW()
+            WHERE id = %s
+            """,
+            (error, retry_delay(job.attempts), job.id),
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+    return False
+
+
+def release_job(job: TicketJob) -> None:
+    """Hand a claimed job back untouched, without counting the attempt."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            UPDATE ticket_jobs
+            SET status = 'pending', attempts = GREATEST(attempts - 1, 0), locked_until = NULL, updated_at = NOW()
+            WHERE id = %s
+            """,
+            (job.id,),
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
@@ -0,0 +1,46 @@
+"""ReportLab rendering of booking tickets.
+
+Kept free of Flask and database imports so it can run inside the ticket
+worker's process pool as well as in the web process.
+"""
+from datetime import datetime
+
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Table, Spacer
+
+from storage.store import tmp_file
+from tickets.cache import cached_ticket, ticket_dir
+from tickets.templates import TEMPLATE_VERSION, TEMPLATES, get_assets
+
+
+def build_ticket(path, booking_id, service_type, details):
+    """Render one ticket PDF to ``path``."""
+    assets = get_assets()
+    story = assets.head(service_type)
+
+    booking_table = Table([
+        ["Booking ID:", booking_id],
+        ["Generated On:", datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
+        ["Ticket Status:", "CONFIRMED"]
+    ], colWidths=[200, 300])
+    booking_table.setStyle(assets.booking_table)
+    story += [booking_table, Spacer(1, 30)]
+
+    story += assets.details_heading()
+    template = TEMPLATES.get(service_type)
+    if template:
+        story += template.fill(details, assets)
+    story += assets.tail()
+
+    SimpleDocTemplate(str(path), pagesize=A4).build(story)
+
+
+def render_ticket(booking_id, service_type, details, tickets_root):
+    """Return the ticket's filename, rendering it only if the booking changed."""
+    directory = ticket_dir(tickets_root, booking_id)
+    directory.mkdir(parents=True, exist_ok=True)
+    return cached_ticket(
+        directory, booking_id, service_type, details, TEMPLATE_VERSION,
+        lambda path: build_ticket(path, booking_id, service_type, details),
+        lambda name: tmp_file(tickets_root, name),
+    )
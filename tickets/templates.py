@@ -0,0 +1,305 @@
+"""Precompiled ReportLab templates for booking tickets.
+
+Paragraph styles, table styles and the fixed header, terms and footer
+paragraphs are built once per process. ReportLab parses a paragraph's markup
+in its constructor, so the fixed ones are shallow-copied for each render
+instead of being rebuilt. Each service type has a ``TicketTemplate`` that
+only turns booking details into rows.
+
+Bump ``TEMPLATE_VERSION`` whenever the ticket layout changes so cached
+tickets are rendered again.
+"""
+from __future__ import annotations
+
+import copy
+import random
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import Paragraph, Spacer, Table, TableStyle
+
+TEMPLATE_VERSION = 1
+
+TEXT = colors.HexColor('#2c3e50')
+MUTED_BG = colors.HexColor('#ecf0f1')
+GRID = colors.HexColor('#bdc3c7')
+
+TERMS = (
+    "1. This ticket is non-transferable and valid only for the booked service.",
+    "2. Please present this ticket for verification at the time of service.",
+    "3. Cancellations must be made at least 24 hours in advance for full refund.",
+    "4. Concierge Lifestyle is not responsible for delays due to traffic, weather, or other unforeseen circumstances.",
+    "5. For any issues, contact support@conciergelifestyle.com or call +91-9876543210.",
+)
+
+
+class TicketAssets:
+    """Styles and fixed flowables shared by every ticket in this process."""
+
+    def __init__(self) -> None:
+        styles = getSampleStyleSheet()
+        self.title = ParagraphStyle('TitleStyle', parent=styles['Heading1'], fontSize=24,
+                                    textColor=TEXT, spaceAfter=20, alignment=TA_CENTER)
+        self.header = ParagraphStyle('HeaderStyle', parent=styles['Heading2'], fontSize=16,
+                                     textColor=colors.HexColor('#34495e'), spaceAfter=10)
+        self.normal = ParagraphStyle('NormalStyle', parent=styles['Normal'], fontSize=10, textColor=TEXT)
+        self.otp = ParagraphStyle('OTPStyle', parent=styles['Normal'], fontSize=12)
+        self.footer = ParagraphStyle('FooterStyle', parent=styles['Normal'], fontSize=9,
+                                     textColor=colors.HexColor('#7f8c8d'), alignment=TA_CENTER)
+
+        self.booking_table = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), MUTED_BG),
+            ('TEXTCOLOR', (0, 0), (-1, -1), TEXT),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('TOPPADDING', (0, 0), (-1, -1), 12),
+            ('GRID', (0, 0), (-1, -1), 1, GRID),
+        ])
+
+        self._brand = Paragraph("CONCIERGE LIFESTYLE", self.title)
+        self._details_heading = Paragraph("Booking Details", self.header)
+        self._tail = [Spacer(1, 30), Paragraph("Terms & Conditions", self.header)]
+        for term in TERMS:
+            self._tail += [Paragraph(f"• {term}", self.normal), Spacer(1, 3)]
+        self._tail += [
+            Spacer(1, 20),
+            Paragraph(
+                "Thank you for choosing Concierge Lifestyle<br/>"
+                "Your trusted partner for premium services<br/>"
+                "www.conciergelifestyle.com | support@conciergelifestyle.com",
+                self.footer,
+            ),
+        ]
+
+    def heading(self, text: str) -> Paragraph:
+        return Paragraph(text, self.header)
+
+    def head(self, service_type: str) -> list:
+        return [copy.copy(self._brand), self.heading(f"{service_type} - Booking Ticket"), Spacer(1, 20)]
+
+    def details_heading(self) -> list:
+        return [copy.copy(self._details_heading), Spacer(1, 10)]
+
+    def tail(self) -> list:
+        return [copy.copy(flowable) for flowable in self._tail]
+
+
+_assets: TicketAssets | None = None
+
+
+def get_assets() -> TicketAssets:
+    global _assets
+    if _assets is None:
+        _assets = TicketAssets()
+    return _assets
+
+
+@lru_cache(maxsize=None)
+def detail_style(accent: str, value_bg: str = '#ecf0f1', padding: int = 8, value_font: bool = True) -> TableStyle:
+    """Label column in the accent colour, values on a light background."""
+    commands = [
+        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor(accent)),
+        ('TEXTCOLOR', (0, 0), (0, -1), colors.white),
+        ('BACKGROUND', (1, 0), (1, -1), colors.HexColor(value_bg)),
+        ('TEXTCOLOR', (1, 0), (1, -1), TEXT),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ]
+    if value_font:
+        commands.append(('FONTNAME', (1, 0), (1, -1), 'Helvetica'))
+    commands += [
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), padding),
+        ('TOPPADDING', (0, 0), (-1, -1), padding),
+        ('GRID', (0, 0), (-1, -1), 1, GRID),
+    ]
+    return TableStyle(commands)
+
+
+@lru_cache(maxsize=None)
+def list_style(accent: str, valign_top: bool = False) -> TableStyle:
+    """Header row in the accent colour over a plain list."""
+    commands = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(accent)),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 9),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ('TOPPADDING', (0, 0), (-1, -1), 6),
+        ('GRID', (0, 0), (-1, -1), 1, GRID),
+    ]
+    if valign_top:
+        commands.append(('VALIGN', (0, 0), (-1, -1), 'TOP'))
+    return TableStyle(commands)
+
+
+Row = tuple[str, Callable[[dict], object]]
+Section = Callable[[dict, TicketAssets], list]
+
+
+def _get(key: str, default='N/A') -> Callable[[dict], object]:
+    return lambda d: d.get(key, default)
+
+
+def _section(title: str, rows: list, style: TableStyle, col_widths: list[int], assets: TicketAssets) -> list:
+    table = Table(rows, colWidths=col_widths)
+    table.setStyle(style)
+    return [Spacer(1, 20), assets.heading(title), Spacer(1, 10), table]
+
+
+@dataclass(frozen=True)
+class TicketTemplate:
+    service_type: str
+    accent: str
+    rows: tuple[Row, ...]
+    sections: tuple[Section, ...] = field(default=())
+
+    def fill(self, details: dict, assets: TicketAssets) -> list:
+        table = Table([[label, value(details)] for label, value in self.rows], colWidths=[200, 300])
+        table.setStyle(detail_style(self.accent))
+        story = [table]
+        for section in self.sections:
+            story += section(details, assets)
+        return story
+
+
+# ---------------------- per-service sections ----------------------
+def _driver_otp(details: dict, assets: TicketAssets) -> list:
+    otp = random.randint(1000, 9999)
+    return [
+        Spacer(1, 30),
+        assets.heading("Driver Verification"),
+        Spacer(1, 10),
+        Paragraph(f"Verification Code: <font size='20' color='#e74c3c'><b>{otp}</b></font>", assets.otp),
+        Paragraph("Show this code to your driver for verification", assets.normal),
+    ]
+
+
+def _passenger_list(details: dict, assets: TicketAssets) -> list:
+    if not details.get('passengers_details'):
+        return []
+    rows = [["Name", "Age", "Gender"]]
+    rows += [[p.get('name', '-'), str(p.get('age', '-')), p.get('gender', '-')] for p in details['passengers_details']]
+    return _section("Passenger List", rows, list_style('#3498db'), [250, 100, 150], assets)
+
+
+def _guest_list(details: dict, assets: TicketAssets) -> list:
+    if not details.get('guest_details'):
+        return []
+    rows = [["Room", "Guest Name", "Type"]]
+    rows += [
+        [f"Room {g.get('room', '-')}", f"{g.get('title', '')} {g.get('name', 'Guest')}", g.get('type', '-')]
+        for g in details['guest_details']
+    ]
+    return _section("Guest List", rows, list_style('#7f8c8d'), [80, 320, 100], assets)
+
+
+def _traveller_list(details: dict, assets: TicketAssets) -> list:
+    if not details.get('traveller_details'):
+        return []
+    rows = [["Title", "Full Name"]]
+    rows += [[p.get('title', '-'), p.get('full_name', '-')] for p in details['traveller_details']]
+    return _section("Traveller List", rows, list_style('#9b59b6'), [100, 300], assets)
+
+
+def _customer_details(details: dict, assets: TicketAssets) -> list:
+    if not details.get('customer_name'):
+        return []
+    rows = [
+        ["Customer Name:", details.get('customer_name', 'N/A')],
+        ["Customer Address:", details.get('customer_address', 'N/A')],
+        ["Primary Contact:", details.get('mobile', 'N/A')],
+        ["Alternate Contact:", details.get('alternate_phone', 'N/A')],
+        ["Email:", details.get('email', 'N/A')],
+    ]
+    style = detail_style('#d35400', value_bg='#fdebd0', padding=6, value_font=False)
+    return _section("Customer Details", rows, style, [200, 300], assets)
+
+
+def _shipping_details(details: dict, assets: TicketAssets) -> list:
+    sender, receiver = details.get('sender'), details.get('receiver')
+    if not (sender and receiver):
+        return []
+    rows = [
+        ["Sender", "Receiver"],
+        [f"Name: {sender.get('name', '-')}", f"Name: {receiver.get('name', '-')}"],
+        [f"Phone: {sender.get('phone', '-')}", f"Phone: {receiver.get('phone', '-')}"],
+        [f"Address: {sender.get('full_address', '-')}", f"Address: {receiver.get('full_address', '-')}"],
+    ]
+    return _section("Shipping Details", rows, list_style('#16a085', valign_top=True), [250, 250], assets)
+
+
+TEMPLATES: dict[str, TicketTemplate] = {t.service_type: t for t in (
+    TicketTemplate('Car Booking', '#3498db', (
+        ("Car Model:", _get('car_model')),
+        ("Cab Class:", _get('cab_class', 'Standard')),
+        ("Pickup Location:", _get('pickup')),
+        ("Drop-off Location:", _get('dropoff')),
+        ("Pickup Date:", _get('pickup_date')),
+        ("Pickup Time:", _get('pickup_time')),
+        ("Passengers:", lambda d: str(d.get('passengers', 1))),
+        ("Total Amount:", lambda d: f"₹{d.get('total_price', 0)}"),
+        ("Booking Status:", lambda d: "Confirmed"),
+    ), (_driver_otp, _passenger_list)),
+
+    TicketTemplate('Hotel Booking', '#27ae60', (
+        ("Hotel Name:", _get('hotel_name')),
+        ("Check-in Date:", _get('checkin')),
+        ("Check-out Date:", _get('checkout')),
+        ("Rooms:", lambda d: str(d.get('rooms', 1))),
+        ("Guests:", lambda d: str(d.get('guests', 1))),
+        ("Contact Email:", _get('email')),
+        ("Contact Mobile:", _get('mobile')),
+        ("Total Amount:", lambda d: f"₹{d.get('total_amount', 0)}"),
+        ("Booking Status:", lambda d: "Confirmed"),
+        ("Confirmation Number:", lambda d: f"HL-{random.randint(100000, 999999)}"),
+    ), (_guest_list,)),
+
+    TicketTemplate('Flight Booking', '#9b59b6', (
+        ("Airline:", _get('airline')),
+        ("Flight Number:", lambda d: d.get('flight_no', d.get('flight', {}).get('flight_no', 'N/A'))),
+        ("Departure:", lambda d: f"{d.get('origin', 'N/A')} ({d.get('origin_code', 'XXX')})"),
+        ("Arrival:", lambda d: f"{d.get('destination', 'N/A')} ({d.get('destination_code', 'YYY')})"),
+        ("Departure Time:", _get('departure_time')),
+        ("Arrival Time:", _get('arrival_time')),
+        ("Travel Class:", lambda d: d.get('travel_class', 'Economy').title()),
+        ("Duration:", _get('duration')),
+        ("Baggage Allowance:", _get('baggage_allowance', '20kg')),
+        ("Total Amount:", lambda d: f"₹{d.get('price', 0)}"),
+        ("PNR:", lambda d: f"{random.choice(['AI', '6E', 'SG', 'UK'])}-{random.randint(1000000, 9999999)}"),
+    ), (_traveller_list,)),
+
+    TicketTemplate('Technician Booking', '#e67e22', (
+        ("Service Type:", lambda d: d.get('service_type', 'N/A').replace('_', ' ').title()),
+        ("Technician:", _get('name', 'Assigned Technician')),
+        ("Service Date:", _get('service_date')),
+        ("Service Time:", _get('service_time')),
+        ("Location:", _get('location')),
+        ("Issue Description:", _get('description')),
+        ("Urgency:", lambda d: d.get('urgency', 'Normal').title()),
+        ("Service Charge:", lambda d: f"₹{d.get('total_price', 0)}"),
+        ("Technician ID:", _get('technician_id')),
+    ), (_customer_details,)),
+
+    TicketTemplate('Courier Booking', '#1abc9c', (
+        ("Courier Service:", _get('courier_name')),
+        ("Pickup Location:", _get('pickup_location')),
+        ("Delivery Location:", _get('dropoff_location')),
+        ("Pickup Date:", _get('pickup_date')),
+        ("Pickup Time:", _get('pickup_time')),
+        ("Package Weight:", lambda d: f"{d.get('package_weight_kg', 0)} kg"),
+        ("Courier Type:", lambda d: d.get('courier_type', 'Standard').title()),
+        ("Delivery Duration:", _get('delivery_duration')),
+        ("Shipping Cost:", lambda d: f"₹{d.get('total_price_inr', 0)}"),
+        ("Tracking ID:", lambda d: f"TRK-{random.randint(1000000000, 9999999999)}"),
+    ), (_shipping_details,)),
+)}
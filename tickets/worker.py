@@ -0,0 +1,170 @@
+"""Background renderer for queued PDF tickets.
+
+A dispatcher thread in the web process claims jobs from ``ticket_jobs`` and
+hands them to a small process pool, so ReportLab never runs on a request
+thread and a slow or crashing render cannot take the web process with it.
+Confirm endpoints call ``notify()`` after committing to skip the poll wait.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Callable
+
+from background import PeriodicWorker
+from tickets import jobs
+from tickets.cache import prune_versions, ticket_dir
+from tickets.jobs import TicketJob
+from tickets.render import render_ticket
+from tickets.templates import get_assets
+
+logger = logging.getLogger(__name__)
+
+
+class TicketWorker(PeriodicWorker):
+    name = "ticket-worker"
+    run_first = True
+
+    def __init__(
+        self,
+        tickets_dir: Path,
+        on_ready: Callable[[TicketJob, str], None],
+        on_failed: Callable[[TicketJob], None] | None = None,
+        *,
+        processes: int = 2,
+        timeout: float = jobs.JOB_TIMEOUT_SECS,
+        poll_interval: float = 5.0,
+    ) -> None:
+        # No pause between rounds: run_once waits for a wake-up or the poll interval itself
+        super().__init__(interval=0)
+        self.tickets_dir = Path(tickets_dir)
+        self.on_ready = on_ready
+        self.on_failed = on_failed
+        self.processes = processes
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._pool: ProcessPoolExecutor | None = None
+
+    def start(self) -> None:
+        super().start()
+        logger.info("Ticket worker started")
+
+    def stop(self) -> None:
+        super().stop()
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+        self._shutdown_pool(kill=False)
+
+    def notify(self) -> None:
+        """Wake the dispatcher; a job was just committed."""
+        self._wake.set()
+
+    # ---------------------- dispatch ----------------------
+    def run_once(self) -> None:
+        self._wake.clear()
+        try:
+            batch = self.processes * 2
+            claimed = jobs.claim_due_jobs(batch, jobs.lease_secs(batch, self.processes, self.timeout))
+        except Exception as e:
+            logger.error(f"Ticket worker could not claim jobs: {e}")
+            claimed = []
+        if claimed:
+            self._process(claimed)
+        else:
+            self._wake.wait(self.poll_interval)
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that runs socket and DB threads is unsafe
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=get_assets,
+            )
+        return self._pool
+
+    def _shutdown_pool(self, kill: bool) -> None:
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        if kill:
+            # A hung render never returns; the executor has no per-task cancel,
+            # so terminate its processes before dropping it.
+            for process in list((getattr(pool, "_processes", None) or {}).values()):
+                process.terminate()
+        pool.shutdown(wait=not kill, cancel_futures=True)
+
+    def _process(self, claimed: list[TicketJob]) -> None:
+        pool = self._ensure_pool()
+        started = time.monotonic()
+        futures = [
+            (job, pool.submit(render_ticket, job.booking_id, job.service_type, job.details, self.tickets_dir))
+            for job in claimed
+        ]
+        # Jobs queue behind each other in the pool, so give every job the full
+        # timeout per pool slot it had to wait for.
+        broken = False
+        for position, (job, future) in enumerate(futures):
+            if broken:
+                # The pool was torn down under this job; only keep finished renders
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    self._complete(job, f"/static/tickets/{future.result()}")
+                else:
+                    self._release(job)
+                continue
+            deadline = started + self.timeout * (position // self.processes + 1)
+            try:
+                filename = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeout:
+                self._fail(job, f"Rendering timed out after {self.timeout:.0f}s")
+                self._shutdown_pool(kill=True)
+                broken = True
+            except BrokenProcessPool as e:
+                self._fail(job, f"Render process died: {e}")
+                self._shutdown_pool(kill=True)
+                broken = True
+            except Exception as e:
+                self._fail(job, f"{type(e).__name__}: {e}")
+            else:
+                self._complete(job, f"/static/tickets/{filename}")
+
+    def _complete(self, job: TicketJob, ticket_url: str) -> None:
+        try:
+            jobs.complete_job(job, ticket_url)
+        except Exception as e:
+            # The lease runs out and the job is rendered again
+            logger.error(f"Could not record ticket for {job.booking_id}: {e}")
+            return
+        # The booking now points at the new file; older versions can go
+        prune_versions(ticket_dir(self.tickets_dir, job.booking_id), job.booking_id, ticket_url.rsplit("/", 1)[-1])
+        try:
+            self.on_ready(job, ticket_url)
+        except Exception as e:
+            logger.error(f"Ticket ready callback failed for {job.booking_id}: {e}")
+
+    def _fail(self, job: TicketJob, error: str) -> None:
+        logger.warning(f"Ticket for {job.booking_id} failed (attempt {job.attempts}/{jobs.MAX_ATTEMPTS}): {error}")
+        try:
+            gave_up = jobs.fail_job(job, error)
+        except Exception as e:
+            logger.error(f"Could not record ticket failure for {job.booking_id}: {e}")
+            return
+        if gave_up and self.on_failed:
+            try:
+                self.on_failed(job)
+            except Exception as e:
+                logger.error(f"Ticket failure callback failed for {job.booking_id}: {e}")
+
+    def _release(self, job: TicketJob) -> None:
+        try:
+            jobs.release_job(job)
+        except Exception as e:
+            logger.error(f"Could not release ticket job {job.id}: {e}")